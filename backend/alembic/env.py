@@ -10,7 +10,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from app.database import Base
-from app.models import user, profile, period, mood, model
+from app.models import user, profile, period, mood, model, prediction, retrain_job, population
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
 from ..models.user import User
 from ..core.security import get_current_active_user
 
@@ -9,7 +9,7 @@ router = APIRouter()
 @router.get("/", status_code=status.HTTP_200_OK)
 async def get_insights(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get analytics and insights for the current user.
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date, datetime
-from ..database import get_db
+from ..database import get_async_db
 from ..models.user import User
 from ..models.mood import DailyMood
 from ..schemas.mood import MoodCreate, MoodResponse, MoodUpdate
 from ..core.security import get_current_active_user
+from ..core.prediction_store import refresh_user_predictions_task
+from ..core.data_events import record_user_data_change, record_mood_write
+from ..core.retrain_queue import schedule_auto_retrain
 from ..core.cycle_calculator import calculate_day_of_cycle
 
 router = APIRouter()
@@ -19,36 +23,37 @@ async def get_mood_history(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get mood history for current user
     """
-    query = db.query(DailyMood).filter(DailyMood.user_id == current_user.id)
+    query = select(DailyMood).where(DailyMood.user_id == current_user.id)
     
     if start_date:
-        query = query.filter(DailyMood.date >= start_date)
+        query = query.where(DailyMood.date >= start_date)
     if end_date:
-        query = query.filter(DailyMood.date <= end_date)
+        query = query.where(DailyMood.date <= end_date)
     
-    moods = query.order_by(DailyMood.date.desc()).offset(skip).limit(limit).all()
+    moods = (await db.scalars(query.order_by(DailyMood.date.desc()).offset(skip).limit(limit))).all()
     return moods
 
 
 @router.post("/", response_model=MoodResponse, status_code=status.HTTP_201_CREATED)
 async def create_mood_entry(
     mood_data: MoodCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new mood entry
     """
     # Check if mood entry already exists for this date
-    existing_mood = db.query(DailyMood).filter(
+    existing_mood = await db.scalar(select(DailyMood).where(
         DailyMood.user_id == current_user.id,
         DailyMood.date == mood_data.date
-    ).first()
+    ))
     
     if existing_mood:
         raise HTTPException(
@@ -59,7 +64,9 @@ async def create_mood_entry(
     # Calculate day of cycle if profile exists
     day_of_cycle = None
     try:
-        day_of_cycle = calculate_day_of_cycle(current_user.id, mood_data.date, db)
+        day_of_cycle = await db.run_sync(
+            lambda session: calculate_day_of_cycle(current_user.id, mood_data.date, session)
+        )
     except Exception:
         # If cycle calculation fails, continue without it
         pass
@@ -72,8 +79,12 @@ async def create_mood_entry(
     )
     
     db.add(db_mood)
-    db.commit()
-    db.refresh(db_mood)
+    await db.run_sync(record_user_data_change, current_user.id)
+    await db.run_sync(record_mood_write, current_user.id)
+    await db.commit()
+    background_tasks.add_task(refresh_user_predictions_task, current_user.id)
+    await db.run_sync(schedule_auto_retrain, current_user.id)
+    await db.refresh(db_mood)
     
     return db_mood
 
@@ -82,15 +93,15 @@ async def create_mood_entry(
 async def get_mood_entry(
     mood_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific mood entry
     """
-    mood = db.query(DailyMood).filter(
+    mood = await db.scalar(select(DailyMood).where(
         DailyMood.id == mood_id,
         DailyMood.user_id == current_user.id
-    ).first()
+    ))
     
     if not mood:
         raise HTTPException(
@@ -105,16 +116,17 @@ async def get_mood_entry(
 async def update_mood_entry(
     mood_id: int,
     mood_data: MoodUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a mood entry
     """
-    mood = db.query(DailyMood).filter(
+    mood = await db.scalar(select(DailyMood).where(
         DailyMood.id == mood_id,
         DailyMood.user_id == current_user.id
-    ).first()
+    ))
     
     if not mood:
         raise HTTPException(
@@ -123,19 +135,26 @@ async def update_mood_entry(
         )
     
     # Update mood fields
+    previous_date = mood.date
     for field, value in mood_data.dict(exclude_unset=True).items():
         setattr(mood, field, value)
     
     # Recalculate day of cycle if date changed
-    if mood_data.date and mood_data.date != mood.date:
+    if mood_data.date and mood_data.date != previous_date:
         try:
-            mood.day_of_cycle = calculate_day_of_cycle(current_user.id, mood_data.date, db)
+            mood.day_of_cycle = await db.run_sync(
+                lambda session: calculate_day_of_cycle(current_user.id, mood_data.date, session)
+            )
         except Exception:
             # If cycle calculation fails, continue without it
             pass
     
-    db.commit()
-    db.refresh(mood)
+    await db.run_sync(record_user_data_change, current_user.id)
+    await db.run_sync(record_mood_write, current_user.id)
+    await db.commit()
+    background_tasks.add_task(refresh_user_predictions_task, current_user.id)
+    await db.run_sync(schedule_auto_retrain, current_user.id)
+    await db.refresh(mood)
     
     return mood
 
@@ -143,16 +162,17 @@ async def update_mood_entry(
 @router.delete("/{mood_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_mood_entry(
     mood_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a mood entry
     """
-    mood = db.query(DailyMood).filter(
+    mood = await db.scalar(select(DailyMood).where(
         DailyMood.id == mood_id,
         DailyMood.user_id == current_user.id
-    ).first()
+    ))
     
     if not mood:
         raise HTTPException(
@@ -160,7 +180,9 @@ async def delete_mood_entry(
             detail="Mood entry not found"
         )
     
-    db.delete(mood)
-    db.commit()
+    await db.delete(mood)
+    await db.run_sync(record_user_data_change, current_user.id)
+    await db.commit()
+    background_tasks.add_task(refresh_user_predictions_task, current_user.id)
     
     return None
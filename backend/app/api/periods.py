@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date
-from ..database import get_db
+from ..database import get_async_db
 from ..models.user import User
 from ..models.period import PeriodRecord
 from ..schemas.period import PeriodCreate, PeriodResponse, PeriodUpdate
 from ..core.security import get_current_active_user
+from ..core.prediction_store import refresh_user_predictions_task
+from ..core.data_events import record_user_data_change
+from ..core.cycle_stats import update_cycle_stats
+from ..core.cycle_calculator import recompute_mood_days_of_cycle_task
 
 router = APIRouter()
 
@@ -18,36 +23,37 @@ async def get_period_history(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get period history for current user
     """
-    query = db.query(PeriodRecord).filter(PeriodRecord.user_id == current_user.id)
+    query = select(PeriodRecord).where(PeriodRecord.user_id == current_user.id)
     
     if start_date:
-        query = query.filter(PeriodRecord.start_date >= start_date)
+        query = query.where(PeriodRecord.start_date >= start_date)
     if end_date:
-        query = query.filter(PeriodRecord.start_date <= end_date)
+        query = query.where(PeriodRecord.start_date <= end_date)
     
-    periods = query.order_by(PeriodRecord.start_date.desc()).offset(skip).limit(limit).all()
+    periods = (await db.scalars(query.order_by(PeriodRecord.start_date.desc()).offset(skip).limit(limit))).all()
     return periods
 
 
 @router.post("/", response_model=PeriodResponse, status_code=status.HTTP_201_CREATED)
 async def create_period_record(
     period_data: PeriodCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new period record
     """
     # Check if period record already exists for this start date
-    existing_period = db.query(PeriodRecord).filter(
+    existing_period = await db.scalar(select(PeriodRecord).where(
         PeriodRecord.user_id == current_user.id,
         PeriodRecord.start_date == period_data.start_date
-    ).first()
+    ))
     
     if existing_period:
         raise HTTPException(
@@ -62,8 +68,12 @@ async def create_period_record(
     )
     
     db.add(db_period)
-    db.commit()
-    db.refresh(db_period)
+    await db.run_sync(lambda session: update_cycle_stats(session, current_user.id, added=db_period.start_date))
+    await db.run_sync(record_user_data_change, current_user.id)
+    await db.commit()
+    background_tasks.add_task(recompute_mood_days_of_cycle_task, current_user.id, [db_period.start_date])
+    background_tasks.add_task(refresh_user_predictions_task, current_user.id)
+    await db.refresh(db_period)
     
     return db_period
 
@@ -72,15 +82,15 @@ async def create_period_record(
 async def get_period_record(
     period_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific period record
     """
-    period = db.query(PeriodRecord).filter(
+    period = await db.scalar(select(PeriodRecord).where(
         PeriodRecord.id == period_id,
         PeriodRecord.user_id == current_user.id
-    ).first()
+    ))
     
     if not period:
         raise HTTPException(
@@ -95,16 +105,17 @@ async def get_period_record(
 async def update_period_record(
     period_id: int,
     period_data: PeriodUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a period record
     """
-    period = db.query(PeriodRecord).filter(
+    period = await db.scalar(select(PeriodRecord).where(
         PeriodRecord.id == period_id,
         PeriodRecord.user_id == current_user.id
-    ).first()
+    ))
     
     if not period:
         raise HTTPException(
@@ -114,11 +125,11 @@ async def update_period_record(
     
     # Check if new start date conflicts with existing records
     if period_data.start_date and period_data.start_date != period.start_date:
-        existing_period = db.query(PeriodRecord).filter(
+        existing_period = await db.scalar(select(PeriodRecord).where(
             PeriodRecord.user_id == current_user.id,
             PeriodRecord.start_date == period_data.start_date,
             PeriodRecord.id != period_id
-        ).first()
+        ))
         
         if existing_period:
             raise HTTPException(
@@ -127,11 +138,20 @@ async def update_period_record(
             )
     
     # Update period fields
+    previous_start = period.start_date
     for field, value in period_data.dict(exclude_unset=True).items():
         setattr(period, field, value)
     
-    db.commit()
-    db.refresh(period)
+    if period.start_date != previous_start:
+        await db.run_sync(lambda session: update_cycle_stats(
+            session, current_user.id, removed=previous_start, added=period.start_date
+        ))
+    await db.run_sync(record_user_data_change, current_user.id)
+    await db.commit()
+    if period.start_date != previous_start:
+        background_tasks.add_task(recompute_mood_days_of_cycle_task, current_user.id, [previous_start, period.start_date])
+    background_tasks.add_task(refresh_user_predictions_task, current_user.id)
+    await db.refresh(period)
     
     return period
 
@@ -139,16 +159,17 @@ async def update_period_record(
 @router.delete("/{period_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_period_record(
     period_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a period record
     """
-    period = db.query(PeriodRecord).filter(
+    period = await db.scalar(select(PeriodRecord).where(
         PeriodRecord.id == period_id,
         PeriodRecord.user_id == current_user.id
-    ).first()
+    ))
     
     if not period:
         raise HTTPException(
@@ -156,7 +177,11 @@ async def delete_period_record(
             detail="Period record not found"
         )
     
-    db.delete(period)
-    db.commit()
+    await db.delete(period)
+    await db.run_sync(lambda session: update_cycle_stats(session, current_user.id, removed=period.start_date))
+    await db.run_sync(record_user_data_change, current_user.id)
+    await db.commit()
+    background_tasks.add_task(recompute_mood_days_of_cycle_task, current_user.id, [period.start_date])
+    background_tasks.add_task(refresh_user_predictions_task, current_user.id)
     
     return None
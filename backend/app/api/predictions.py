@@ -1,70 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, datetime, timedelta
-from ..database import get_db
+from ..config import settings
+from ..database import get_async_db
 from ..models.user import User
 from ..models.mood import DailyMood
-from ..schemas.prediction import PredictionResponse
-from ..schemas.planner import SevenDayPlanResponse
+from ..models.retrain_job import RetrainJob
+from ..schemas.prediction import PredictionResponse, CalendarResponse
+from ..schemas.planner import SevenDayPlanResponse, PlanResponse
+from ..schemas.retrain import RetrainJobResponse
 from ..core.security import get_current_active_user
 from ..core.simple_predictor import SimplePredictor
-from ..core.ml_model import make_prediction, train_model, save_model, should_retrain_model
-from ..core.mood_predictor_ml import make_mood_prediction
-from ..core.symptom_predictor_ml import make_symptom_prediction
-from ..core.seven_day_planner import generate_7_day_plan
+from ..core.ml_model import should_retrain_model
+from ..core.seven_day_planner import generate_7_day_plan, generate_plan
+from ..core.predictor import Predictor, prediction_history
+from ..core.prediction_store import get_fresh_predictions
+from ..core.retrain_queue import enqueue_retrain
+from ..core.user_context import UserContext
+from ..core.response_cache import cached_json_response
+from ..core.process_pool import run_cpu_bound_with_db
 from ..core.mathematical_predictor import get_mathematical_prediction
-from ..core.cycle_calculator import get_cycle_statistics, calculate_day_of_cycle, calculate_days_until_next_period, calculate_cycle_phase
+from ..core.cycle_calculator import get_cycle_statistics, calculate_day_of_cycle, calculate_days_until_next_period, calculate_cycle_phase, get_cycle_calendar
 
 router = APIRouter()
 
 
-@router.get("/current", response_model=PredictionResponse)
-async def get_current_prediction(
-    target_date: Optional[date] = None,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
+def build_current_prediction(user_id: int, target_date: date, db: Session) -> PredictionResponse:
     """
-    Get current prediction for today or specified date.
     Tries to use the ML models first, and falls back to the mathematical predictor if they fail.
     """
-    if target_date is None:
-        target_date = date.today()
-
-    try:
-        # 1. Get energy prediction from the primary ML model
-        energy_prediction = make_prediction(current_user.id, target_date, db)
+    # Profile, periods and moods are loaded once and shared by every model head
+    ctx = UserContext(user_id, db)
 
-        # 2. Get mood prediction from the mood ML model
-        predicted_mood = None
-        try:
-            mood_prediction = make_mood_prediction(current_user.id, target_date, db)
-            predicted_mood = mood_prediction.get("predicted_mood")
-        except ValueError:
-            pass
+    # Hot path: a single lookup in the materialized daily_predictions table
+    stored = get_fresh_predictions(user_id, [target_date], db, ctx)
+    if stored and stored[target_date]["predicted_energy_level"] is not None:
+        return PredictionResponse(**stored[target_date])
 
-        # 3. Get symptom prediction from the symptom ML model
-        predicted_symptoms = []
-        try:
-            symptom_prediction = make_symptom_prediction(current_user.id, target_date, db)
-            predicted_symptoms = symptom_prediction.get("predicted_symptoms", [])
-        except ValueError:
-            pass
-
-        # 4. Combine predictions
-        final_prediction = {
-            **energy_prediction,
-            "predicted_mood": predicted_mood,
-            "predicted_symptoms": predicted_symptoms,
-        }
-        
-        return PredictionResponse(**final_prediction)
+    try:
+        prediction = Predictor(user_id, db, ctx).predict_one(target_date)
+        if prediction["predicted_energy_level"] is None:
+            raise ValueError("Energy model could not predict this date")
+        return PredictionResponse(**prediction)
 
     except ValueError:
         # If any ML model fails (e.g., not enough data), fall back to mathematical predictor
         try:
-            prediction = get_mathematical_prediction(current_user.id, target_date, db)
+            prediction = get_mathematical_prediction(user_id, target_date, db, ctx)
             return PredictionResponse(**prediction)
         except ValueError as e:
             raise HTTPException(
@@ -72,50 +57,87 @@ async def get_current_prediction(
                 detail=str(e)
             )
 
-@router.post("/retrain")
+
+@router.get("/current", response_model=PredictionResponse)
+async def get_current_prediction(
+    request: Request,
+    target_date: Optional[date] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get current prediction for today or specified date.
+    Answers 304 when If-None-Match carries the current ETag.
+    """
+    if target_date is None:
+        target_date = date.today()
+
+    # The ML and cycle code is synchronous; run_sync drives it over this session's connection
+    return await cached_json_response(
+        request, current_user,
+        lambda: db.run_sync(lambda session: build_current_prediction(current_user.id, target_date, session))
+    )
+
+@router.get("/calendar", response_model=CalendarResponse)
+async def get_calendar(
+    request: Request,
+    start: date,
+    end: date,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Day of cycle, phase, predicted period days and fertile window for every
+    date from start to end inclusive, as parallel lists.
+    """
+    if end < start or (end - start).days >= settings.calendar_max_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"end must be on or after start, and cover at most {settings.calendar_max_days} days"
+        )
+
+    def build_calendar(session: Session) -> CalendarResponse:
+        try:
+            return CalendarResponse(**get_cycle_calendar(current_user.id, start, end, session))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return await cached_json_response(request, current_user, lambda: db.run_sync(build_calendar))
+
+
+@router.post("/retrain", response_model=RetrainJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def retrain_all_models(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retrain all ML models for the current user.
+    Queue a retrain of all ML models for the current user.
+    Repeated calls return the job already waiting for this user.
     """
-    results = {}
-    # Energy Model
-    try:
-        energy_model, energy_accuracy = train_model(current_user.id, db)
-        save_model(current_user.id, energy_model, energy_accuracy, db)
-        results["energy_model"] = f"Trained with accuracy: {energy_accuracy:.2f}"
-    except ValueError as e:
-        results["energy_model"] = f"Training failed: {e}"
+    return await db.run_sync(lambda session: enqueue_retrain(current_user.id, session))
 
-    # Mood Model
-    try:
-        from ..core.mood_predictor_ml import train_mood_model, save_mood_model
-        mood_model_data = train_mood_model(current_user.id, db)
-        if mood_model_data:
-            mood_model, mood_accuracy = mood_model_data
-            save_mood_model(current_user.id, mood_model, mood_accuracy, db)
-            results["mood_model"] = f"Trained with accuracy: {mood_accuracy:.2f}"
-        else:
-            results["mood_model"] = "Not enough data to train."
-    except ValueError as e:
-        results["mood_model"] = f"Training failed: {e}"
-
-    # Symptom Model
-    try:
-        from ..core.symptom_predictor_ml import train_symptom_model, save_symptom_model
-        symptom_model_data = train_symptom_model(current_user.id, db)
-        if symptom_model_data:
-            symptom_model, symptom_accuracy, mlb = symptom_model_data
-            save_symptom_model(current_user.id, symptom_model, mlb, symptom_accuracy, db)
-            results["symptom_model"] = f"Trained with accuracy: {symptom_accuracy:.2f}"
-        else:
-            results["symptom_model"] = "Not enough data to train."
-    except ValueError as e:
-        results["symptom_model"] = f"Training failed: {e}"
 
-    return {"message": "Retraining process completed.", "results": results}
+@router.get("/retrain/{job_id}", response_model=RetrainJobResponse)
+async def get_retrain_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the status and progress of a retrain job.
+    """
+    job = await db.scalar(select(RetrainJob).where(
+        RetrainJob.id == job_id,
+        RetrainJob.user_id == current_user.id
+    ))
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Retrain job not found"
+        )
+
+    return job
 
 
 @router.get("/history")
@@ -123,7 +145,7 @@ async def get_prediction_history(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get prediction history for a date range
@@ -133,43 +155,7 @@ async def get_prediction_history(
     if end_date is None:
         end_date = date.today()
     
-    predictions = []
-    current_date = start_date
-    
-    while current_date <= end_date:
-        try:
-            # Get energy prediction
-            energy_prediction = make_prediction(current_user.id, current_date, db)
-            
-            # Get mood prediction
-            predicted_mood = None
-            try:
-                mood_prediction = make_mood_prediction(current_user.id, current_date, db)
-                predicted_mood = mood_prediction.get("predicted_mood")
-            except ValueError:
-                pass
-
-            # Get symptom prediction
-            predicted_symptoms = []
-            try:
-                symptom_prediction = make_symptom_prediction(current_user.id, current_date, db)
-                predicted_symptoms = symptom_prediction.get("predicted_symptoms", [])
-            except ValueError:
-                pass
-
-            # Combine all predictions for the day
-            daily_prediction = {
-                "date": current_date.isoformat(),
-                **energy_prediction,
-                "predicted_mood": predicted_mood,
-                "predicted_symptoms": predicted_symptoms,
-            }
-            predictions.append(daily_prediction)
-        except Exception:
-            # Skip dates where prediction fails
-            pass
-        
-        current_date += timedelta(days=1)
+    predictions = await run_cpu_bound_with_db(db, prediction_history, current_user.id, start_date, end_date)
     
     return {
         "predictions": predictions,
@@ -179,44 +165,82 @@ async def get_prediction_history(
 
 @router.get("/model-status")
 async def get_model_status(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current model status and statistics for all models.
     """
-    from ..models.model import UserModel
+    from ..models.model import UserModel, ActiveModel
     
-    def get_status(model_type: str):
-        model = db.query(UserModel).filter(
-            UserModel.user_id == current_user.id,
-            UserModel.model_type == model_type
-        ).order_by(UserModel.created_at.desc()).first()
+    async def get_status(model_type: str):
+        # Metadata columns of the active version only, never the blob
+        model = (await db.execute(
+            select(
+                UserModel.accuracy_score, UserModel.blob_size_bytes, UserModel.predict_latency_ms, UserModel.created_at
+            ).join(ActiveModel, ActiveModel.model_id == UserModel.id).where(
+                ActiveModel.user_id == current_user.id,
+                ActiveModel.model_type == model_type
+            )
+        )).first()
         return {
             "has_model": model is not None,
             "model_accuracy": model.accuracy_score if model else None,
+            "model_size_bytes": model.blob_size_bytes if model else None,
+            "model_predict_ms": model.predict_latency_ms if model else None,
             "model_created_at": model.created_at if model else None,
         }
 
-    return {
-        "energy_model_status": get_status("energy"),
-        "mood_model_status": get_status("mood"),
-        "symptom_model_status": get_status("symptom"),
-    }
+    async def build():
+        return {
+            "energy_model_status": await get_status(settings.ml_energy_model_type),
+            "mood_model_status": await get_status("mood"),
+            "symptom_model_status": await get_status("symptom"),
+        }
+
+    return await cached_json_response(request, current_user, build)
 
 @router.get("/7-day-plan", response_model=SevenDayPlanResponse)
 async def get_7_day_plan(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate a 7-day plan with daily recommendations.
     """
-    try:
-        plan = generate_7_day_plan(current_user.id, db)
-        return SevenDayPlanResponse(plan=plan)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to generate 7-day plan: {e}"
-        )
\ No newline at end of file
+    async def build():
+        try:
+            plan = await run_cpu_bound_with_db(db, generate_7_day_plan, current_user.id)
+            return SevenDayPlanResponse(plan=plan)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to generate 7-day plan: {e}"
+            )
+
+    return await cached_json_response(request, current_user, build)
+
+
+@router.get("/plan", response_model=PlanResponse)
+async def get_plan(
+    request: Request,
+    days: int = Query(7, ge=7, le=settings.planner_max_days),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Generate a plan with daily recommendations for the next `days` days.
+    """
+    async def build():
+        try:
+            plan = await run_cpu_bound_with_db(db, generate_plan, current_user.id, days=days)
+            return PlanResponse(days=days, plan=plan)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to generate {days}-day plan: {e}"
+            )
+
+    return await cached_json_response(request, current_user, build)
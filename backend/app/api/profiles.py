@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
 from ..models.user import User
 from ..models.profile import UserProfile
 from ..schemas.profile import ProfileCreate, ProfileResponse, ProfileUpdate
 from ..core.security import get_current_active_user
+from ..core.prediction_store import refresh_user_predictions_task
+from ..core.data_events import record_user_data_change
+from ..core.cycle_stats import update_cycle_stats
 
 router = APIRouter()
 
@@ -12,12 +16,12 @@ router = APIRouter()
 @router.get("/me", response_model=ProfileResponse)
 async def get_current_user_profile(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current user's profile
     """
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    profile = await db.scalar(select(UserProfile).where(UserProfile.user_id == current_user.id))
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -29,21 +33,26 @@ async def get_current_user_profile(
 @router.post("/me", response_model=ProfileResponse, status_code=status.HTTP_201_CREATED)
 async def create_user_profile(
     profile_data: ProfileCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create or update user profile
     """
     # Check if profile already exists
-    existing_profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    existing_profile = await db.scalar(select(UserProfile).where(UserProfile.user_id == current_user.id))
     
     if existing_profile:
         # Update existing profile
         for field, value in profile_data.dict(exclude_unset=True).items():
             setattr(existing_profile, field, value)
-        db.commit()
-        db.refresh(existing_profile)
+        # The next-start prediction uses the profile's cycle length until 3 periods are logged
+        await db.run_sync(update_cycle_stats, current_user.id)
+        await db.run_sync(record_user_data_change, current_user.id)
+        await db.commit()
+        background_tasks.add_task(refresh_user_predictions_task, current_user.id)
+        await db.refresh(existing_profile)
         return existing_profile
     else:
         # Create new profile
@@ -52,21 +61,25 @@ async def create_user_profile(
             **profile_data.dict()
         )
         db.add(db_profile)
-        db.commit()
-        db.refresh(db_profile)
+        await db.run_sync(update_cycle_stats, current_user.id)
+        await db.run_sync(record_user_data_change, current_user.id)
+        await db.commit()
+        background_tasks.add_task(refresh_user_predictions_task, current_user.id)
+        await db.refresh(db_profile)
         return db_profile
 
 
 @router.put("/me", response_model=ProfileResponse)
 async def update_user_profile(
     profile_data: ProfileUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update user profile
     """
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    profile = await db.scalar(select(UserProfile).where(UserProfile.user_id == current_user.id))
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -77,6 +90,9 @@ async def update_user_profile(
     for field, value in profile_data.dict(exclude_unset=True).items():
         setattr(profile, field, value)
     
-    db.commit()
-    db.refresh(profile)
+    await db.run_sync(update_cycle_stats, current_user.id)
+    await db.run_sync(record_user_data_change, current_user.id)
+    await db.commit()
+    background_tasks.add_task(refresh_user_predictions_task, current_user.id)
+    await db.refresh(profile)
     return profile
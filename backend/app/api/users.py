@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
 from ..models.user import User
 from ..schemas.user import UserResponse, UserUpdate
 from ..core.security import get_current_active_user, get_password_hash
@@ -20,7 +21,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
 async def update_current_user(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update current user information
@@ -31,10 +32,10 @@ async def update_current_user(
     
     if user_update.email is not None:
         # Check if email is already taken by another user
-        existing_user = db.query(User).filter(
+        existing_user = await db.scalar(select(User).where(
             User.email == user_update.email,
             User.id != current_user.id
-        ).first()
+        ))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -42,8 +43,8 @@ async def update_current_user(
             )
         current_user.email = user_update.email
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     
     return current_user
 
@@ -51,12 +52,12 @@ async def update_current_user(
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_current_user(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete current user account
     """
-    db.delete(current_user)
-    db.commit()
+    await db.delete(current_user)
+    await db.commit()
     
     return None
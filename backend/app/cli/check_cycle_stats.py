@@ -0,0 +1,39 @@
+"""
+Compare every user's cycle_stats aggregates with a rebuild from their period records
+
+Usage: python -m app.cli.check_cycle_stats [--fix]
+Exits with status 1 if any user's aggregates are missing or differ and --fix was not given.
+"""
+
+import argparse
+import logging
+import sys
+
+from ..database import SessionLocal
+from ..core.cycle_stats import check_cycle_stats
+
+logger = logging.getLogger("app.cli.check_cycle_stats")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the cycle_stats aggregates")
+    parser.add_argument("--fix", action="store_true", help="rebuild the aggregates of users that differ")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    db = SessionLocal()
+    try:
+        mismatched = check_cycle_stats(db, fix=args.fix)
+    finally:
+        db.close()
+
+    if not mismatched:
+        logger.info("All cycle_stats aggregates match the period records")
+        return
+    logger.warning("%s %d users: %s", "Rebuilt" if args.fix else "Mismatched", len(mismatched), mismatched)
+    if not args.fix:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Delete model versions beyond ml_model_retention_versions for every user
+
+Usage: python -m app.cli.prune_models
+"""
+
+import logging
+
+from ..database import SessionLocal
+from ..core.model_registry import prune_all_model_versions
+from ..config import settings
+
+logger = logging.getLogger("app.cli.prune_models")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    db = SessionLocal()
+    try:
+        pruned = prune_all_model_versions(db)
+        logger.info("Deleted %d model versions (keeping %d per model type)", pruned, settings.ml_model_retention_versions)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
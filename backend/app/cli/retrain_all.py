@@ -0,0 +1,52 @@
+"""
+Retrain every user's models, e.g. after changing feature code or upgrading sklearn
+
+Usage: python -m app.cli.retrain_all [--workers 4] [--chunk-size 100] [--checkpoint PATH] [--restart]
+Progress is appended to the checkpoint file; rerun the same command to resume
+an interrupted run, or pass --restart to retrain everyone again.
+"""
+
+import argparse
+import logging
+import os
+
+from ..database import SessionLocal
+from ..core.bulk_retrain import bulk_retrain
+
+logger = logging.getLogger("app.cli.retrain_all")
+
+
+def log_throughput(stats: dict) -> None:
+    logger.info(
+        "%d users retrained (%d failed, %d already done) in %.1fs: %.2f users/sec, %.2f CPU-seconds per user",
+        stats["users"], stats["failed"], stats["skipped"], stats["elapsed"],
+        stats["users_per_second"], stats["cpu_seconds_per_user"]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Retrain every user's models")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="training processes; 0 trains in-process")
+    parser.add_argument("--chunk-size", type=int, default=100, help="user ids read per query, and users between progress reports")
+    parser.add_argument("--training-workers", type=int, default=1, help="cores each process trains a user's models with")
+    parser.add_argument("--checkpoint", default="retrain_all.checkpoint.jsonl", help="per-user progress file")
+    parser.add_argument("--restart", action="store_true", help="discard the checkpoint and retrain every user")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    db = SessionLocal()
+    try:
+        stats = bulk_retrain(
+            db, args.checkpoint, workers=args.workers, chunk_size=args.chunk_size,
+            training_workers=args.training_workers, on_progress=log_throughput
+        )
+    finally:
+        db.close()
+    log_throughput(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Retrain worker: drains the retrain_jobs queue
+
+Usage: python -m app.cli.retrain_worker [--once] [--poll-interval SECONDS]
+Run as many workers as there are cores to spare; jobs are claimed atomically.
+"""
+
+import argparse
+import logging
+import time
+
+from ..database import SessionLocal
+from ..core.retrain_queue import drain_queue
+from ..config import settings
+
+logger = logging.getLogger("app.cli.retrain_worker")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Drain the retrain job queue")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    parser.add_argument(
+        "--poll-interval", type=float, default=settings.retrain_worker_poll_seconds,
+        help="seconds to wait between polls of an empty queue"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    while True:
+        db = SessionLocal()
+        try:
+            ran = drain_queue(db)
+        finally:
+            db.close()
+        if ran:
+            logger.info("Ran %d retrain jobs", ran)
+        if args.once:
+            break
+        time.sleep(args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
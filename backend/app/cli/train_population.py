@@ -0,0 +1,26 @@
+"""
+Train the shared population models and recalibrate every user
+
+Usage: python -m app.cli.train_population
+"""
+
+import logging
+
+from ..database import SessionLocal
+from ..core.population_model import train_population_models
+
+logger = logging.getLogger("app.cli.train_population")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    db = SessionLocal()
+    try:
+        for name, result in train_population_models(db).items():
+            logger.info("%s: %s", name, result)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Search forest parameters across a sample of users and write the winners to
+ml_forest_params_path, which training reads
+
+Usage: python -m app.cli.tune_models [--users 20] [--workers 4] [--model-type energy] [--seed 0] [--output PATH]
+"""
+
+import argparse
+import logging
+import os
+
+from ..database import SessionLocal
+from ..core.forest_params import write_forest_params
+from ..core.forest_tuning import TUNED_MODELS, sample_users, tune_forest_params
+
+logger = logging.getLogger("app.cli.tune_models")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="Users to sample")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Evaluation processes; 0 runs in-process")
+    parser.add_argument("--model-type", choices=list(TUNED_MODELS), action="append", help="Tune only this model type (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="User sampling seed")
+    parser.add_argument("--output", help="Parameter file (default: ml_forest_params_path)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    db = SessionLocal()
+    try:
+        user_ids = sample_users(db, args.users, args.seed)
+        logger.info("Tuning on %d users with %d workers", len(user_ids), args.workers)
+        results = tune_forest_params(db, user_ids, args.model_type, workers=args.workers)
+    finally:
+        db.close()
+
+    for model_type, result in results.items():
+        logger.info(
+            "%s: %s (accuracy %.3f, %.0f bytes, %d users)",
+            model_type, result["params"], result["accuracy"], result["blob_bytes"], result["users"]
+        )
+    if results:
+        logger.info("Wrote %s", write_forest_params(results, args.output))
+
+
+if __name__ == "__main__":
+    main()
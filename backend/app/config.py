@@ -26,7 +26,47 @@ class Settings(BaseSettings):
     
     # ML Model settings
     ml_retrain_threshold: int = 10  # Retrain after 10 new mood entries
+    ml_auto_retrain_debounce_seconds: int = 300  # Quiet period after the last mood write before an automatic retrain runs
     ml_accuracy_threshold: float = 0.7  # Minimum accuracy for model acceptance
+    ml_energy_model_type: str = "energy"  # "energy" (RandomForest, full retrain) or "energy_online" (SGD, incremental)
+    ml_model_scope: str = "user"  # "user": per-user models, population model where a user has none; "population": shared models only
+    ml_calibration_prior_strength: float = 20.0  # Pseudo-counts shrinking a user's label frequencies towards the population's
+    ml_model_max_trees: int = 200  # Cap on trees per forest
+    ml_model_max_depth: Optional[int] = None  # Cap on tree depth; None leaves it unlimited
+    ml_model_max_blob_bytes: int = 512 * 1024  # Largest serialized model training may choose
+    ml_model_max_predict_ms: float = 5.0  # Slowest one-day prediction training may choose
+    ml_model_accuracy_tolerance: float = 0.02  # Accuracy a smaller forest may give up against the full one
+    ml_forest_params_path: str = "forest_params.json"  # Tuned forest parameters per model type, written by app.cli.tune_models
+    ml_model_retention_versions: int = 3  # Versions kept per user and model type, the active one included
+    ml_model_cache_max_entries: int = 512  # Deserialized models kept in memory per process
+    ml_model_cache_max_bytes: int = 256 * 1024 * 1024  # Cap on total serialized size of cached models
+    ml_training_workers: int = 4  # Cores one retrain may use: its models train concurrently, trees and CV folds share the rest
+    ml_process_pool_workers: int = 2  # Processes for model fitting and multi-day inference; 0 runs them in-process
+    ml_retrain_job_timeout_seconds: int = 3600  # A job running longer is taken to have lost its worker and is failed
+    retrain_worker_poll_seconds: float = 2.0  # Idle wait of app.cli.retrain_worker between queue polls
+
+    # Planner settings
+    planner_max_days: int = 90  # Longest horizon /predictions/plan will generate
+    calendar_max_days: int = 366  # Longest range /predictions/calendar will cover
+
+    # Materialized daily predictions
+    prediction_refresh_days: int = 7  # Days from today kept in daily_predictions
+    prediction_refresh_interval_minutes: int = 60
+    prediction_scheduler_enabled: bool = True
+
+    # Per-user period start indexes for day-of-cycle lookups
+    cycle_index_cache_max_entries: int = 10000
+    cycle_index_cache_max_bytes: int = 16 * 1024 * 1024
+
+    # Next-period estimate: EWMA of cycle length and its variance, kept in cycle_stats
+    cycle_ewma_alpha: float = 0.3  # Weight of the newest cycle length
+    cycle_prediction_prior_std_days: float = 4.0  # Spread assumed while the profile's cycle length is used
+    cycle_prediction_min_std_days: float = 1.0  # Floor under the EWMA spread, so regular cycles keep a window
+    cycle_prediction_window_z: float = 1.28  # Half-width of the window in standard deviations (about 80%)
+
+    # Serialized response cache for conditional GETs
+    response_cache_max_entries: int = 10000
+    response_cache_max_bytes: int = 64 * 1024 * 1024
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,177 @@
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Set
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.profile import UserProfile
+from ..core.retrain_queue import retrain_user_models
+from ..core.prediction_store import refresh_daily_predictions
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def iter_user_id_chunks(db: Session, chunk_size: int) -> Iterator[List[int]]:
+    """
+    Ids of users with a profile in ascending chunks, paged by id so no
+    query holds more than chunk_size rows
+    """
+    last_id = 0
+    while True:
+        chunk = db.scalars(
+            select(UserProfile.user_id).where(UserProfile.user_id > last_id)
+            .order_by(UserProfile.user_id).limit(chunk_size)
+        ).all()
+        if not chunk:
+            return
+        yield list(chunk)
+        last_id = chunk[-1]
+
+
+def load_checkpoint(path: str) -> Set[int]:
+    """
+    Ids of users a previous run retrained, read from its checkpoint file
+    (one JSON line per user). Failed users are left out so a resumed run
+    retries them, and a line cut short by an interrupted write is ignored.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                outcome = json.loads(line)
+            except ValueError:
+                continue
+            if "error" not in outcome:
+                done.add(outcome["user_id"])
+    return done
+
+
+def retrain_user(user_id: int, db: Session) -> dict:
+    """
+    Retrain one user's models and refresh their stored predictions, as a
+    retrain job does. Returns the step results and the wall and CPU seconds spent.
+    """
+    started, cpu_started = time.perf_counter(), time.process_time()
+    results = retrain_user_models(user_id, db)
+    refresh_daily_predictions(user_id, db)
+    return {
+        "user_id": user_id,
+        "results": results,
+        "seconds": round(time.perf_counter() - started, 3),
+        # process_time counts every thread of the process, which runs one user at a time
+        "cpu_seconds": round(time.process_time() - cpu_started, 3),
+    }
+
+
+def _init_worker(training_workers: int) -> None:
+    settings.ml_training_workers = training_workers
+
+
+def _retrain_in_worker(user_id: int) -> dict:
+    # Runs in a pool process, which opens its own connection
+    db = SessionLocal()
+    try:
+        return retrain_user(user_id, db)
+    finally:
+        db.close()
+
+
+def _failed(user_id: int, error: Exception) -> dict:
+    logger.error("Retraining user %d failed: %s", user_id, error)
+    return {"user_id": user_id, "error": str(error), "seconds": 0.0, "cpu_seconds": 0.0}
+
+
+def throughput(stats: Dict[str, float], started: float) -> Dict[str, float]:
+    """
+    Stats with users/sec (wall clock) and CPU-seconds per retrained user
+    """
+    elapsed = time.perf_counter() - started
+    users = stats["users"]
+    return {
+        **stats,
+        "elapsed": round(elapsed, 3),
+        "users_per_second": round(users / elapsed, 3) if elapsed else 0.0,
+        "cpu_seconds_per_user": round(stats["cpu_seconds"] / users, 3) if users else 0.0,
+    }
+
+
+def bulk_retrain(
+    db: Session, checkpoint_path: str, workers: int = 1, chunk_size: int = 100,
+    training_workers: int = 1, on_progress: Optional[Callable[[Dict[str, float]], None]] = None
+) -> Dict[str, float]:
+    """
+    Retrain every user with a profile, streaming ids chunk_size at a time
+    into `workers` processes (0 runs in-process on `db`) that each train
+    with a budget of training_workers cores.
+    Each finished user is appended to the checkpoint file, and users already
+    in it are skipped, so an interrupted run resumes where it stopped.
+    `on_progress` gets the running stats after each chunk's worth of users;
+    the final stats are returned.
+    """
+    done = load_checkpoint(checkpoint_path)
+    stats = {"users": 0, "failed": 0, "skipped": 0, "cpu_seconds": 0.0}
+    started = time.perf_counter()
+
+    def pending_ids() -> Iterator[int]:
+        for chunk in iter_user_id_chunks(db, chunk_size):
+            for user_id in chunk:
+                if user_id in done:
+                    stats["skipped"] += 1
+                else:
+                    yield user_id
+
+    with open(checkpoint_path, "a") as checkpoint:
+        def record(outcome: dict) -> None:
+            checkpoint.write(json.dumps(outcome) + "\n")
+            checkpoint.flush()
+            stats["users"] += 1
+            stats["failed"] += "error" in outcome
+            stats["cpu_seconds"] += outcome["cpu_seconds"]
+            if on_progress and stats["users"] % chunk_size == 0:
+                on_progress(throughput(stats, started))
+
+        if workers <= 0:
+            previous_budget = settings.ml_training_workers
+            _init_worker(training_workers)
+            try:
+                for user_id in pending_ids():
+                    try:
+                        record(retrain_user(user_id, db))
+                    except Exception as e:
+                        db.rollback()
+                        record(_failed(user_id, e))
+            finally:
+                settings.ml_training_workers = previous_budget
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(training_workers,)
+            ) as executor:
+                # Keep a bounded window in flight so ids are read as the pool drains them
+                in_flight = {}
+                ids = pending_ids()
+                while True:
+                    for user_id in ids:
+                        in_flight[executor.submit(_retrain_in_worker, user_id)] = user_id
+                        if len(in_flight) >= workers * 2:
+                            break
+                    if not in_flight:
+                        break
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        user_id = in_flight.pop(future)
+                        try:
+                            record(future.result())
+                        except Exception as e:
+                            record(_failed(user_id, e))
+
+    return throughput(stats, started)
+
@@ -1,44 +1,90 @@
+import math
+
+import numpy as np
 from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import select, update, func
 from sqlalchemy.orm import Session
-from ..models.profile import UserProfile
+from ..database import SessionLocal
+from ..models.mood import DailyMood
 from ..models.period import PeriodRecord
+from .user_context import UserContext
+from .cycle_stats import predict_next_start, next_period_window, project_period_starts
+from .cycle_index import PHASES, count_from_starts
 
 
-def calculate_day_of_cycle(user_id: int, target_date: date, db: Session) -> int:
+def calculate_day_of_cycle(user_id: int, target_date: date, db: Session, ctx: Optional[UserContext] = None) -> int:
     """
     Calculate the day of cycle for a given date
     """
-    # Get user profile
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    if not profile:
-        raise ValueError("User profile not found")
-    
-    # Get all period records for the user
-    periods = db.query(PeriodRecord).filter(
+    ctx = ctx or UserContext(user_id, db)
+    return ctx.cycle_index.day_of_cycle(target_date)
+
+
+def calculate_days_of_cycle(
+    user_id: int,
+    target_dates: List[date],
+    db: Session,
+    ctx: Optional[UserContext] = None
+) -> List[int]:
+    """
+    Calculate the day of cycle for many dates with one lookup in the cycle index
+    """
+    if not target_dates:
+        return []
+
+    ctx = ctx or UserContext(user_id, db)
+    return ctx.cycle_index.days_of_cycle(target_dates).tolist()
+
+
+def recompute_mood_days_of_cycle(user_id: int, changed_starts: List[date], db: Session) -> int:
+    """
+    Bring DailyMood.day_of_cycle up to date after period starts were added,
+    removed or moved; changed_starts holds every start involved, old and new.
+    Only moods from the earliest changed start up to the next unchanged start
+    after the latest one can move. They get one lookup in the cycle index and
+    one bulk UPDATE of the rows whose value changed.
+    Returns the number of moods updated. The caller commits.
+    """
+    window_start, latest_change = min(changed_starts), max(changed_starts)
+    window_end = db.scalar(select(func.min(PeriodRecord.start_date)).where(
         PeriodRecord.user_id == user_id,
-        PeriodRecord.start_date <= target_date
-    ).order_by(PeriodRecord.start_date.desc()).all()
-    
-    if not periods:
-        if profile.last_period_start:
-            last_period_start = profile.last_period_start
-        else:
-            raise ValueError("No period records or last period start date found in profile.")
-    else:
-        # Find the most recent period start date before or on the target date
-        last_period_start = None
-        for period in periods:
-            if period.start_date <= target_date:
-                last_period_start = period.start_date
-                break
-        
-        if not last_period_start:
-            raise ValueError("No period start date found before target date in records.")
-    
-    # Calculate day of cycle
-    day_of_cycle = (target_date - last_period_start).days + 1
-    
-    return day_of_cycle
+        PeriodRecord.start_date > latest_change
+    ))
+    query = select(DailyMood.id, DailyMood.date, DailyMood.day_of_cycle).where(
+        DailyMood.user_id == user_id,
+        DailyMood.date >= window_start
+    )
+    if window_end:
+        query = query.where(DailyMood.date < window_end)
+    moods = db.execute(query).all()
+
+    ctx = UserContext(user_id, db)
+    if not moods or not ctx.profile:
+        return 0
+
+    mood_ids, mood_dates, stored_days = zip(*moods)
+    days_of_cycle = ctx.cycle_index.days_of_cycle_or_none(mood_dates)
+    changes = [
+        {"id": mood_id, "day_of_cycle": day_of_cycle}
+        for mood_id, day_of_cycle, stored_day in zip(mood_ids, days_of_cycle, stored_days)
+        if day_of_cycle != stored_day
+    ]
+    if changes:
+        db.execute(update(DailyMood), changes)
+    return len(changes)
+
+
+def recompute_mood_days_of_cycle_task(user_id: int, changed_starts: List[date]) -> None:
+    """
+    Background task entry point for period writes, in a session of its own
+    """
+    db = SessionLocal()
+    try:
+        recompute_mood_days_of_cycle(user_id, changed_starts, db)
+        db.commit()
+    finally:
+        db.close()
 
 
 def calculate_cycle_phase(day_of_cycle: int, cycle_length: int, luteal_length: int) -> str:
@@ -57,101 +103,130 @@ def calculate_cycle_phase(day_of_cycle: int, cycle_length: int, luteal_length: i
         return "Next Cycle"
 
 
-def calculate_next_period_date(user_id: int, db: Session) -> date:
+def calculate_next_period_date(user_id: int, db: Session, ctx: Optional[UserContext] = None) -> date:
     """
-    Calculates the next expected period date based on the user's
-    historical average cycle length.
-    Requires at least 3 logged cycles to use the statistical method,
+    Calculates the next expected period date from an exponentially weighted
+    mean of the user's cycle lengths, so recent cycles count for more.
+    Requires at least 3 logged periods to use the statistical method,
     otherwise falls back to the profile's default cycle length.
+    Read from the user's cycle_stats row, kept current by period and profile writes.
     """
-    # Get user profile
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    if not profile:
-        raise ValueError("User profile not found")
-
-    # Get all period records, sorted by start date
-    periods = db.query(PeriodRecord).filter(
-        PeriodRecord.user_id == user_id
-    ).order_by(PeriodRecord.start_date).all()
+    ctx = ctx or UserContext(user_id, db)
+    profile = ctx.require_profile()
+    stats = ctx.cycle_stats
 
-    if not periods:
+    if not stats.period_count:
         raise ValueError("No period records found to calculate next period date")
 
-    latest_period_start_date = periods[-1].start_date
-    
-    # Check if there is enough data for statistical prediction
-    if len(periods) < 3:
-        # Fallback to simple prediction using profile cycle length
-        predicted_cycle_length = profile.cycle_length
-    else:
-        # Calculate the average cycle length from historical data
-        cycle_lengths = []
-        for i in range(1, len(periods)):
-            cycle_length = (periods[i].start_date - periods[i-1].start_date).days
-            cycle_lengths.append(cycle_length)
-        
-        # Use a simple average for prediction
-        # A weighted average could be used here for more accuracy
-        predicted_cycle_length = sum(cycle_lengths) / len(cycle_lengths)
-
-    # Calculate next period date
-    next_period_date = latest_period_start_date + timedelta(days=int(round(predicted_cycle_length)))
-    
-    return next_period_date
+    return stats.predicted_next_start or predict_next_start(stats, profile.cycle_length)
+
+
+def calculate_next_period_window(
+    user_id: int, db: Session, ctx: Optional[UserContext] = None
+) -> Optional[Tuple[int, int, int]]:
+    """
+    Days from today until the predicted next period, and until the earliest
+    and latest days of its confidence window; None without period records.
+    A period already overdue counts as 0 days away.
+    """
+    ctx = ctx or UserContext(user_id, db)
+    profile = ctx.require_profile()
+    window = next_period_window(ctx.cycle_stats, profile.cycle_length)
+    if window is None:
+        return None
+    today = date.today()
+    predicted, earliest, latest = ((day - today).days for day in window)
+    return max(0, predicted), max(0, earliest), max(0, latest)
 
 
-def calculate_days_until_next_period(user_id: int, db: Session) -> int:
+def calculate_days_until_next_period(user_id: int, db: Session, ctx: Optional[UserContext] = None) -> int:
     """
     Calculate days until next period
     """
     try:
-        next_period_date = calculate_next_period_date(user_id, db)
-        today = date.today()
-        days_until = (next_period_date - today).days
-        return max(0, days_until)
+        window = calculate_next_period_window(user_id, db, ctx)
     except ValueError:
         return None
+    return window[0] if window else None
 
 
-def get_cycle_statistics(user_id: int, db: Session) -> dict:
+def get_cycle_statistics(user_id: int, db: Session, ctx: Optional[UserContext] = None) -> dict:
     """
-    Get cycle statistics for the user
+    Get cycle statistics for the user, from their cycle_stats aggregates
     """
-    # Get user profile
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+    ctx = ctx or UserContext(user_id, db)
+    profile = ctx.profile
     if not profile:
         return None
     
-    # Get all period records
-    periods = db.query(PeriodRecord).filter(
-        PeriodRecord.user_id == user_id
-    ).order_by(PeriodRecord.start_date).all()
+    stats = ctx.cycle_stats
     
-    if len(periods) < 2:
+    if stats.period_count < 2:
         return {
-            "total_periods": len(periods),
+            "total_periods": stats.period_count,
             "average_cycle_length": profile.cycle_length,
             "current_cycle_length": None
         }
     
-    # Calculate actual cycle lengths
-    cycle_lengths = []
-    for i in range(1, len(periods)):
-        cycle_length = (periods[i].start_date - periods[i-1].start_date).days
-        cycle_lengths.append(cycle_length)
-    
-    # Calculate statistics
-    avg_cycle_length = sum(cycle_lengths) / len(cycle_lengths)
+    # Mean and (population) standard deviation from the running sums
+    avg_cycle_length = stats.cycle_length_sum / stats.cycle_count
+    variance = max(0.0, stats.cycle_length_sum_sq / stats.cycle_count - avg_cycle_length ** 2)
     
     # Get current cycle length
-    latest_period = periods[-1]
     today = date.today()
-    current_cycle_length = (today - latest_period.start_date).days
+    current_cycle_length = (today - stats.last_period_start).days
     
     return {
-        "total_periods": len(periods),
+        "total_periods": stats.period_count,
         "average_cycle_length": round(avg_cycle_length, 1),
+        "cycle_length_std": round(math.sqrt(variance), 1),
         "current_cycle_length": current_cycle_length,
-        "min_cycle_length": min(cycle_lengths),
-        "max_cycle_length": max(cycle_lengths)
+        "min_cycle_length": stats.min_cycle_length,
+        "max_cycle_length": stats.max_cycle_length
+    }
+
+
+def get_cycle_calendar(
+    user_id: int, start_date: date, end_date: date, db: Session, ctx: Optional[UserContext] = None
+) -> dict:
+    """
+    Day of cycle, phase, predicted period days and fertile window for every
+    date from start_date to end_date inclusive, as one list per field.
+    Day of cycle and phase count from logged starts exactly as
+    calculate_day_of_cycle and calculate_cycle_phase do (None before the
+    first known start); phases are indexes into "phase_names". Predicted
+    period days repeat the next-start prediction every predicted cycle
+    length, and the fertile window (the five days before ovulation through
+    the day after) counts from those predicted starts once they begin.
+    """
+    if end_date < start_date:
+        raise ValueError("end must not be before start")
+    ctx = ctx or UserContext(user_id, db)
+    profile = ctx.require_profile()
+    index = ctx.cycle_index
+
+    days, placed = index.days_of_cycle_range(start_date, end_date)
+    phase_codes = index.phase_codes(days)
+    targets = np.arange(start_date.toordinal(), end_date.toordinal() + 1)
+
+    # Predicted starts after the last logged one continue the cycle count
+    last_logged = index.starts[-1] if len(index.starts) else None
+    predicted_starts = np.array([
+        start.toordinal() for start in project_period_starts(ctx.cycle_stats, profile.cycle_length, end_date)
+        if last_logged is None or start.toordinal() > last_logged
+    ], dtype=np.int64)
+    projected_days, projected_placed = count_from_starts(predicted_starts, targets)
+    predicted_period = projected_placed & (projected_days <= profile.menses_length)
+
+    cycle_days = np.where(projected_placed, projected_days, days)
+    fertile = (projected_placed | placed) & (cycle_days >= index.ovulation_day - 5) & (cycle_days <= index.ovulation_day + 1)
+
+    return {
+        "start": start_date,
+        "end": end_date,
+        "phase_names": PHASES.tolist(),
+        "day_of_cycle": [int(day) if is_placed else None for day, is_placed in zip(days, placed)],
+        "cycle_phase": [int(code) if is_placed else None for code, is_placed in zip(phase_codes, placed)],
+        "predicted_period": predicted_period.tolist(),
+        "fertile": fertile.tolist(),
     }
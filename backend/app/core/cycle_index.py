@@ -0,0 +1,148 @@
+from bisect import bisect_right
+from datetime import date
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.lru_cache import LRUCache
+from ..config import settings
+
+if TYPE_CHECKING:
+    from ..core.user_context import UserContext
+
+# Keyed (user_id, "cycle_index", data_version): period and profile writes bump
+# the version, so an index is never served after they change, in any process
+cycle_index_cache = LRUCache(
+    max_entries=settings.cycle_index_cache_max_entries,
+    max_bytes=settings.cycle_index_cache_max_bytes,
+)
+
+PHASES = np.array(["Menses", "Follicular", "Luteal", "Next Cycle"])
+
+
+def count_from_starts(starts: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For day ordinals `targets`, days since the last of the sorted ordinals
+    `starts` on or before each, plus one, and a mask of the targets some
+    start precedes (the others are not valid)
+    """
+    idx = np.searchsorted(starts, targets, side="right")
+    preceding = starts[np.maximum(idx - 1, 0)] if len(starts) else np.zeros_like(targets)
+    return targets - preceding + 1, idx > 0
+
+
+class CycleIndex:
+    """
+    A user's period start dates as sorted day ordinals, plus the profile
+    values day of cycle and phase depend on. Answers one date by bisection
+    and many with a single searchsorted.
+    """
+
+    __slots__ = ("starts", "_starts", "fallback_start", "cycle_length", "luteal_length")
+
+    def __init__(
+        self, period_starts: Sequence[date], fallback_start: Optional[date],
+        cycle_length: int, luteal_length: int
+    ):
+        self._starts = [start.toordinal() for start in period_starts]
+        self.starts = np.array(self._starts, dtype=np.int64)
+        self.fallback_start = fallback_start.toordinal() if fallback_start else None
+        self.cycle_length = int(cycle_length)
+        self.luteal_length = int(luteal_length)
+
+    @classmethod
+    def from_context(cls, ctx: "UserContext") -> "CycleIndex":
+        profile = ctx.require_profile()
+        return cls(ctx.period_starts, profile.last_period_start, profile.cycle_length, profile.luteal_length)
+
+    @property
+    def ovulation_day(self) -> int:
+        """Last follicular day of cycle, as calculate_cycle_phase places it"""
+        return self.cycle_length - self.luteal_length - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.starts.nbytes + 8 * len(self._starts) + 64
+
+    def _require_fallback(self) -> int:
+        if self.fallback_start is None:
+            raise ValueError("No period records or last period start date found in profile.")
+        return self.fallback_start
+
+    def day_of_cycle(self, target_date: date) -> int:
+        """
+        Days since the last period start on or before the date, plus one;
+        the profile's last period start when no period precedes the date
+        """
+        target = target_date.toordinal()
+        idx = bisect_right(self._starts, target)
+        start = self._starts[idx - 1] if idx else self._require_fallback()
+        return target - start + 1
+
+    def _days_of_cycle(self, target_dates: Iterable[date]) -> Tuple[np.ndarray, np.ndarray]:
+        # Days of cycle, and which dates have a start to count from
+        targets = np.fromiter((target_date.toordinal() for target_date in target_dates), dtype=np.int64)
+        return self._days_of_cycle_ordinals(targets)
+
+    def _days_of_cycle_ordinals(self, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        days, placed = count_from_starts(self.starts, targets)
+        if self.fallback_start is not None:
+            days = np.where(placed, days, targets - self.fallback_start + 1)
+            placed[:] = True
+        return days, placed
+
+    def days_of_cycle_range(self, start_date: date, end_date: date) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Days of cycle from start_date to end_date inclusive, and a mask of the
+        dates a period start or the fallback precedes (the others are not valid)
+        """
+        return self._days_of_cycle_ordinals(np.arange(start_date.toordinal(), end_date.toordinal() + 1))
+
+    def days_of_cycle(self, target_dates: Iterable[date]) -> np.ndarray:
+        """
+        day_of_cycle for every date, as an int64 array
+        """
+        days, placed = self._days_of_cycle(target_dates)
+        if not placed.all():
+            self._require_fallback()
+        return days
+
+    def days_of_cycle_or_none(self, target_dates: Iterable[date]) -> List[Optional[int]]:
+        """
+        days_of_cycle, with None for dates no period start or fallback precedes
+        """
+        days, placed = self._days_of_cycle(target_dates)
+        return [int(day) if is_placed else None for day, is_placed in zip(days, placed)]
+
+    def phase_codes(self, days_of_cycle: np.ndarray) -> np.ndarray:
+        """
+        calculate_cycle_phase over an array of days of cycle, as indexes into PHASES
+        """
+        days_of_cycle = np.asarray(days_of_cycle)
+        return np.select(
+            [days_of_cycle <= 5, days_of_cycle <= self.ovulation_day, days_of_cycle <= self.cycle_length],
+            [0, 1, 2], default=3
+        )
+
+    def phases(self, days_of_cycle: np.ndarray) -> np.ndarray:
+        """
+        calculate_cycle_phase over an array of days of cycle
+        """
+        return PHASES[self.phase_codes(days_of_cycle)]
+
+    def phase(self, target_date: date) -> str:
+        return str(self.phases(np.array([self.day_of_cycle(target_date)]))[0])
+
+
+def get_cycle_index(ctx: "UserContext") -> CycleIndex:
+    """
+    The user's cycle index, built from the context on a cache miss
+    """
+    key = (ctx.user_id, "cycle_index", ctx.data_version)
+    index = cycle_index_cache.get(key)
+    if index is None:
+        index = CycleIndex.from_context(ctx)
+        # Drop indexes of older versions before caching this one
+        cycle_index_cache.invalidate(ctx.user_id)
+        cycle_index_cache.put(key, index, index.nbytes)
+    return index
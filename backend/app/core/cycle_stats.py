@@ -0,0 +1,264 @@
+import math
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select, func, union
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.period import PeriodRecord
+from ..models.profile import UserProfile
+from ..models.cycle_stats import CycleStats
+
+if TYPE_CHECKING:
+    from ..core.user_context import UserContext
+
+STATS_FIELDS = (
+    "period_count", "cycle_count", "cycle_length_sum", "cycle_length_sum_sq",
+    "min_cycle_length", "max_cycle_length", "last_period_start", "predicted_next_start",
+    "ewma_cycle_length", "ewma_cycle_variance",
+)
+
+
+def ewma_step(mean: Optional[float], variance: Optional[float], cycle_length: int) -> Tuple[float, float]:
+    """
+    Fold one more cycle length into an exponentially weighted mean and
+    variance. The first cycle length starts both off, at that length and 0.
+    """
+    if mean is None:
+        return float(cycle_length), 0.0
+    alpha = settings.cycle_ewma_alpha
+    delta = cycle_length - mean
+    return mean + alpha * delta, (1 - alpha) * (variance + alpha * delta * delta)
+
+
+def _ewma(cycle_lengths: Iterable[int]) -> Tuple[Optional[float], Optional[float]]:
+    mean = variance = None
+    for length in cycle_lengths:
+        mean, variance = ewma_step(mean, variance, length)
+    return mean, variance
+
+
+def _predicted_cycle(stats: CycleStats, profile_cycle_length: Optional[int]) -> Optional[Tuple[float, float]]:
+    # Expected cycle length and its standard deviation: the EWMA once 3
+    # periods are logged, the profile's cycle length with a prior spread before
+    if stats.period_count < 3 or stats.ewma_cycle_length is None:
+        if profile_cycle_length is None:
+            return None
+        return profile_cycle_length, settings.cycle_prediction_prior_std_days
+    std = math.sqrt(max(0.0, stats.ewma_cycle_variance or 0.0))
+    return stats.ewma_cycle_length, max(std, settings.cycle_prediction_min_std_days)
+
+
+def predict_next_start(stats: CycleStats, profile_cycle_length: Optional[int]) -> Optional[date]:
+    """
+    Last start plus the exponentially weighted mean cycle length, or the
+    profile's cycle length with fewer than 3 periods logged
+    """
+    if not stats.period_count:
+        return None
+    predicted = _predicted_cycle(stats, profile_cycle_length)
+    if predicted is None:
+        return None
+    return stats.last_period_start + timedelta(days=int(round(predicted[0])))
+
+
+def next_period_window(stats: CycleStats, profile_cycle_length: Optional[int]) -> Optional[Tuple[date, date, date]]:
+    """
+    (predicted start, earliest, latest): the window spans
+    settings.cycle_prediction_window_z standard deviations either side of
+    the predicted cycle length. Reads only the aggregates, no period starts.
+    """
+    if not stats.period_count:
+        return None
+    predicted_next_start = stats.predicted_next_start or predict_next_start(stats, profile_cycle_length)
+    predicted = _predicted_cycle(stats, profile_cycle_length)
+    if predicted_next_start is None or predicted is None:
+        return None
+    half_width = timedelta(days=math.ceil(settings.cycle_prediction_window_z * predicted[1]))
+    return predicted_next_start, predicted_next_start - half_width, predicted_next_start + half_width
+
+
+def project_period_starts(stats: CycleStats, profile_cycle_length: Optional[int], end_date: date) -> List[date]:
+    """
+    The predicted next start and those after it, one predicted cycle length
+    apart, up to end_date
+    """
+    predicted_next_start = stats.predicted_next_start or predict_next_start(stats, profile_cycle_length)
+    predicted = _predicted_cycle(stats, profile_cycle_length) if stats.period_count else None
+    if predicted_next_start is None or predicted is None:
+        return []
+    step = timedelta(days=max(1, int(round(predicted[0]))))
+    starts = []
+    while predicted_next_start <= end_date:
+        starts.append(predicted_next_start)
+        predicted_next_start += step
+    return starts
+
+
+def _profile_cycle_length(user_id: int, db: Session) -> Optional[int]:
+    return db.scalar(select(UserProfile.cycle_length).where(UserProfile.user_id == user_id))
+
+
+def _fill(stats: CycleStats, period_starts: Sequence[date], profile_cycle_length: Optional[int]) -> CycleStats:
+    cycle_lengths = [(later - earlier).days for earlier, later in zip(period_starts, period_starts[1:])]
+    stats.period_count = len(period_starts)
+    stats.cycle_count = len(cycle_lengths)
+    stats.cycle_length_sum = sum(cycle_lengths)
+    stats.cycle_length_sum_sq = sum(length * length for length in cycle_lengths)
+    stats.min_cycle_length = min(cycle_lengths, default=None)
+    stats.max_cycle_length = max(cycle_lengths, default=None)
+    stats.last_period_start = period_starts[-1] if period_starts else None
+    stats.ewma_cycle_length, stats.ewma_cycle_variance = _ewma(cycle_lengths)
+    stats.predicted_next_start = predict_next_start(stats, profile_cycle_length)
+    return stats
+
+
+def compute_cycle_stats(user_id: int, db: Session) -> CycleStats:
+    """
+    A user's aggregates computed from every period start, not added to the session
+    """
+    period_starts = db.scalars(
+        select(PeriodRecord.start_date).where(PeriodRecord.user_id == user_id).order_by(PeriodRecord.start_date)
+    ).all()
+    return _fill(CycleStats(user_id=user_id), period_starts, _profile_cycle_length(user_id, db))
+
+
+def rebuild_cycle_stats(user_id: int, db: Session) -> CycleStats:
+    """
+    Recompute a user's stored aggregates from scratch. The caller commits.
+    """
+    computed = compute_cycle_stats(user_id, db)
+    stats = db.get(CycleStats, user_id)
+    if stats is None:
+        db.add(computed)
+        return computed
+    for field in STATS_FIELDS:
+        setattr(stats, field, getattr(computed, field))
+    return stats
+
+
+def load_cycle_stats(ctx: "UserContext") -> CycleStats:
+    """
+    The stored aggregates, or ones computed on the fly from the context for
+    a user whose periods were written without going through update_cycle_stats
+    """
+    stats = ctx.db.get(CycleStats, ctx.user_id)
+    if stats is None:
+        profile = ctx.profile
+        stats = _fill(CycleStats(user_id=ctx.user_id), ctx.period_starts, profile.cycle_length if profile else None)
+    return stats
+
+
+def _neighbours(user_id: int, start: date, excluded: List[date], db: Session) -> Tuple[Optional[date], Optional[date]]:
+    # The nearest other period starts before and after `start`
+    others = [PeriodRecord.user_id == user_id, PeriodRecord.start_date.notin_(excluded)]
+    before = db.scalar(select(func.max(PeriodRecord.start_date)).where(*others, PeriodRecord.start_date < start))
+    after = db.scalar(select(func.min(PeriodRecord.start_date)).where(*others, PeriodRecord.start_date > start))
+    return before, after
+
+
+def _gap_changes(start: date, before: Optional[date], after: Optional[date]) -> Tuple[List[int], List[int]]:
+    # Cycle lengths that inserting `start` between its neighbours removes and adds
+    removed = [(after - before).days] if before and after else []
+    added = [(start - before).days] if before else []
+    added += [(after - start).days] if after else []
+    return removed, added
+
+
+def _apply_gaps(stats: CycleStats, removed: Iterable[int], added: Iterable[int]) -> bool:
+    # False when a removed cycle length was the minimum or maximum, which only a rebuild can replace
+    removed, added = list(removed), list(added)
+    if any(length in (stats.min_cycle_length, stats.max_cycle_length) for length in removed):
+        return False
+    stats.cycle_count += len(added) - len(removed)
+    stats.cycle_length_sum += sum(added) - sum(removed)
+    stats.cycle_length_sum_sq += sum(length * length for length in added) - sum(length * length for length in removed)
+    for length in added:
+        if stats.min_cycle_length is None or length < stats.min_cycle_length:
+            stats.min_cycle_length = length
+        if stats.max_cycle_length is None or length > stats.max_cycle_length:
+            stats.max_cycle_length = length
+    return True
+
+
+def _refresh_ewma(stats: CycleStats, user_id: int, db: Session) -> None:
+    # The EWMA weighs cycles by position, so any change short of an append replays every start
+    period_starts = db.scalars(
+        select(PeriodRecord.start_date).where(PeriodRecord.user_id == user_id).order_by(PeriodRecord.start_date)
+    ).all()
+    stats.ewma_cycle_length, stats.ewma_cycle_variance = _ewma(
+        (later - earlier).days for earlier, later in zip(period_starts, period_starts[1:])
+    )
+
+
+def update_cycle_stats(
+    db: Session, user_id: int, removed: Optional[date] = None, added: Optional[date] = None
+) -> CycleStats:
+    """
+    Move a user's aggregates past one period write, inside its transaction:
+    a start date removed (delete), added (create), or both (a start date
+    edit). Each start costs two indexed neighbour lookups; the aggregates
+    are rebuilt instead if none are stored yet, or if a removed cycle length
+    was the minimum or maximum. A start after the last one (the usual new
+    period) folds one cycle length into the EWMA; any other write replays
+    the user's starts into it. With neither date, only the prediction is
+    refreshed (after a profile write). Session-first so async handlers can
+    call it through AsyncSession.run_sync. The caller commits.
+    """
+    db.flush()
+    stats = db.get(CycleStats, user_id)
+    if stats is None:
+        return rebuild_cycle_stats(user_id, db)
+    if removed == added:
+        removed = added = None
+
+    appended = bool(added) and not removed and stats.last_period_start is not None and added > stats.last_period_start
+    previous_last_start = stats.last_period_start
+
+    excluded = [start for start in (removed, added) if start]
+    if removed:
+        before, after = _neighbours(user_id, removed, excluded, db)
+        gaps_added, gaps_removed = _gap_changes(removed, before, after)
+        if not _apply_gaps(stats, gaps_removed, gaps_added):
+            return rebuild_cycle_stats(user_id, db)
+        stats.period_count -= 1
+        if removed == stats.last_period_start:
+            stats.last_period_start = before
+    if added:
+        before, after = _neighbours(user_id, added, excluded, db)
+        gaps_removed, gaps_added = _gap_changes(added, before, after)
+        if not _apply_gaps(stats, gaps_removed, gaps_added):
+            return rebuild_cycle_stats(user_id, db)
+        stats.period_count += 1
+        if stats.last_period_start is None or added > stats.last_period_start:
+            stats.last_period_start = added
+
+    if appended:
+        stats.ewma_cycle_length, stats.ewma_cycle_variance = ewma_step(
+            stats.ewma_cycle_length, stats.ewma_cycle_variance, (added - previous_last_start).days
+        )
+    elif removed or added:
+        _refresh_ewma(stats, user_id, db)
+    stats.predicted_next_start = predict_next_start(stats, _profile_cycle_length(user_id, db))
+    return stats
+
+
+def check_cycle_stats(db: Session, fix: bool = False) -> List[int]:
+    """
+    Compare every stored row, and every user with periods, against a rebuild
+    from scratch. Returns the ids of users whose aggregates are missing or
+    differ; with fix=True they are rebuilt, committing per user.
+    """
+    user_ids = db.scalars(union(
+        select(CycleStats.user_id), select(PeriodRecord.user_id).distinct()
+    )).all()
+    mismatched = []
+    for user_id in sorted(user_ids):
+        stored = db.get(CycleStats, user_id)
+        computed = compute_cycle_stats(user_id, db)
+        if stored is None or any(getattr(stored, field) != getattr(computed, field) for field in STATS_FIELDS):
+            mismatched.append(user_id)
+            if fix:
+                rebuild_cycle_stats(user_id, db)
+                db.commit()
+    return mismatched
@@ -0,0 +1,25 @@
+from sqlalchemy.orm import Session
+
+from ..models.user import User
+from ..core.prediction_store import invalidate_daily_predictions
+from ..core.response_cache import bump_data_version
+
+
+def record_user_data_change(db: Session, user_id: int) -> None:
+    """
+    Hooks every mood, period and profile write runs inside its own transaction.
+    Session-first so async handlers can call it through AsyncSession.run_sync.
+    """
+    invalidate_daily_predictions(user_id, db)
+    bump_data_version(user_id, db)
+
+
+def record_mood_write(db: Session, user_id: int) -> None:
+    """
+    Count a created or updated mood towards the next automatic retrain,
+    in the same transaction as the write
+    """
+    db.query(User).filter(User.id == user_id).update(
+        {User.mood_writes_since_retrain: User.mood_writes_since_retrain + 1},
+        synchronize_session=False
+    )
@@ -0,0 +1,60 @@
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from ..config import settings
+
+# Used for any model type the tuning file does not cover
+DEFAULT_FOREST_PARAMS: Dict[str, Dict[str, Any]] = {
+    "energy": {"n_estimators": 200, "max_depth": None},
+    "mood": {"n_estimators": 100, "max_depth": None},
+    "symptom": {"n_estimators": 100, "max_depth": None},
+}
+
+# (path, mtime) -> parsed file, so training re-reads the file only after it changes
+_loaded: Dict[tuple, dict] = {}
+
+
+def _read_tuning_file(path: str) -> dict:
+    try:
+        key = (path, os.path.getmtime(path))
+    except OSError:
+        return {}
+    if key not in _loaded:
+        with open(path) as f:
+            _loaded.clear()
+            _loaded[key] = json.load(f)
+    return _loaded[key]
+
+
+def load_forest_params(model_type: str) -> Dict[str, Any]:
+    """
+    RandomForestClassifier parameters for a model type: the defaults,
+    overridden by the tuned ones in ml_forest_params_path if present
+    """
+    params = dict(DEFAULT_FOREST_PARAMS[model_type])
+    params.update(_read_tuning_file(settings.ml_forest_params_path).get(model_type, {}).get("params", {}))
+    return params
+
+
+def write_forest_params(results: Dict[str, dict], path: Optional[str] = None) -> str:
+    """
+    Merge tuning results ({model_type: {"params": ..., ...}}) into the tuning
+    file, keeping entries for model types that were not tuned.
+    Returns the path written.
+    """
+    path = path or settings.ml_forest_params_path
+    data = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+    tuned_at = datetime.now(timezone.utc).isoformat()
+    data.update({model_type: {**result, "tuned_at": tuned_at} for model_type, result in results.items()})
+
+    # Write then rename, so training never reads a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,133 @@
+import itertools
+import logging
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models.profile import UserProfile
+from ..core.ml_model import prepare_training_data, energy_training_set, build_energy_pipeline
+from ..core.mood_predictor_ml import prepare_mood_training_data, mood_training_set, build_mood_pipeline
+from ..core.symptom_predictor_ml import prepare_symptom_training_data, symptom_training_set, build_symptom_pipeline
+from ..core.model_budget import evaluate_forest
+from ..core.model_format import serialize_model
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# model type -> (prepare_*_training_data, *_training_set, build_*_pipeline)
+TUNED_MODELS = {
+    "energy": (prepare_training_data, energy_training_set, build_energy_pipeline),
+    "mood": (prepare_mood_training_data, mood_training_set, build_mood_pipeline),
+    "symptom": (prepare_symptom_training_data, symptom_training_set, build_symptom_pipeline),
+}
+
+PARAM_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [6, 10, None],
+    "min_samples_leaf": [1, 3],
+    "max_features": ["sqrt", 1.0],
+}
+
+
+def param_combinations(grid: Dict[str, list] = PARAM_GRID) -> List[Dict[str, Any]]:
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+
+def sample_users(db: Session, n_users: int, seed: int = 0) -> List[int]:
+    """
+    Up to n_users ids of users with a profile, sampled reproducibly
+    """
+    user_ids = db.scalars(select(UserProfile.user_id).order_by(UserProfile.user_id)).all()
+    return random.Random(seed).sample(list(user_ids), min(n_users, len(user_ids)))
+
+
+def _training_sets(model_type: str, user_ids: List[int], db: Session) -> list:
+    prepare, training_set, _ = TUNED_MODELS[model_type]
+    sets = []
+    for user_id in user_ids:
+        try:
+            df = prepare(user_id, db)
+        except ValueError:
+            continue
+        if df is None:
+            continue
+        data = training_set(df)
+        if data is not None:
+            sets.append(data[:2])
+    return sets
+
+
+def _evaluate(model_type: str, params: Dict[str, Any], X, y) -> Tuple[float, int]:
+    # Runs in a pool process: out-of-bag accuracy and compact blob size of one configuration
+    _, _, build = TUNED_MODELS[model_type]
+    model, accuracy = evaluate_forest(build, X, y, params)
+    return accuracy, len(serialize_model(model))
+
+
+def pick_params(scores: Dict[int, Tuple[float, float]], combinations: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], float, float]:
+    """
+    The configuration with the smallest mean blob among those whose mean
+    accuracy is within ml_model_accuracy_tolerance of the best.
+    `scores` maps a combination's index to (mean accuracy, mean blob bytes).
+    Returns the params, their mean accuracy and mean blob bytes.
+    """
+    best_accuracy = max(accuracy for accuracy, _ in scores.values())
+    eligible = [
+        index for index, (accuracy, _) in scores.items()
+        if accuracy >= best_accuracy - settings.ml_model_accuracy_tolerance
+    ]
+    index = min(eligible, key=lambda index: (scores[index][1], -scores[index][0]))
+    return combinations[index], scores[index][0], scores[index][1]
+
+
+def tune_forest_params(
+    db: Session, user_ids: List[int], model_types: Optional[List[str]] = None,
+    workers: int = 2, grid: Dict[str, list] = PARAM_GRID
+) -> Dict[str, dict]:
+    """
+    Evaluate every grid configuration on each sampled user's training data,
+    `workers` processes at a time (0 evaluates in-process), and pick one per
+    model type with pick_params. Training data is prepared here, with the
+    same functions training uses; model types no user has data for are skipped.
+    Returns {model_type: {"params", "accuracy", "blob_bytes", "users"}},
+    ready for write_forest_params.
+    """
+    combinations = param_combinations(grid)
+    training_sets = {
+        model_type: _training_sets(model_type, user_ids, db)
+        for model_type in (model_types or list(TUNED_MODELS))
+    }
+    for model_type, sets in training_sets.items():
+        if not sets:
+            logger.warning("No user has %s training data; keeping its current parameters", model_type)
+
+    tasks = [
+        (model_type, index, X, y)
+        for model_type, sets in training_sets.items()
+        for index in range(len(combinations))
+        for X, y in sets
+    ]
+    if workers > 0:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(_evaluate, model_type, combinations[index], X, y) for model_type, index, X, y in tasks]
+            outcomes = [future.result() for future in futures]
+    else:
+        outcomes = [_evaluate(model_type, combinations[index], X, y) for model_type, index, X, y in tasks]
+
+    totals: Dict[str, Dict[int, List[float]]] = {}
+    for (model_type, index, _, _), (accuracy, blob_bytes) in zip(tasks, outcomes):
+        total = totals.setdefault(model_type, {}).setdefault(index, [0.0, 0.0])
+        total[0] += accuracy
+        total[1] += blob_bytes
+
+    results = {}
+    for model_type, by_combination in totals.items():
+        n_users = len(training_sets[model_type])
+        scores = {index: (accuracy / n_users, blob_bytes / n_users) for index, (accuracy, blob_bytes) in by_combination.items()}
+        params, accuracy, blob_bytes = pick_params(scores, combinations)
+        results[model_type] = {"params": params, "accuracy": accuracy, "blob_bytes": blob_bytes, "users": n_users}
+    return results
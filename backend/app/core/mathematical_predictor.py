@@ -1,11 +1,9 @@
 from datetime import date, timedelta
 from sqlalchemy.orm import Session
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
-from ..models.profile import UserProfile
-from ..models.mood import DailyMood
-from ..models.period import PeriodRecord
 from ..core.cycle_calculator import calculate_day_of_cycle, calculate_cycle_phase
+from ..core.user_context import UserContext
 
 # --- Mathematical Fallback Predictors --- #
 
@@ -53,15 +51,21 @@ def get_default_symptom_prediction(day_of_cycle: int, cycle_length: int, luteal_
     return symptoms
 
 
-def get_mathematical_prediction(user_id: int, target_date: date, db: Session) -> Dict[str, Any]:
+def get_mathematical_prediction(
+    user_id: int,
+    target_date: date,
+    db: Session,
+    ctx: Optional[UserContext] = None
+) -> Dict[str, Any]:
     """
     Provides a comprehensive mathematical prediction as a fallback.
     """
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+    ctx = ctx or UserContext(user_id, db)
+    profile = ctx.profile
     if not profile:
         raise ValueError("User profile not found for mathematical prediction.")
 
-    day_of_cycle = calculate_day_of_cycle(user_id, target_date, db)
+    day_of_cycle = calculate_day_of_cycle(user_id, target_date, db, ctx)
     cycle_phase = calculate_cycle_phase(day_of_cycle, profile.cycle_length, profile.luteal_length)
 
     predicted_energy_level = get_default_energy_prediction(day_of_cycle, profile.cycle_length, profile.luteal_length)
@@ -69,12 +73,13 @@ def get_mathematical_prediction(user_id: int, target_date: date, db: Session) ->
     predicted_symptoms = get_default_symptom_prediction(day_of_cycle, profile.cycle_length, profile.luteal_length)
 
     # Next period prediction is already handled by the statistical model in cycle_calculator
-    from ..core.cycle_calculator import calculate_days_until_next_period
-    days_until_next = None
+    from ..core.cycle_calculator import calculate_next_period_window
+    next_period = None
     try:
-        days_until_next = calculate_days_until_next_period(user_id, db)
+        next_period = calculate_next_period_window(user_id, db, ctx)
     except ValueError:
         pass # No period records yet
+    days_until_next, earliest, latest = next_period or (None, None, None)
 
     return {
         "day_of_cycle": day_of_cycle,
@@ -83,5 +88,7 @@ def get_mathematical_prediction(user_id: int, target_date: date, db: Session) ->
         "predicted_mood": predicted_mood,
         "predicted_symptoms": predicted_symptoms,
         "next_period_in_days": days_until_next,
+        "next_period_earliest_in_days": earliest,
+        "next_period_latest_in_days": latest,
         "confidence_score": 0.5 # Default confidence for mathematical model
     }
@@ -1,24 +1,38 @@
 import pandas as pd
 import numpy as np
-import pickle
 from datetime import date, datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from decimal import Decimal
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
-from sklearn.model_selection import cross_val_score
 from ..models.user import User
 from ..models.profile import UserProfile
 from ..models.mood import DailyMood
 from ..models.period import PeriodRecord
 from ..models.model import UserModel
 from ..core.cycle_calculator import calculate_day_of_cycle, calculate_cycle_phase
+from ..core.model_cache import get_cached_model, cache_saved_model
+from ..core.model_format import serialize_model
+from ..core.model_budget import select_forest, predict_latency_ms
+from ..core.model_registry import get_active_model, activate_model
+from ..core.forest_params import load_forest_params
+from ..core.response_cache import bump_data_version
+from ..core.user_context import UserContext
 from ..config import settings
 
 
+# Trained column names, in training order
+ENERGY_FEATURES = [
+    'Length_of_cycle', 'Length_of_Leutal_Phase', 'Length_of_menses',
+    'number_of_peak', 'BMI', 'Unusual_Bleeding',
+    'energy_lag_1', 'energy_lag_2', 'energy_lag_3'
+]
+
+
 def compute_bmi(height_cm: int, weight_kg: float) -> float:
     """Compute BMI from height and weight"""
     # Convert to float if it's a Decimal
@@ -30,69 +44,80 @@ def compute_bmi(height_cm: int, weight_kg: float) -> float:
     return float(weight_kg) / ((float(height_cm)/100)**2)
 
 
-def prepare_training_data(user_id: int, db: Session) -> pd.DataFrame:
+def get_profile_features(user_id: int, db: Session) -> Dict[str, Any]:
     """
-    Prepare training data for ML model
+    The profile values every model trains on, with BMI computed once
     """
-    # Get user profile
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+    profile = db.execute(select(
+        UserProfile.cycle_length, UserProfile.luteal_length, UserProfile.menses_length,
+        UserProfile.number_of_peak, UserProfile.height_cm, UserProfile.weight_kg,
+        UserProfile.unusual_bleeding,
+    ).where(UserProfile.user_id == user_id)).first()
     if not profile:
         raise ValueError("User profile not found")
-    
-    # Get mood data
-    moods = db.query(DailyMood).filter(
+
+    return {
+        'cycle_length': int(profile.cycle_length),
+        'luteal_length': int(profile.luteal_length),
+        'menses_length': int(profile.menses_length),
+        'number_of_peak': int(profile.number_of_peak),
+        'bmi': float(compute_bmi(profile.height_cm, profile.weight_kg)),
+        'unusual_bleeding': bool(profile.unusual_bleeding),
+    }
+
+
+def prepare_training_data(user_id: int, db: Session) -> pd.DataFrame:
+    """
+    Prepare training data for ML model
+    """
+    profile = get_profile_features(user_id, db)
+
+    # Only the columns used for training, straight into arrays
+    moods = db.execute(select(DailyMood.id, DailyMood.day_of_cycle, DailyMood.energy_level).where(
         DailyMood.user_id == user_id,
         DailyMood.day_of_cycle.isnot(None)
-    ).order_by(DailyMood.date).all()
-    
+    ).order_by(DailyMood.date)).all()
+
     if len(moods) < 3:
         raise ValueError("Not enough mood data for training (need at least 3 entries)")
-    
-    # Prepare data for training
-    training_data = []
-    for i, mood in enumerate(moods):
-        if i < 3:  # Skip first 3 entries as we need lag data
-            continue
-            
-        # Get lag data (previous 3 days)
-        lag_moods = moods[i-3:i]
-        
-        record = {
-            'day_of_cycle': int(mood.day_of_cycle),
-            'Length_of_cycle': int(profile.cycle_length),
-            'Length_of_Leutal_Phase': int(profile.luteal_length),
-            'Length_of_menses': int(profile.menses_length),
-            'number_of_peak': int(profile.number_of_peak),
-            'BMI': float(compute_bmi(profile.height_cm, profile.weight_kg)),
-            'Unusual_Bleeding': bool(profile.unusual_bleeding),
-            'energy_level': int(mood.energy_level),
-            'energy_lag_1': int(lag_moods[2].energy_level),
-            'energy_lag_2': int(lag_moods[1].energy_level),
-            'energy_lag_3': int(lag_moods[0].energy_level),
-        }
-        training_data.append(record)
-    
-    return pd.DataFrame(training_data)
-
-
-def train_model(user_id: int, db: Session) -> tuple:
+
+    mood_ids, days_of_cycle, energy = (np.array(column, dtype=np.int64) for column in zip(*moods))
+
+    # Rows from the 4th on, each with the energy of the 3 entries before it
+    return pd.DataFrame({
+        'mood_id': mood_ids[3:],
+        'day_of_cycle': days_of_cycle[3:],
+        'Length_of_cycle': profile['cycle_length'],
+        'Length_of_Leutal_Phase': profile['luteal_length'],
+        'Length_of_menses': profile['menses_length'],
+        'number_of_peak': profile['number_of_peak'],
+        'BMI': profile['bmi'],
+        'Unusual_Bleeding': profile['unusual_bleeding'],
+        'energy_level': energy[3:],
+        'energy_lag_1': energy[2:-1],
+        'energy_lag_2': energy[1:-2],
+        'energy_lag_3': energy[:-3],
+    })
+
+
+def train_model(user_id: int, db: Session, n_jobs: int = 1) -> tuple:
     """
     Train ML model for user
     """
-    # Prepare training data
-    df = prepare_training_data(user_id, db)
-    
-    # Define features and target
-    features = [
-        'Length_of_cycle', 'Length_of_Leutal_Phase', 'Length_of_menses',
-        'number_of_peak', 'BMI', 'Unusual_Bleeding',
-        'energy_lag_1', 'energy_lag_2', 'energy_lag_3'
-    ]
-    target = 'energy_level'
-    
-    X = df[features]
-    y = df[target]
-    
+    return fit_energy_model(prepare_training_data(user_id, db), n_jobs=n_jobs)
+
+
+def energy_training_set(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Features and target of prepared energy training data
+    """
+    return df[ENERGY_FEATURES], df['energy_level']
+
+
+def build_energy_pipeline(params: Dict[str, Any], n_jobs: int = 1) -> Pipeline:
+    """
+    Unfitted energy pipeline with a forest of the given parameters
+    """
     # Define numeric and categorical features
     numeric_features = [
         'Length_of_cycle', 'Length_of_Leutal_Phase', 'Length_of_menses',
@@ -106,80 +131,83 @@ def train_model(user_id: int, db: Session) -> tuple:
         ('cat', 'passthrough', categorical_features)
     ])
     
-    # Create and train model
-    model = Pipeline([
+    return Pipeline([
         ('preprocessor', preprocessor),
-        ('classifier', RandomForestClassifier(n_estimators=200, random_state=42))
+        ('classifier', RandomForestClassifier(**params, oob_score=True, random_state=42, n_jobs=n_jobs))
     ])
-    
-    # Train model
-    model.fit(X, y)
-    
-    # Calculate accuracy using cross-validation
-    cv_scores = cross_val_score(model, X, y, cv=min(3, len(df)), scoring='accuracy')
-    accuracy = cv_scores.mean()
-    
-    return model, accuracy
 
 
-def save_model(user_id: int, model: Pipeline, accuracy: float, db: Session):
+def fit_energy_model(df: pd.DataFrame, n_jobs: int = 1) -> tuple:
+    """
+    Fit the energy model on prepared training data.
+    Needs no database, so it can run in the ML process pool.
+    n_jobs cores build the trees. The forest is the smallest within the
+    model budget, and accuracy is out-of-bag (see select_forest).
     """
-    Save trained model to database
+    X, y = energy_training_set(df)
+    return select_forest(build_energy_pipeline, X, y, load_forest_params("energy"), n_jobs=n_jobs)
+
+
+def save_model(user_id: int, model: Pipeline, accuracy: float, db: Session, model_type: str = "energy"):
+    """
+    Save trained model to database.
+    model_type is "energy" or "energy_online" (an OnlineEnergyModel).
     """
     # Serialize model
-    model_data = pickle.dumps(model)
+    model_data = serialize_model(model)
     
     # Save to database
     db_model = UserModel(
         user_id=user_id,
+        model_type=model_type,
         model_data=model_data,
         accuracy_score=accuracy,
+        blob_size_bytes=len(model_data),
+        predict_latency_ms=predict_latency_ms(model_data, ENERGY_FEATURES),
         model_version="1.0"
     )
     
     db.add(db_model)
+    db.flush()
+    activate_model(db_model, db)
+    bump_data_version(user_id, db)
     db.commit()
     db.refresh(db_model)
+    cache_saved_model(db_model, model)
     
     return db_model
 
 
-def load_model(user_id: int, db: Session) -> Optional[UserModel]:
+def load_model(user_id: int, db: Session, model_type: Optional[str] = None) -> Optional[UserModel]:
     """
-    Load the latest trained energy model record for user
+    Load the active energy model record for user, of the type
+    configured in ml_energy_model_type unless model_type is given.
+    The model blob is deferred so cache hits never read it.
     """
-    model_record = db.query(UserModel).filter(
-        UserModel.user_id == user_id,
-        UserModel.model_type == "energy"
-    ).order_by(UserModel.created_at.desc()).first()
-    
-    return model_record
+    return get_active_model(user_id, model_type or settings.ml_energy_model_type, db)
 
 
-def make_prediction(user_id: int, target_date: date, db: Session) -> Dict[str, Any]:
+def make_prediction(user_id: int, target_date: date, db: Session, ctx: Optional[UserContext] = None) -> Dict[str, Any]:
     """
     Make energy level prediction for a given date
     """
+    ctx = ctx or UserContext(user_id, db)
+
     # Get user profile
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    if not profile:
-        raise ValueError("User profile not found")
+    profile = ctx.require_profile()
     
     # Load model
     model_record = load_model(user_id, db)
     if not model_record:
         raise ValueError("No trained model found")
     
-    model = pickle.loads(model_record.model_data)
+    model = get_cached_model(model_record)
 
     # Calculate day of cycle
-    day_of_cycle = calculate_day_of_cycle(user_id, target_date, db)
+    day_of_cycle = calculate_day_of_cycle(user_id, target_date, db, ctx)
     
     # Get recent mood data for lag features
-    recent_moods = db.query(DailyMood).filter(
-        DailyMood.user_id == user_id,
-        DailyMood.date < target_date
-    ).order_by(DailyMood.date.desc()).limit(3).all()
+    recent_moods = ctx.moods_before(target_date, 3)
     
     if len(recent_moods) < 3:
         raise ValueError("Not enough recent mood data for prediction")
@@ -210,43 +238,57 @@ def make_prediction(user_id: int, target_date: date, db: Session) -> Dict[str, A
     cycle_phase = calculate_cycle_phase(day_of_cycle, profile.cycle_length, profile.luteal_length)
     
     # Calculate days until next period
-    days_until_next = None
+    next_period = None
     try:
-        from .cycle_calculator import calculate_days_until_next_period
-        days_until_next = calculate_days_until_next_period(user_id, db)
+        from .cycle_calculator import calculate_next_period_window
+        next_period = calculate_next_period_window(user_id, db, ctx)
     except:
         pass
+    days_until_next, earliest, latest = next_period or (None, None, None)
     
     return {
         "day_of_cycle": day_of_cycle,
         "cycle_phase": cycle_phase,
         "predicted_energy_level": predicted_energy_level,
         "next_period_in_days": days_until_next,
+        "next_period_earliest_in_days": earliest,
+        "next_period_latest_in_days": latest,
         "confidence_score": model_record.accuracy_score
     }
 
 
+# Shared feature name -> column name the energy pipeline was trained with
+ENERGY_FEATURE_COLUMNS = {
+    'day_of_cycle': 'day_of_cycle',
+    'cycle_length': 'Length_of_cycle',
+    'luteal_length': 'Length_of_Leutal_Phase',
+    'menses_length': 'Length_of_menses',
+    'number_of_peak': 'number_of_peak',
+    'bmi': 'BMI',
+    'unusual_bleeding': 'Unusual_Bleeding',
+    'energy_lag_1': 'energy_lag_1',
+    'energy_lag_2': 'energy_lag_2',
+    'energy_lag_3': 'energy_lag_3',
+}
+
+ENERGY_LEVEL_MAPPING = {0: 'low', 1: 'medium', 2: 'high'}
+
+
+def predict_energy_levels(model: Pipeline, features: pd.DataFrame) -> List[str]:
+    """
+    Run the energy head over a shared feature frame (one row per date).
+    Every row must have its three energy lags.
+    """
+    input_df = features[list(ENERGY_FEATURE_COLUMNS)].rename(columns=ENERGY_FEATURE_COLUMNS)
+    lag_columns = ['energy_lag_1', 'energy_lag_2', 'energy_lag_3']
+    input_df[lag_columns] = input_df[lag_columns].astype(int)
+    return [ENERGY_LEVEL_MAPPING.get(prediction, 'medium') for prediction in model.predict(input_df)]
+
+
 def should_retrain_model(user_id: int, db: Session) -> bool:
     """
-    Check if model should be retrained
+    Check if model should be retrained: enough mood entries were created or
+    updated since the last retrain started (users.mood_writes_since_retrain)
     """
-    # Get recent mood entries
-    recent_moods = db.query(DailyMood).filter(
-        DailyMood.user_id == user_id
-    ).order_by(DailyMood.created_at.desc()).limit(settings.ml_retrain_threshold).all()
-    
-    # Get latest model
-    latest_model = db.query(UserModel).filter(
-        UserModel.user_id == user_id
-    ).order_by(UserModel.created_at.desc()).first()
-    
-    if not latest_model:
-        return len(recent_moods) >= settings.ml_retrain_threshold
-    
-    # Check if enough new data since last training
-    new_moods_since_training = [
-        mood for mood in recent_moods 
-        if mood.created_at > latest_model.created_at
-    ]
-    
-    return len(new_moods_since_training) >= settings.ml_retrain_threshold
+    mood_writes = db.query(User.mood_writes_since_retrain).filter(User.id == user_id).scalar()
+    return (mood_writes or 0) >= settings.ml_retrain_threshold
@@ -0,0 +1,127 @@
+import logging
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.pipeline import Pipeline
+
+from ..core.model_format import serialize_model, deserialize_model
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Forest sizes tried before settling for the full configuration, smallest first
+FOREST_TREE_CANDIDATES = (25, 50, 100, 200)
+FOREST_DEPTH_CANDIDATES = (6, 10, None)
+
+
+def predict_latency_ms(model_data: bytes, features: List[str], repeat: int = 5) -> float:
+    """
+    Best-of-`repeat` time to score one day with the model as it is served:
+    decoded from its blob
+    """
+    model = deserialize_model(model_data)
+    if isinstance(model, dict):
+        model = model["model"]
+    row = pd.DataFrame(np.zeros((1, len(features))), columns=features)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        model.predict(row)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def within_budget(model_data: bytes, features: List[str]) -> bool:
+    return (
+        len(model_data) <= settings.ml_model_max_blob_bytes
+        and predict_latency_ms(model_data, features) <= settings.ml_model_max_predict_ms
+    )
+
+
+def _depth_key(depth: Optional[int]) -> float:
+    return float("inf") if depth is None else depth
+
+
+def forest_candidates(full_trees: int, full_depth: Optional[int]) -> Iterator[Tuple[int, Optional[int]]]:
+    """
+    Configurations smaller than (full_trees, full_depth), fewest trees first
+    """
+    for trees in FOREST_TREE_CANDIDATES:
+        for depth in FOREST_DEPTH_CANDIDATES:
+            if trees > full_trees or _depth_key(depth) > _depth_key(full_depth):
+                continue
+            if (trees, depth) != (full_trees, full_depth):
+                yield trees, depth
+
+
+def _oob_predictions(forest) -> np.ndarray:
+    # Rows no tree left out (only likely with a handful of rows) count as the first class
+    return forest.classes_.take(np.argmax(np.nan_to_num(forest.oob_decision_function_), axis=1))
+
+
+def oob_accuracy(model: Pipeline, y) -> float:
+    """
+    Out-of-bag accuracy of a fitted pipeline whose forests have oob_score=True;
+    subset accuracy for a MultiOutputClassifier
+    """
+    classifier = model.named_steps['classifier']
+    if isinstance(classifier, MultiOutputClassifier):
+        predictions = np.stack([_oob_predictions(forest) for forest in classifier.estimators_], axis=1)
+        return float((predictions == np.asarray(y)).all(axis=1).mean())
+    return float((_oob_predictions(classifier) == np.asarray(y)).mean())
+
+
+PipelineBuilder = Callable[[Dict[str, Any], int], Pipeline]
+
+
+def evaluate_forest(build: PipelineBuilder, X: pd.DataFrame, y, params: Dict[str, Any], n_jobs: int = 1) -> Tuple[Pipeline, float]:
+    """
+    Fit `build(params, n_jobs)` and return it with its out-of-bag accuracy
+    """
+    model = build(params, n_jobs)
+    model.fit(X, y)
+    # Predict single-threaded: a request's few rows are not worth splitting
+    model.set_params(classifier__n_jobs=1)
+    return model, oob_accuracy(model, y)
+
+
+def select_forest(
+    build: PipelineBuilder, X: pd.DataFrame, y, params: Dict[str, Any], n_jobs: int = 1
+) -> Tuple[Pipeline, float]:
+    """
+    Fit the full forest, `params` capped by ml_model_max_trees and
+    ml_model_max_depth, then return the first smaller configuration whose
+    accuracy is within ml_model_accuracy_tolerance of it and whose blob and
+    predict latency fit the budget. The full forest is kept if none qualifies.
+    `build(params, n_jobs)` makes an unfitted pipeline with oob_score=True
+    forests: accuracy is out-of-bag, so no configuration is refitted.
+    Returns the fitted model and its accuracy.
+    """
+    features = list(X.columns)
+
+    def fit_and_score(trees: int, depth: Optional[int]) -> Tuple[Pipeline, float]:
+        return evaluate_forest(build, X, y, {**params, "n_estimators": trees, "max_depth": depth}, n_jobs)
+
+    full_trees = min(params["n_estimators"], settings.ml_model_max_trees)
+    full_depth = min(params.get("max_depth"), settings.ml_model_max_depth, key=_depth_key)
+    full_model, full_accuracy = fit_and_score(full_trees, full_depth)
+
+    smallest = best_in_budget = None
+    for trees, depth in forest_candidates(full_trees, full_depth):
+        model, accuracy = fit_and_score(trees, depth)
+        smallest = smallest or (model, accuracy)
+        if not within_budget(serialize_model(model), features):
+            continue
+        if accuracy >= full_accuracy - settings.ml_model_accuracy_tolerance:
+            return model, accuracy
+        if best_in_budget is None or accuracy > best_in_budget[1]:
+            best_in_budget = (model, accuracy)
+
+    if within_budget(serialize_model(full_model), features):
+        return full_model, full_accuracy
+    if best_in_budget:
+        return best_in_budget
+    logger.warning("No forest configuration fits the model budget; keeping the smallest")
+    return smallest or (full_model, full_accuracy)
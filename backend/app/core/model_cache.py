@@ -0,0 +1,37 @@
+from typing import Any, Tuple
+
+from ..models.model import UserModel
+from ..core.lru_cache import LRUCache
+from ..core.model_format import deserialize_model
+from ..config import settings
+
+
+model_cache = LRUCache(
+    max_entries=settings.ml_model_cache_max_entries,
+    max_bytes=settings.ml_model_cache_max_bytes,
+)
+
+
+def model_cache_key(model_record: UserModel) -> Tuple[int, str, int]:
+    return (model_record.user_id, model_record.model_type, model_record.id)
+
+
+def get_cached_model(model_record: UserModel) -> Any:
+    """
+    Return the deserialized model for a UserModel row, decoding the blob only on a cache miss
+    """
+    key = model_cache_key(model_record)
+    model = model_cache.get(key)
+    if model is None:
+        model_data = model_record.model_data
+        model = deserialize_model(model_data)
+        model_cache.put(key, model, len(model_data))
+    return model
+
+
+def cache_saved_model(model_record: UserModel, model: Any) -> None:
+    """
+    Write-through for save_*: drop older versions of this model type and cache the new one
+    """
+    model_cache.invalidate(model_record.user_id, model_record.model_type)
+    model_cache.put(model_cache_key(model_record), model, len(model_record.model_data))
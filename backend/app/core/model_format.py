@@ -0,0 +1,254 @@
+import json
+import pickle
+import struct
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Tuple, Union
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler, MultiLabelBinarizer, FunctionTransformer
+
+# Compact model blobs: a fixed preamble, a JSON header, then 8-byte aligned
+# typed arrays the header locates by name. Anything else in model_data is a pickle.
+FORMAT_MAGIC = b"PHMF"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<4sHHI")  # magic, version, reserved, header length
+_ALIGN = 8
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class CompactForest:
+    """
+    One fitted RandomForestClassifier as flat arrays over all its trees.
+    Leaves have feature -1 and keep their row in `leaf_values` in `left`.
+    """
+
+    def __init__(self, classes: np.ndarray, roots: np.ndarray, feature: np.ndarray, threshold: np.ndarray,
+                 left: np.ndarray, right: np.ndarray, leaf_values: np.ndarray, max_depth: int):
+        self.classes_ = classes
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_values = leaf_values
+        self.max_depth = max_depth
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        # Walk every tree for every row at once, one level per step
+        nodes = np.repeat(self.roots[:, None], len(X), axis=1)
+        rows = np.arange(len(X))
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            internal = feature >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, np.maximum(feature, 0)] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, self.left[nodes], self.right[nodes]), nodes)
+        # Trees summed in order, as RandomForestClassifier.predict_proba does
+        return self.leaf_values[self.left[nodes]].sum(axis=0) / len(self.roots)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+class CompactModel:
+    """
+    A scaler-plus-forest Pipeline rebuilt from a compact blob. Scores pandas
+    frames like the Pipeline it was exported from; symptom models have one
+    forest per label, like MultiOutputClassifier.
+    """
+
+    def __init__(self, columns: List[str], offset: np.ndarray, scale: np.ndarray,
+                 forests: List[CompactForest], multi_output: bool):
+        self.columns = columns
+        self.offset = offset
+        self.scale = scale
+        self.forests = forests
+        self.multi_output = multi_output
+
+    def _transform(self, X: pd.DataFrame) -> np.ndarray:
+        scaled = (X[self.columns].to_numpy(dtype=np.float64) - self.offset) / self.scale
+        # Trees split on float32 inputs
+        return scaled.astype(np.float32)
+
+    @property
+    def classes_(self):
+        return [forest.classes_ for forest in self.forests] if self.multi_output else self.forests[0].classes_
+
+    def predict_proba(self, X: pd.DataFrame):
+        matrix = self._transform(X)
+        probas = [forest.predict_proba(matrix) for forest in self.forests]
+        return probas if self.multi_output else probas[0]
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        matrix = self._transform(X)
+        if self.multi_output:
+            return np.stack([forest.predict(matrix) for forest in self.forests], axis=1)
+        return self.forests[0].predict(matrix)
+
+
+def _export_preprocessor(preprocessor: ColumnTransformer) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    if preprocessor.remainder != "drop":
+        raise ValueError("Only ColumnTransformers that drop unlisted columns can be exported")
+    columns, offsets, scales = [], [], []
+    for _, transformer, transformer_columns in preprocessor.transformers_:
+        if transformer == "drop":
+            continue
+        transformer_columns = list(transformer_columns)
+        n = len(transformer_columns)
+        if transformer == "passthrough" or (isinstance(transformer, FunctionTransformer) and transformer.func is None):
+            offset, scale = np.zeros(n), np.ones(n)
+        elif isinstance(transformer, StandardScaler):
+            offset = transformer.mean_ if transformer.mean_ is not None and transformer.with_mean else np.zeros(n)
+            scale = transformer.scale_ if transformer.scale_ is not None else np.ones(n)
+        else:
+            raise ValueError(f"Cannot export {type(transformer).__name__} transformers")
+        columns += transformer_columns
+        offsets.append(np.asarray(offset, dtype=np.float64))
+        scales.append(np.asarray(scale, dtype=np.float64))
+    return columns, np.concatenate(offsets), np.concatenate(scales)
+
+
+def _export_forest(forest: RandomForestClassifier) -> Tuple[dict, Dict[str, np.ndarray]]:
+    if forest.n_outputs_ != 1:
+        raise ValueError("Multi-output forests are exported per output via MultiOutputClassifier")
+    roots, features, thresholds, lefts, rights, leaf_values = [], [], [], [], [], []
+    node_count = leaf_count = max_depth = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        leaf_index = np.cumsum(is_leaf) - 1 + leaf_count
+        roots.append(node_count)
+        features.append(np.where(is_leaf, -1, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        lefts.append(np.where(is_leaf, leaf_index, tree.children_left + node_count))
+        rights.append(np.where(is_leaf, -1, tree.children_right + node_count))
+        values = tree.value[is_leaf, 0, :]
+        leaf_values.append(values / values.sum(axis=1, keepdims=True))
+        node_count += tree.node_count
+        leaf_count += int(is_leaf.sum())
+        max_depth = max(max_depth, tree.max_depth)
+
+    meta = {"classes": forest.classes_.tolist(), "max_depth": int(max_depth)}
+    arrays = {
+        "roots": np.array(roots, dtype=np.int32),
+        "feature": np.concatenate(features).astype(np.int16),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.int32),
+        "right": np.concatenate(rights).astype(np.int32),
+        "leaf_values": np.concatenate(leaf_values).astype(np.float64),
+    }
+    return meta, arrays
+
+
+def is_exportable(model: Any) -> bool:
+    """
+    Whether a model (or a symptom {"model", "mlb"} dict) fits the compact format
+    """
+    if isinstance(model, dict):
+        model = model.get("model")
+    if not isinstance(model, Pipeline) or len(model.steps) != 2:
+        return False
+    preprocessor, classifier = (step for _, step in model.steps)
+    if isinstance(classifier, MultiOutputClassifier):
+        classifier = classifier.estimator
+    return isinstance(preprocessor, ColumnTransformer) and isinstance(classifier, RandomForestClassifier)
+
+
+def export_model(model: Any) -> bytes:
+    """
+    Flatten a fitted scaler-plus-RandomForest Pipeline into a compact blob.
+    Symptom models are passed as their {"model", "mlb"} dict.
+    """
+    labels = None
+    if isinstance(model, dict):
+        labels = [str(label) for label in model["mlb"].classes_]
+        model = model["model"]
+    if not is_exportable(model):
+        raise ValueError(f"Cannot export {type(model).__name__} in the compact model format")
+
+    preprocessor, classifier = (step for _, step in model.steps)
+    columns, offset, scale = _export_preprocessor(preprocessor)
+    multi_output = isinstance(classifier, MultiOutputClassifier)
+    forests = classifier.estimators_ if multi_output else [classifier]
+
+    arrays = {"offset": offset, "scale": scale}
+    forest_meta = []
+    for i, forest in enumerate(forests):
+        meta, forest_arrays = _export_forest(forest)
+        forest_meta.append(meta)
+        arrays.update({f"{i}.{name}": array for name, array in forest_arrays.items()})
+
+    directory, position = {}, 0
+    for name, array in arrays.items():
+        directory[name] = [array.dtype.str, position, list(array.shape)]
+        position += -(-array.nbytes // _ALIGN) * _ALIGN
+
+    header = json.dumps({
+        "columns": columns, "forests": forest_meta, "multi_output": multi_output,
+        "labels": labels, "arrays": directory,
+    }, separators=(",", ":")).encode()
+    header += b" " * (-(_PREAMBLE.size + len(header)) % _ALIGN)
+
+    blob = bytearray(_PREAMBLE.pack(FORMAT_MAGIC, FORMAT_VERSION, 0, len(header)) + header)
+    data_start = len(blob)
+    blob.extend(bytes(position))
+    for name, array in arrays.items():
+        start = data_start + directory[name][1]
+        blob[start:start + array.nbytes] = np.ascontiguousarray(array).tobytes()
+    return bytes(blob)
+
+
+def load_compact_model(data: Buffer) -> Any:
+    """
+    Rebuild a model from a compact blob. The arrays are read-only views of
+    `data` (bytes or an mmap), so nothing is copied.
+    """
+    magic, version, _, header_length = _PREAMBLE.unpack_from(data, 0)
+    if magic != FORMAT_MAGIC:
+        raise ValueError("Not a compact model blob")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact model format version {version}")
+
+    header_end = _PREAMBLE.size + header_length
+    header = json.loads(bytes(data[_PREAMBLE.size:header_end]))
+
+    def array(name: str) -> np.ndarray:
+        dtype, position, shape = header["arrays"][name]
+        count = int(np.prod(shape, dtype=np.int64))
+        return np.frombuffer(data, dtype=dtype, count=count, offset=header_end + position).reshape(shape)
+
+    forests = [
+        CompactForest(
+            classes=np.array(meta["classes"]),
+            roots=array(f"{i}.roots"), feature=array(f"{i}.feature"), threshold=array(f"{i}.threshold"),
+            left=array(f"{i}.left"), right=array(f"{i}.right"), leaf_values=array(f"{i}.leaf_values"),
+            max_depth=meta["max_depth"],
+        )
+        for i, meta in enumerate(header["forests"])
+    ]
+    model = CompactModel(header["columns"], array("offset"), array("scale"), forests, header["multi_output"])
+    if header["labels"] is None:
+        return model
+    mlb = MultiLabelBinarizer(classes=header["labels"]).fit([])
+    return {"model": model, "mlb": mlb}
+
+
+def serialize_model(model: Any) -> bytes:
+    """
+    Blob for UserModel.model_data: compact for forests, a pickle for anything else
+    """
+    return export_model(model) if is_exportable(model) else pickle.dumps(model)
+
+
+def deserialize_model(data: Buffer) -> Any:
+    """
+    Inverse of serialize_model; also reads pickles saved before the compact format
+    """
+    if bytes(data[:len(FORMAT_MAGIC)]) == FORMAT_MAGIC:
+        return load_compact_model(data)
+    return pickle.loads(data)
@@ -0,0 +1,70 @@
+from typing import Optional
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session, defer
+
+from ..models.model import UserModel, ActiveModel
+from ..config import settings
+
+
+def get_active_model(user_id: int, model_type: str, db: Session) -> Optional[UserModel]:
+    """
+    The version of a model type the user's predictions use, found through
+    the registry pointer. The blob is deferred so cache hits never read it.
+    """
+    return db.scalar(
+        select(UserModel).join(ActiveModel, ActiveModel.model_id == UserModel.id).where(
+            ActiveModel.user_id == user_id,
+            ActiveModel.model_type == model_type
+        ).options(defer(UserModel.model_data))
+    )
+
+
+def activate_model(model_record: UserModel, db: Session) -> None:
+    """
+    Point the registry at a saved version (a newly trained one, or an older
+    one to roll back to), then prune versions beyond the retention policy.
+    The caller commits.
+    """
+    pointer = db.get(ActiveModel, (model_record.user_id, model_record.model_type))
+    if pointer is None:
+        db.add(ActiveModel(user_id=model_record.user_id, model_type=model_record.model_type, model_id=model_record.id))
+    else:
+        pointer.model_id = model_record.id
+    db.flush()
+    prune_model_versions(model_record.user_id, model_record.model_type, db)
+
+
+def prune_model_versions(user_id: int, model_type: str, db: Session) -> int:
+    """
+    Delete all but the newest ml_model_retention_versions versions of a
+    model type; the active version is always kept and counts towards them.
+    Returns the number of versions deleted. The caller commits.
+    """
+    keep = max(1, settings.ml_model_retention_versions)
+    active_id = db.scalar(select(ActiveModel.model_id).where(
+        ActiveModel.user_id == user_id,
+        ActiveModel.model_type == model_type
+    ))
+
+    query = select(UserModel.id).where(UserModel.user_id == user_id, UserModel.model_type == model_type)
+    if active_id is not None:
+        query = query.where(UserModel.id != active_id)
+        keep -= 1
+    stale_ids = db.scalars(query.order_by(UserModel.id.desc()).offset(keep)).all()
+    if stale_ids:
+        db.execute(delete(UserModel).where(UserModel.id.in_(stale_ids)))
+    return len(stale_ids)
+
+
+def prune_all_model_versions(db: Session) -> int:
+    """
+    Apply the retention policy to every user and model type, committing per
+    user and type. Returns the number of versions deleted.
+    """
+    pruned = 0
+    for user_id, model_type in db.execute(
+        select(UserModel.user_id, UserModel.model_type).distinct()
+    ).all():
+        pruned += prune_model_versions(user_id, model_type, db)
+        db.commit()
+    return pruned
@@ -1,20 +1,25 @@
 import pandas as pd
 import numpy as np
-import pickle
 from datetime import date, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
-from sklearn.model_selection import cross_val_score
 from ..models.user import User
-from ..models.profile import UserProfile
 from ..models.mood import DailyMood
 from ..models.model import UserModel
 from ..core.cycle_calculator import calculate_day_of_cycle
-from ..core.ml_model import compute_bmi # Re-use from existing model
+from ..core.ml_model import compute_bmi, get_profile_features # Re-use from existing model
+from ..core.model_cache import get_cached_model, cache_saved_model
+from ..core.model_format import serialize_model
+from ..core.model_budget import select_forest, predict_latency_ms
+from ..core.model_registry import get_active_model, activate_model
+from ..core.forest_params import load_forest_params
+from ..core.response_cache import bump_data_version
+from ..core.user_context import UserContext
 from ..config import settings
 
 MOOD_LABELS = ["Happy", "Calm", "Sad", "Anxious", "Irritated"]
@@ -24,34 +29,28 @@ def prepare_mood_training_data(user_id: int, db: Session) -> Optional[pd.DataFra
     Prepare training data for the Mood Prediction ML model.
     Returns None if there is not enough data.
     """
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    if not profile:
-        raise ValueError("User profile not found")
+    profile = get_profile_features(user_id, db)
 
-    moods = db.query(DailyMood).filter(
+    moods = db.execute(select(DailyMood.day_of_cycle, DailyMood.mood).where(
         DailyMood.user_id == user_id,
         DailyMood.day_of_cycle.isnot(None),
         DailyMood.mood.isnot(None)
-    ).order_by(DailyMood.date).all()
+    ).order_by(DailyMood.date)).all()
 
     # Check if we have enough data (e.g., at least 30 days with mood logs)
     if len(moods) < 30:
         return None
 
-    training_data = []
-    for mood in moods:
-        record = {
-            'day_of_cycle': int(mood.day_of_cycle),
-            'cycle_length': int(profile.cycle_length),
-            'luteal_length': int(profile.luteal_length),
-            'bmi': float(compute_bmi(profile.height_cm, profile.weight_kg)),
-            'mood': mood.mood
-        }
-        training_data.append(record)
-    
-    return pd.DataFrame(training_data)
+    days_of_cycle, labels = zip(*moods)
+    return pd.DataFrame({
+        'day_of_cycle': np.array(days_of_cycle, dtype=np.int64),
+        'cycle_length': profile['cycle_length'],
+        'luteal_length': profile['luteal_length'],
+        'bmi': profile['bmi'],
+        'mood': list(labels),
+    })
 
-def train_mood_model(user_id: int, db: Session) -> Optional[tuple]:
+def train_mood_model(user_id: int, db: Session, n_jobs: int = 1) -> Optional[tuple]:
     """
     Train the Mood Prediction ML model for a user.
     Returns None if there is not enough data.
@@ -59,79 +58,96 @@ def train_mood_model(user_id: int, db: Session) -> Optional[tuple]:
     df = prepare_mood_training_data(user_id, db)
     if df is None:
         return None
+    return fit_mood_model(df, n_jobs=n_jobs)
 
+def mood_training_set(df: pd.DataFrame) -> Optional[Tuple[pd.DataFrame, pd.Series]]:
+    """
+    Features and encoded target of prepared mood training data.
+    Returns None if fewer than 30 rows have a known mood.
+    """
     # Encode the target variable
-    df['mood_encoded'] = df['mood'].apply(lambda x: MOOD_LABELS.index(x) if x in MOOD_LABELS else -1)
-    df = df[df['mood_encoded'] != -1]
+    mood_encoded = df['mood'].apply(lambda x: MOOD_LABELS.index(x) if x in MOOD_LABELS else -1)
+    df = df[mood_encoded != -1]
 
     if len(df) < 30:
         return None
 
-    features = ['day_of_cycle', 'cycle_length', 'luteal_length', 'bmi']
-    target = 'mood_encoded'
-
-    X = df[features]
-    y = df[target]
+    return df[MOOD_FEATURES], mood_encoded[mood_encoded != -1]
 
+def build_mood_pipeline(params: Dict[str, Any], n_jobs: int = 1) -> Pipeline:
+    """
+    Unfitted mood pipeline with a forest of the given parameters
+    """
     preprocessor = ColumnTransformer([
-        ('num', StandardScaler(), features)
+        ('num', StandardScaler(), MOOD_FEATURES)
     ])
 
-    model = Pipeline([
+    return Pipeline([
         ('preprocessor', preprocessor),
-        ('classifier', RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced'))
+        ('classifier', RandomForestClassifier(
+            **params, oob_score=True, random_state=42, class_weight='balanced', n_jobs=n_jobs
+        ))
     ])
 
-    model.fit(X, y)
-
-    cv_scores = cross_val_score(model, X, y, cv=min(3, len(df) // 10), scoring='accuracy')
-    accuracy = cv_scores.mean()
+def fit_mood_model(df: pd.DataFrame, n_jobs: int = 1) -> Optional[tuple]:
+    """
+    Fit the mood model on prepared training data.
+    Needs no database, so it can run in the ML process pool.
+    n_jobs cores build the trees. The forest is the smallest within the
+    model budget, and accuracy is out-of-bag (see select_forest).
+    """
+    training_set = mood_training_set(df)
+    if training_set is None:
+        return None
 
-    return model, accuracy
+    X, y = training_set
+    return select_forest(build_mood_pipeline, X, y, load_forest_params("mood"), n_jobs=n_jobs)
 
 def save_mood_model(user_id: int, model: Pipeline, accuracy: float, db: Session):
     """
     Save the trained mood model to the database.
     """
-    model_data = pickle.dumps(model)
+    model_data = serialize_model(model)
     
     db_model = UserModel(
         user_id=user_id,
         model_type="mood",
         model_data=model_data,
         accuracy_score=accuracy,
+        blob_size_bytes=len(model_data),
+        predict_latency_ms=predict_latency_ms(model_data, MOOD_FEATURES),
         model_version="1.0"
     )
     
     db.add(db_model)
+    db.flush()
+    activate_model(db_model, db)
+    bump_data_version(user_id, db)
     db.commit()
     db.refresh(db_model)
+    cache_saved_model(db_model, model)
     
     return db_model
 
 def load_mood_model(user_id: int, db: Session) -> Optional[UserModel]:
     """
-    Load the latest trained mood model record for a user.
+    Load the active mood model record for a user.
     """
-    return db.query(UserModel).filter(
-        UserModel.user_id == user_id,
-        UserModel.model_type == "mood"
-    ).order_by(UserModel.created_at.desc()).first()
+    return get_active_model(user_id, "mood", db)
 
-def make_mood_prediction(user_id: int, target_date: date, db: Session) -> Dict[str, Any]:
+def make_mood_prediction(user_id: int, target_date: date, db: Session, ctx: Optional[UserContext] = None) -> Dict[str, Any]:
     """
     Make a mood prediction for a given date.
     """
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    if not profile:
-        raise ValueError("User profile not found")
+    ctx = ctx or UserContext(user_id, db)
+    profile = ctx.require_profile()
 
     model_record = load_mood_model(user_id, db)
     if not model_record:
         raise ValueError("No trained mood model found for user.")
 
-    model = pickle.loads(model_record.model_data)
-    day_of_cycle = calculate_day_of_cycle(user_id, target_date, db)
+    model = get_cached_model(model_record)
+    day_of_cycle = calculate_day_of_cycle(user_id, target_date, db, ctx)
 
     input_data = {
         'day_of_cycle': int(day_of_cycle),
@@ -148,3 +164,11 @@ def make_mood_prediction(user_id: int, target_date: date, db: Session) -> Dict[s
         "predicted_mood": predicted_mood,
         "confidence_score": model_record.accuracy_score
     }
+
+MOOD_FEATURES = ['day_of_cycle', 'cycle_length', 'luteal_length', 'bmi']
+
+def predict_moods(model: Pipeline, features: pd.DataFrame) -> List[str]:
+    """
+    Run the mood head over a shared feature frame (one row per date).
+    """
+    return [MOOD_LABELS[prediction_encoded] for prediction_encoded in model.predict(features[MOOD_FEATURES])]
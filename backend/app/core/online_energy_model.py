@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+from sqlalchemy.orm import Session
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from ..core.ml_model import prepare_training_data, load_model
+from ..core.model_format import deserialize_model
+
+ONLINE_ENERGY_MODEL_TYPE = "energy_online"
+
+# Same inputs as the RandomForest energy pipeline, by their trained column names
+ONLINE_ENERGY_FEATURES = [
+    'Length_of_cycle', 'Length_of_Leutal_Phase', 'Length_of_menses',
+    'number_of_peak', 'BMI', 'Unusual_Bleeding',
+    'energy_lag_1', 'energy_lag_2', 'energy_lag_3'
+]
+ENERGY_CLASSES = np.array([0, 1, 2])
+
+
+class OnlineEnergyModel:
+    """
+    Incrementally updatable energy model: a StandardScaler and a logistic
+    SGDClassifier, both advanced with partial_fit. Remembers the newest mood
+    id it has learned from, so each update only reads later rows.
+    Accuracy is prequential: every batch after the first is scored before it
+    is learned. The first batch (the user's history so far) has no model to
+    be scored against, so accuracy stays None until a later update.
+    """
+
+    def __init__(self):
+        self.scaler = StandardScaler()
+        self.classifier = SGDClassifier(loss="log_loss", random_state=42)
+        self.last_mood_id = 0
+        self.samples_seen = 0
+        self.samples_scored = 0
+        self.correct = 0
+
+    def _matrix(self, X: pd.DataFrame) -> np.ndarray:
+        return X[ONLINE_ENERGY_FEATURES].astype(float).to_numpy()
+
+    def partial_fit(self, X: pd.DataFrame, y) -> "OnlineEnergyModel":
+        matrix = self._matrix(X)
+        y = np.asarray(y, dtype=int)
+        if self.samples_seen:
+            self.correct += int((self.classifier.predict(self.scaler.transform(matrix)) == y).sum())
+            self.samples_scored += len(y)
+
+        self.scaler.partial_fit(matrix)
+        self.classifier.partial_fit(self.scaler.transform(matrix), y, classes=ENERGY_CLASSES)
+        self.samples_seen += len(y)
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.classifier.predict(self.scaler.transform(self._matrix(X)))
+
+    @property
+    def accuracy(self) -> Optional[float]:
+        return self.correct / self.samples_scored if self.samples_scored else None
+
+
+def train_online_energy_model(user_id: int, db: Session) -> Optional[tuple]:
+    """
+    Resume the user's latest online energy model (or start one) and fold in
+    the moods logged since it was saved.
+    Returns None if there is no new mood data.
+    """
+    model_record = load_model(user_id, db, model_type=ONLINE_ENERGY_MODEL_TYPE)
+    # Decode a private copy: the cached instance may be serving predictions
+    model = deserialize_model(model_record.model_data) if model_record else OnlineEnergyModel()
+
+    # Lags come from the full history; only rows after last_mood_id are learned
+    df = prepare_training_data(user_id, db)
+    new_rows = df[df['mood_id'] > model.last_mood_id]
+    if new_rows.empty:
+        return None
+
+    model.partial_fit(new_rows, new_rows['energy_level'])
+    model.last_mood_id = int(new_rows['mood_id'].max())
+    return model, model.accuracy
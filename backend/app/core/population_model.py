@@ -0,0 +1,279 @@
+import json
+import pickle
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session, defer
+
+from ..models.profile import UserProfile
+from ..models.mood import DailyMood
+from ..models.population import PopulationModel, UserCalibration
+from ..core.ml_model import fit_energy_model, ENERGY_FEATURE_COLUMNS, ENERGY_LEVEL_MAPPING
+from ..core.mood_predictor_ml import fit_mood_model, MOOD_LABELS, MOOD_FEATURES
+from ..core.symptom_predictor_ml import fit_symptom_model, ALL_SYMPTOMS, SYMPTOM_FEATURES
+from ..core.model_cache import model_cache
+from ..core.response_cache import bump_data_versions
+from ..config import settings
+
+POPULATION_MODEL_TYPES = ("energy", "mood", "symptom")
+
+
+def build_population_frame(db: Session, user_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """
+    Every mood with a known cycle day, joined to its user's profile, in one
+    query. Columns use the shared feature names (see Predictor.build_features),
+    with energy lags shifted within each user's history.
+    """
+    query = select(
+        DailyMood.user_id, DailyMood.date, DailyMood.day_of_cycle, DailyMood.energy_level,
+        DailyMood.mood, DailyMood.symptoms,
+        UserProfile.cycle_length, UserProfile.luteal_length, UserProfile.menses_length,
+        UserProfile.number_of_peak, UserProfile.height_cm, UserProfile.weight_kg, UserProfile.unusual_bleeding,
+    ).join(UserProfile, UserProfile.user_id == DailyMood.user_id).where(
+        DailyMood.day_of_cycle.isnot(None)
+    ).order_by(DailyMood.user_id, DailyMood.date)
+    if user_ids is not None:
+        query = query.where(DailyMood.user_id.in_(list(user_ids)))
+
+    df = pd.DataFrame(db.execute(query).all(), columns=[
+        'user_id', 'date', 'day_of_cycle', 'energy_level', 'mood', 'symptoms',
+        'cycle_length', 'luteal_length', 'menses_length',
+        'number_of_peak', 'height_cm', 'weight_kg', 'unusual_bleeding',
+    ])
+    df['bmi'] = df['weight_kg'].astype(float) / (df['height_cm'].astype(float) / 100) ** 2
+    df['unusual_bleeding'] = df['unusual_bleeding'].fillna(False).astype(bool)
+    energy = df.groupby('user_id')['energy_level']
+    for lag in (1, 2, 3):
+        df[f'energy_lag_{lag}'] = energy.shift(lag)
+    return df
+
+
+def _class_prior(labels: pd.Series, classes: List[Any]) -> List[float]:
+    counts = labels.value_counts()
+    return [float(counts.get(label, 0)) / len(labels) for label in classes]
+
+
+def fit_population_models(df: pd.DataFrame, n_jobs: int = 1) -> Dict[str, Optional[dict]]:
+    """
+    Fit the shared energy, mood and symptom models on a population frame.
+    Each bundle carries the population label priors used for calibration.
+    """
+    bundles = {}
+
+    energy_df = df.dropna(subset=['energy_level', 'energy_lag_3'])
+    bundles["energy"] = None
+    if len(energy_df) >= 3:
+        energy_df = energy_df[list(ENERGY_FEATURE_COLUMNS) + ['energy_level']].rename(columns=ENERGY_FEATURE_COLUMNS)
+        energy_df = energy_df.astype({'energy_level': int, 'energy_lag_1': int, 'energy_lag_2': int, 'energy_lag_3': int})
+        model, accuracy = fit_energy_model(energy_df, n_jobs=n_jobs)
+        classes = [int(label) for label in model.classes_]
+        bundles["energy"] = {
+            "model": model, "accuracy": accuracy, "classes": classes,
+            "class_prior": _class_prior(energy_df['energy_level'], classes),
+        }
+
+    mood_df = df[df['mood'].isin(MOOD_LABELS)]
+    mood_model_data = fit_mood_model(mood_df[MOOD_FEATURES + ['mood']].copy(), n_jobs=n_jobs) if len(mood_df) else None
+    bundles["mood"] = None
+    if mood_model_data:
+        model, accuracy = mood_model_data
+        classes = [MOOD_LABELS[encoded] for encoded in model.classes_]
+        bundles["mood"] = {
+            "model": model, "accuracy": accuracy, "classes": classes,
+            "class_prior": _class_prior(mood_df['mood'], classes),
+        }
+
+    symptom_df = df[SYMPTOM_FEATURES].copy()
+    symptom_df['symptoms'] = [[symptom] if isinstance(symptom, str) and symptom else [] for symptom in df['symptoms']]
+    symptom_model_data = fit_symptom_model(symptom_df, n_jobs=n_jobs)
+    bundles["symptom"] = None
+    if symptom_model_data:
+        model, accuracy, mlb = symptom_model_data
+        bundles["symptom"] = {
+            "model": model, "mlb": mlb, "accuracy": accuracy,
+            "label_prior": [float(df['symptoms'].eq(symptom).mean()) for symptom in ALL_SYMPTOMS],
+        }
+
+    return bundles
+
+
+def train_population_models(db: Session) -> Dict[str, str]:
+    """
+    Train and save the shared models over all users, then recalibrate every user.
+    Bumps the data version of every user with a profile, so their cached
+    responses and stored predictions are not served from the old models.
+    Returns a status message per model.
+    """
+    df = build_population_frame(db)
+    bundles = fit_population_models(df, n_jobs=settings.ml_training_workers)
+
+    results = {}
+    saved = False
+    for model_type in POPULATION_MODEL_TYPES:
+        bundle = bundles[model_type]
+        if bundle is None:
+            results[f"{model_type}_model"] = "Not enough data to train."
+            continue
+        db.add(PopulationModel(
+            model_type=model_type,
+            model_data=pickle.dumps(bundle),
+            accuracy_score=bundle["accuracy"],
+            n_users=int(df['user_id'].nunique()),
+            n_samples=len(df),
+        ))
+        saved = True
+        results[f"{model_type}_model"] = f"Trained with accuracy: {bundle['accuracy']:.2f}"
+    if saved:
+        # Any user with a profile may be served by the shared models
+        bump_data_versions(select(UserProfile.user_id), db)
+    db.commit()
+
+    results["calibrations"] = f"Calibrated {compute_calibrations(db, df=df)} users"
+    return results
+
+
+def load_population_model(model_type: str, db: Session) -> Optional[PopulationModel]:
+    """
+    Load the latest population model record of a type; the blob is deferred
+    """
+    return db.query(PopulationModel).options(defer(PopulationModel.model_data)).filter(
+        PopulationModel.model_type == model_type
+    ).order_by(PopulationModel.id.desc()).first()
+
+
+def get_cached_population_model(model_record: PopulationModel) -> dict:
+    """
+    The one in-memory copy of a population model, shared by every user
+    """
+    key = ("population", model_record.model_type, model_record.id)
+    bundle = model_cache.get(key)
+    if bundle is None:
+        model_data = model_record.model_data
+        bundle = pickle.loads(model_data)
+        model_cache.put(key, bundle, len(model_data))
+    return bundle
+
+
+def latest_population_model_id(db: Session) -> int:
+    return db.scalar(select(func.max(PopulationModel.id))) or 0
+
+
+def _calibration_weights(user_prior: np.ndarray, population_prior: np.ndarray) -> np.ndarray:
+    # Prior-shift ratio; labels the population never showed keep weight 1
+    return np.divide(user_prior, population_prior, out=np.ones_like(user_prior), where=population_prior > 0)
+
+
+def _odds(p: np.ndarray) -> np.ndarray:
+    p = np.clip(p, 1e-6, 1 - 1e-6)
+    return p / (1 - p)
+
+
+def compute_calibrations(db: Session, user_ids: Optional[Iterable[int]] = None, df: Optional[pd.DataFrame] = None) -> int:
+    """
+    Recompute per-user calibration weights against the latest population
+    models: each user's label frequencies, shrunk towards the population
+    prior by ml_calibration_prior_strength pseudo-counts, divided by that
+    prior. Returns the number of users calibrated.
+    """
+    if df is None:
+        df = build_population_frame(db, user_ids)
+    elif user_ids is not None:
+        df = df[df['user_id'].isin(list(user_ids))]
+    strength = settings.ml_calibration_prior_strength
+
+    rows = []
+    for model_type in POPULATION_MODEL_TYPES:
+        record = load_population_model(model_type, db)
+        if record is None:
+            continue
+        bundle = get_cached_population_model(record)
+
+        if model_type == "symptom":
+            labels = ALL_SYMPTOMS
+            population_prior = np.array(bundle["label_prior"])
+            # Shifting the odds of each symptom independently
+            for user_id, symptoms in df.groupby('user_id')['symptoms']:
+                counts = np.array([symptoms.eq(symptom).sum() for symptom in labels], dtype=float)
+                user_prior = (counts + strength * population_prior) / (len(symptoms) + strength)
+                weights = _odds(user_prior) / _odds(population_prior)
+                rows.append((user_id, model_type, dict(zip(labels, weights.tolist())), len(symptoms)))
+            continue
+
+        column = 'energy_level' if model_type == "energy" else 'mood'
+        labels = bundle["classes"]
+        population_prior = np.array(bundle["class_prior"])
+        for user_id, values in df.dropna(subset=[column]).groupby('user_id')[column]:
+            counts = values.value_counts()
+            user_counts = np.array([counts.get(label, 0) for label in labels], dtype=float)
+            user_prior = (user_counts + strength * population_prior) / (len(values) + strength)
+            weights = _calibration_weights(user_prior, population_prior)
+            rows.append((user_id, model_type, dict(zip(map(str, labels), weights.tolist())), len(values)))
+
+    calibrated_users = {int(row[0]) for row in rows}
+    if calibrated_users:
+        db.query(UserCalibration).filter(
+            UserCalibration.user_id.in_(calibrated_users)
+        ).delete(synchronize_session=False)
+        db.add_all([
+            UserCalibration(user_id=int(user_id), model_type=model_type,
+                            class_weights=json.dumps(weights), n_samples=int(n_samples))
+            for user_id, model_type, weights, n_samples in rows
+        ])
+        bump_data_versions(calibrated_users, db)
+    db.commit()
+    return len(calibrated_users)
+
+
+def load_user_calibrations(user_id: int, db: Session) -> Dict[str, Dict[str, float]]:
+    """
+    Calibration weights of one user by model type; missing types mean no adjustment
+    """
+    return {
+        model_type: json.loads(class_weights)
+        for model_type, class_weights in db.query(
+            UserCalibration.model_type, UserCalibration.class_weights
+        ).filter(UserCalibration.user_id == user_id).all()
+    }
+
+
+def _calibrated_argmax(proba: np.ndarray, classes: List[Any], weights: Dict[str, float]) -> List[Any]:
+    weight_vector = np.array([weights.get(str(label), 1.0) for label in classes])
+    return [classes[index] for index in np.argmax(proba * weight_vector, axis=1)]
+
+
+def predict_energy_population(bundle: dict, weights: Dict[str, float], features: pd.DataFrame) -> List[str]:
+    """
+    Energy head of the population model, calibrated for one user.
+    Every row must have its three energy lags.
+    """
+    input_df = features[list(ENERGY_FEATURE_COLUMNS)].rename(columns=ENERGY_FEATURE_COLUMNS)
+    lag_columns = ['energy_lag_1', 'energy_lag_2', 'energy_lag_3']
+    input_df[lag_columns] = input_df[lag_columns].astype(int)
+    predictions = _calibrated_argmax(bundle["model"].predict_proba(input_df), bundle["classes"], weights)
+    return [ENERGY_LEVEL_MAPPING.get(prediction, 'medium') for prediction in predictions]
+
+
+def predict_moods_population(bundle: dict, weights: Dict[str, float], features: pd.DataFrame) -> List[str]:
+    """
+    Mood head of the population model, calibrated for one user.
+    """
+    return _calibrated_argmax(bundle["model"].predict_proba(features[MOOD_FEATURES]), bundle["classes"], weights)
+
+
+def predict_symptoms_population(bundle: dict, weights: Dict[str, float], features: pd.DataFrame) -> List[List[str]]:
+    """
+    Symptom head of the population model, calibrated for one user.
+    """
+    model = bundle["model"]
+    estimators = model.named_steps['classifier'].estimators_
+    probas = model.predict_proba(features[SYMPTOM_FEATURES])
+
+    present = np.zeros((len(features), len(ALL_SYMPTOMS)), dtype=bool)
+    for j, (symptom, estimator, proba) in enumerate(zip(ALL_SYMPTOMS, estimators, probas)):
+        classes = list(estimator.classes_)
+        if 1 not in classes:
+            continue
+        p = proba[:, classes.index(1)]
+        present[:, j] = _odds(p) * weights.get(symptom, 1.0) > 1.0
+    return [[symptom for symptom, flag in zip(ALL_SYMPTOMS, row) if flag] for row in present]
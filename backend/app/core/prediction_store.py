@@ -0,0 +1,185 @@
+import json
+import logging
+from datetime import date, timedelta
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+
+from ..database import SessionLocal
+from ..models.model import ActiveModel
+from ..models.user import User
+from ..models.profile import UserProfile
+from ..models.prediction import DailyPrediction
+from ..core.predictor import Predictor
+from ..core.user_context import UserContext
+from ..core.population_model import latest_population_model_id
+from ..core.seven_day_planner import score_plan_days
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def get_model_version(user_id: int, db: Session) -> str:
+    """
+    Version string identifying the energy/mood/symptom models currently in use,
+    built from the active model id of each type (0 when a type is untrained)
+    and the newest population model id
+    """
+    active_ids = dict(
+        db.query(ActiveModel.model_type, ActiveModel.model_id).filter(
+            ActiveModel.user_id == user_id
+        ).all()
+    )
+    return "e{}.m{}.s{}.p{}".format(
+        active_ids.get(settings.ml_energy_model_type) or 0,
+        active_ids.get("mood") or 0,
+        active_ids.get("symptom") or 0,
+        latest_population_model_id(db),
+    )
+
+
+def refresh_daily_predictions(user_id: int, db: Session, days: Optional[int] = None) -> int:
+    """
+    Recompute the stored predictions for today and the following days.
+    Rows carry the data version read before predicting, so a write that
+    commits while the refresh runs leaves them stale rather than served.
+    Returns the number of rows written.
+    """
+    days = days or settings.prediction_refresh_days
+    today = date.today()
+    target_dates = [today + timedelta(days=i) for i in range(days)]
+
+    ctx = UserContext(user_id, db)
+    data_version = ctx.data_version
+    try:
+        predictions = Predictor(user_id, db, ctx).predict(target_dates)
+    except ValueError:
+        # No profile yet: nothing to materialize
+        return 0
+
+    model_version = get_model_version(user_id, db)
+    rows = [predictions[target_date] for target_date in target_dates]
+    scores = score_plan_days(
+        [row["predicted_energy_level"] for row in rows],
+        [row["predicted_mood"] for row in rows],
+        [row["predicted_symptoms"] for row in rows],
+    )
+
+    # Overlapping refreshes of one user (a write's background task, a retrain,
+    # the sweep) take turns on the user's row, so their delete+insert pairs
+    # never collide on the unique key. SQLite serializes writers without it.
+    db.query(User.id).filter(User.id == user_id).with_for_update().one()
+
+    # Replace every stored row in the window, whatever model version produced it
+    db.query(DailyPrediction).filter(
+        DailyPrediction.user_id == user_id,
+        DailyPrediction.date >= today
+    ).delete(synchronize_session=False)
+
+    db.add_all([
+        DailyPrediction(
+            user_id=user_id,
+            date=target_date,
+            model_version=model_version,
+            computed_on=today,
+            data_version=data_version,
+            day_of_cycle=row["day_of_cycle"],
+            cycle_phase=row["cycle_phase"],
+            predicted_energy_level=row["predicted_energy_level"],
+            predicted_mood=row["predicted_mood"],
+            predicted_symptoms=json.dumps(row["predicted_symptoms"]),
+            next_period_in_days=row["next_period_in_days"],
+            next_period_earliest_in_days=row["next_period_earliest_in_days"],
+            next_period_latest_in_days=row["next_period_latest_in_days"],
+            confidence_score=row["confidence_score"],
+            score=int(score),
+        )
+        for target_date, row, score in zip(target_dates, rows, scores)
+    ])
+    db.commit()
+
+    return len(rows)
+
+
+def invalidate_daily_predictions(user_id: int, db: Session) -> None:
+    """
+    Drop the user's stored predictions from today on. Called by data writes
+    before they commit, so stale rows are never served while a refresh runs.
+    """
+    db.query(DailyPrediction).filter(
+        DailyPrediction.user_id == user_id,
+        DailyPrediction.date >= date.today()
+    ).delete(synchronize_session=False)
+
+
+def get_fresh_predictions(
+    user_id: int, target_dates: List[date], db: Session, ctx: Optional[UserContext] = None
+) -> Optional[Dict[date, Dict[str, Any]]]:
+    """
+    Stored predictions for every target date, or None unless all of them
+    were computed today, with the user's current models, from their current data.
+    """
+    if not target_dates:
+        return None
+
+    data_version = (ctx or UserContext(user_id, db)).data_version
+
+    rows = db.query(DailyPrediction).filter(
+        DailyPrediction.user_id == user_id,
+        DailyPrediction.date >= min(target_dates),
+        DailyPrediction.date <= max(target_dates),
+        DailyPrediction.model_version == get_model_version(user_id, db),
+        DailyPrediction.computed_on == date.today(),
+        DailyPrediction.data_version == data_version
+    ).all()
+
+    predictions = {
+        row.date: {
+            "day_of_cycle": row.day_of_cycle,
+            "cycle_phase": row.cycle_phase,
+            "predicted_energy_level": row.predicted_energy_level,
+            "predicted_mood": row.predicted_mood,
+            "predicted_symptoms": json.loads(row.predicted_symptoms) if row.predicted_symptoms else [],
+            "next_period_in_days": row.next_period_in_days,
+            "next_period_earliest_in_days": row.next_period_earliest_in_days,
+            "next_period_latest_in_days": row.next_period_latest_in_days,
+            "confidence_score": row.confidence_score,
+            "score": row.score,
+        }
+        for row in rows
+    }
+
+    if any(target_date not in predictions for target_date in target_dates):
+        return None
+    return predictions
+
+
+def refresh_user_predictions_task(user_id: int) -> None:
+    """
+    Background task entry point: refresh one user in a session of its own
+    """
+    db = SessionLocal()
+    try:
+        refresh_daily_predictions(user_id, db)
+    finally:
+        db.close()
+
+
+def refresh_stale_predictions(db: Session) -> int:
+    """
+    Refresh every user with a profile whose stored window is missing or out of date.
+    A user whose refresh fails is logged and skipped, so the rest still refresh.
+    Returns the number of users refreshed.
+    """
+    today = date.today()
+    target_dates = [today + timedelta(days=i) for i in range(settings.prediction_refresh_days)]
+
+    refreshed = 0
+    for (user_id,) in db.query(UserProfile.user_id).all():
+        try:
+            if get_fresh_predictions(user_id, target_dates, db) is None:
+                refresh_daily_predictions(user_id, db)
+                refreshed += 1
+        except Exception:
+            db.rollback()
+            logger.exception("Refreshing daily predictions for user %d failed", user_id)
+    return refreshed
@@ -0,0 +1,168 @@
+import pandas as pd
+from datetime import date, timedelta
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+
+from ..core.user_context import UserContext
+from ..core.cycle_calculator import calculate_days_of_cycle, calculate_next_period_window
+from ..core.ml_model import compute_bmi, load_model, predict_energy_levels
+from ..core.mood_predictor_ml import load_mood_model, predict_moods
+from ..core.symptom_predictor_ml import load_symptom_model, predict_symptoms
+from ..core.model_cache import get_cached_model
+from ..core.population_model import (
+    load_population_model, get_cached_population_model, load_user_calibrations,
+    predict_energy_population, predict_moods_population, predict_symptoms_population,
+)
+from ..config import settings
+
+
+class Predictor:
+    """
+    Single entry point for the energy, mood and symptom models of one user.
+    Builds the shared feature frame once per (user, date) and dispatches it to
+    every head; each model is loaded at most once per Predictor.
+    A head without a per-user model (or every head, with ml_model_scope
+    "population") uses the shared population model, calibrated for the user.
+    """
+
+    def __init__(self, user_id: int, db: Session, ctx: Optional[UserContext] = None):
+        self.user_id = user_id
+        self.db = db
+        self.ctx = ctx or UserContext(user_id, db)
+
+    def build_features(self, target_dates: List[date]) -> pd.DataFrame:
+        """
+        One row per date with the cycle and profile features all heads use,
+        plus the energy lags (NaN when fewer than three earlier moods exist).
+        """
+        profile = self.ctx.require_profile()
+        days_of_cycle = calculate_days_of_cycle(self.user_id, target_dates, self.db, self.ctx)
+
+        lags = []
+        for target_date in target_dates:
+            lag_moods = self.ctx.moods_before(target_date, 3)
+            if len(lag_moods) < 3:
+                lags.append((None, None, None))
+            else:
+                lags.append(tuple(int(mood.energy_level) for mood in lag_moods))
+        lag_1, lag_2, lag_3 = zip(*lags) if lags else ((), (), ())
+
+        return pd.DataFrame({
+            'day_of_cycle': [int(day) for day in days_of_cycle],
+            'cycle_length': int(profile.cycle_length),
+            'luteal_length': int(profile.luteal_length),
+            'menses_length': int(profile.menses_length),
+            'number_of_peak': int(profile.number_of_peak),
+            'bmi': float(compute_bmi(profile.height_cm, profile.weight_kg)),
+            'unusual_bleeding': bool(profile.unusual_bleeding),
+            'energy_lag_1': pd.array(lag_1, dtype="Int64"),
+            'energy_lag_2': pd.array(lag_2, dtype="Int64"),
+            'energy_lag_3': pd.array(lag_3, dtype="Int64"),
+        }, index=pd.Index(target_dates, name='date'))
+
+    def predict(self, target_dates: List[date]) -> Dict[date, Dict[str, Any]]:
+        """
+        Combined PredictionResponse payload for each date.
+        A head that cannot predict a date leaves predicted_energy_level or
+        predicted_mood as None and predicted_symptoms as an empty list.
+        """
+        if not target_dates:
+            return {}
+
+        features = self.build_features(target_dates)
+
+        use_user_models = settings.ml_model_scope != "population"
+        calibrations = None
+
+        def population(model_type):
+            nonlocal calibrations
+            record = load_population_model(model_type, self.db)
+            if record is None:
+                return None, None, None
+            if calibrations is None:
+                calibrations = load_user_calibrations(self.user_id, self.db)
+            return record, get_cached_population_model(record), calibrations.get(model_type, {})
+
+        energy_levels = {}
+        energy_record = load_model(self.user_id, self.db) if use_user_models else None
+        has_lags = features['energy_lag_3'].notna()
+        if has_lags.any():
+            energy_features = features[has_lags]
+            if energy_record:
+                energy_levels = dict(zip(
+                    energy_features.index,
+                    predict_energy_levels(get_cached_model(energy_record), energy_features)
+                ))
+            else:
+                energy_record, bundle, weights = population("energy")
+                if bundle:
+                    energy_levels = dict(zip(
+                        energy_features.index,
+                        predict_energy_population(bundle, weights, energy_features)
+                    ))
+
+        moods = {}
+        mood_record = load_mood_model(self.user_id, self.db) if use_user_models else None
+        if mood_record:
+            moods = dict(zip(features.index, predict_moods(get_cached_model(mood_record), features)))
+        else:
+            _, bundle, weights = population("mood")
+            if bundle:
+                moods = dict(zip(features.index, predict_moods_population(bundle, weights, features)))
+
+        symptoms = {}
+        symptom_model = load_symptom_model(self.user_id, self.db) if use_user_models else None
+        if symptom_model:
+            symptoms = dict(zip(features.index, predict_symptoms(symptom_model, features)))
+        else:
+            _, bundle, weights = population("symptom")
+            if bundle:
+                symptoms = dict(zip(features.index, predict_symptoms_population(bundle, weights, features)))
+
+        # Days until next period depends only on today, not on the target date
+        next_period = calculate_next_period_window(self.user_id, self.db, self.ctx)
+        days_until_next, earliest, latest = next_period or (None, None, None)
+
+        phases = self.ctx.cycle_index.phases(features['day_of_cycle'].to_numpy())
+
+        predictions = {}
+        for target_date, day_of_cycle, cycle_phase in zip(target_dates, features['day_of_cycle'], phases):
+            predictions[target_date] = {
+                "day_of_cycle": int(day_of_cycle),
+                "cycle_phase": str(cycle_phase),
+                "predicted_energy_level": energy_levels.get(target_date),
+                "predicted_mood": moods.get(target_date),
+                "predicted_symptoms": symptoms.get(target_date, []),
+                "next_period_in_days": days_until_next,
+                "next_period_earliest_in_days": earliest,
+                "next_period_latest_in_days": latest,
+                "confidence_score": energy_record.accuracy_score if energy_record else None,
+            }
+
+        return predictions
+
+    def predict_one(self, target_date: date) -> Dict[str, Any]:
+        return self.predict([target_date])[target_date]
+
+    def history(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """
+        Daily predictions for a date range, skipping dates the energy model cannot predict
+        """
+        target_dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        try:
+            predictions = self.predict(target_dates)
+        except ValueError:
+            return []
+
+        return [
+            {"date": target_date.isoformat(), **prediction}
+            for target_date, prediction in predictions.items()
+            if prediction["predicted_energy_level"] is not None
+        ]
+
+
+def prediction_history(user_id: int, start_date: date, end_date: date, db: Session) -> List[Dict[str, Any]]:
+    """
+    Predictor.history as a module-level function, so it can be sent to the ML process pool
+    """
+    return Predictor(user_id, db).history(start_date, end_date)
@@ -0,0 +1,70 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import SessionLocal
+from ..config import settings
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    The shared pool for CPU-bound ML work, created on first use.
+    None when ml_process_pool_workers is 0.
+    """
+    global _executor
+    if settings.ml_process_pool_workers <= 0:
+        return None
+    if _executor is None:
+        # spawn: forking a process that already runs event-loop and driver threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.ml_process_pool_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_process_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def run_cpu_bound(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Await fn(*args) in the process pool without blocking the event loop.
+    fn and its arguments must be picklable; without a pool it runs in a thread.
+    """
+    pool = get_process_pool()
+    if pool is None:
+        return await run_in_threadpool(fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(pool, functools.partial(fn, *args))
+
+
+def _call_with_session(fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    # Runs in a pool process, which opens its own connection
+    db = SessionLocal()
+    try:
+        return fn(*args, db=db, **kwargs)
+    finally:
+        db.close()
+
+
+async def run_cpu_bound_with_db(db: AsyncSession, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Await fn(*args, db=<Session>, **kwargs) for work that both reads the
+    database and runs models. In the pool the function gets a fresh session
+    and sees only committed data; without a pool it runs on `db` via run_sync.
+    """
+    pool = get_process_pool()
+    if pool is None:
+        return await db.run_sync(lambda session: fn(*args, db=session, **kwargs))
+    return await asyncio.get_running_loop().run_in_executor(
+        pool, functools.partial(_call_with_session, fn, args, kwargs)
+    )
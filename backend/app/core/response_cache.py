@@ -0,0 +1,92 @@
+import hashlib
+import json
+from datetime import date
+from typing import Any, Awaitable, Callable, Iterable, Union
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+
+from ..models.user import User
+from ..core.lru_cache import LRUCache
+from ..config import settings
+
+response_cache = LRUCache(
+    max_entries=settings.response_cache_max_entries,
+    max_bytes=settings.response_cache_max_bytes,
+)
+
+
+def bump_data_version(user_id: int, db: Session) -> None:
+    """
+    Mark the user's data as changed. Runs inside the caller's transaction, so
+    the new version becomes visible together with the write it describes.
+    """
+    db.query(User).filter(User.id == user_id).update(
+        {User.data_version: User.data_version + 1},
+        synchronize_session=False
+    )
+    response_cache.invalidate(user_id)
+
+
+def bump_data_versions(user_ids: Union[Iterable[int], Select], db: Session) -> None:
+    """
+    bump_data_version for many users in one UPDATE, for writes shared between
+    users (population models, calibrations); user_ids may be a select of ids
+    """
+    if not isinstance(user_ids, Select):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+    db.query(User).filter(User.id.in_(user_ids)).update(
+        {User.data_version: User.data_version + 1},
+        synchronize_session=False
+    )
+    if isinstance(user_ids, Select):
+        response_cache.clear()
+    else:
+        for user_id in user_ids:
+            response_cache.invalidate(user_id)
+
+
+def make_etag(request: Request, user: User) -> str:
+    """
+    ETag from the user's data version, today's date (predictions are relative
+    to today) and the request path and query
+    """
+    url_hash = hashlib.sha1(f"{request.url.path}?{request.url.query}".encode()).hexdigest()[:12]
+    return f'"{user.id}-{user.data_version}-{date.today():%Y%m%d}-{url_hash}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def cached_json_response(request: Request, user: User, build: Callable[[], Awaitable[Any]]) -> Response:
+    """
+    Answer a GET from the user's data version: 304 when the client already has
+    this version, cached JSON bytes when another request built it, and only
+    otherwise await `build` and serialize its result.
+    """
+    etag = make_etag(request, user)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    key = (user.id, etag)
+    body = response_cache.get(key)
+    if body is None:
+        payload = await build()
+        if isinstance(payload, BaseModel):
+            body = payload.model_dump_json().encode()
+        else:
+            body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+        response_cache.put(key, body, len(body))
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,273 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import select, update, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.user import User
+from ..models.retrain_job import RetrainJob
+from ..core.ml_model import train_model, save_model, should_retrain_model
+from ..core.online_energy_model import ONLINE_ENERGY_MODEL_TYPE, train_online_energy_model
+from ..core.mood_predictor_ml import train_mood_model, save_mood_model
+from ..core.symptom_predictor_ml import train_symptom_model, save_symptom_model
+from ..core.prediction_store import refresh_daily_predictions
+from ..core.population_model import latest_population_model_id, compute_calibrations
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _retrain_energy(user_id: int, db: Session, n_jobs: int = 1) -> str:
+    if settings.ml_energy_model_type == ONLINE_ENERGY_MODEL_TYPE:
+        return _retrain_energy_online(user_id, db)
+    energy_model, energy_accuracy = train_model(user_id, db, n_jobs=n_jobs)
+    save_model(user_id, energy_model, energy_accuracy, db)
+    return f"Trained with accuracy: {energy_accuracy:.2f}"
+
+
+def _retrain_energy_online(user_id: int, db: Session) -> str:
+    energy_model_data = train_online_energy_model(user_id, db)
+    if not energy_model_data:
+        return "No new mood data since the last update."
+    energy_model, energy_accuracy = energy_model_data
+    save_model(user_id, energy_model, energy_accuracy, db, model_type=ONLINE_ENERGY_MODEL_TYPE)
+    if energy_accuracy is None:
+        return "Updated; accuracy is scored from the next update on."
+    return f"Updated with accuracy: {energy_accuracy:.2f}"
+
+
+def _retrain_mood(user_id: int, db: Session, n_jobs: int = 1) -> str:
+    mood_model_data = train_mood_model(user_id, db, n_jobs=n_jobs)
+    if not mood_model_data:
+        return "Not enough data to train."
+    mood_model, mood_accuracy = mood_model_data
+    save_mood_model(user_id, mood_model, mood_accuracy, db)
+    return f"Trained with accuracy: {mood_accuracy:.2f}"
+
+
+def _retrain_symptom(user_id: int, db: Session, n_jobs: int = 1) -> str:
+    symptom_model_data = train_symptom_model(user_id, db, n_jobs=n_jobs)
+    if not symptom_model_data:
+        return "Not enough data to train."
+    symptom_model, symptom_accuracy, mlb = symptom_model_data
+    save_symptom_model(user_id, symptom_model, mlb, symptom_accuracy, db)
+    return f"Trained with accuracy: {symptom_accuracy:.2f}"
+
+
+def _recalibrate(user_id: int, db: Session, n_jobs: int = 1) -> str:
+    if not latest_population_model_id(db):
+        return "No population models to calibrate against."
+    compute_calibrations(db, user_ids=[user_id])
+    return "Calibrated against the population models."
+
+
+# Result key -> trainer; the steps are independent and run concurrently
+RETRAIN_STEPS = [
+    ("energy_model", _retrain_energy),
+    ("mood_model", _retrain_mood),
+    ("symptom_model", _retrain_symptom),
+    ("calibration", _recalibrate),
+]
+
+
+def _run_step(retrain: Callable[..., str], user_id: int, db: Session, n_jobs: int) -> tuple:
+    # Sessions are not thread-safe, so each step gets its own on the same engine
+    started = time.perf_counter()
+    with Session(bind=db.get_bind()) as step_db:
+        try:
+            message = retrain(user_id, step_db, n_jobs=n_jobs)
+        except ValueError as e:
+            message = f"Training failed: {e}"
+    return message, time.perf_counter() - started
+
+
+def retrain_user_models(
+    user_id: int, db: Session,
+    on_step: Optional[Callable[[List[str], Dict[str, str]], None]] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> Dict[str, str]:
+    """
+    Train and save the energy, mood and symptom models of one user and
+    refresh their population calibration, running the steps concurrently
+    within the ml_training_workers budget.
+    Returns a status message per step. `on_step` is called with the steps
+    still running and the results so far each time a step finishes;
+    `timings`, if given, is filled with each step's wall time in seconds.
+    """
+    budget = max(1, settings.ml_training_workers)
+    # Threads for the steps, the rest of the budget for trees and CV folds
+    n_jobs = max(1, budget // len(RETRAIN_STEPS))
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(budget, len(RETRAIN_STEPS))) as executor:
+        futures = {
+            executor.submit(_run_step, retrain, user_id, db, n_jobs): name
+            for name, retrain in RETRAIN_STEPS
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            results[name], elapsed = future.result()
+            if timings is not None:
+                timings[name] = round(elapsed, 3)
+            if on_step:
+                on_step([step for step, _ in RETRAIN_STEPS if step not in results], results)
+    # Report in step order rather than completion order
+    return {name: results[name] for name, _ in RETRAIN_STEPS}
+
+
+def get_pending_job(user_id: int, db: Session) -> Optional[RetrainJob]:
+    return db.scalar(select(RetrainJob).where(
+        RetrainJob.user_id == user_id,
+        RetrainJob.status == "pending"
+    ))
+
+
+def enqueue_retrain(user_id: int, db: Session, delay_seconds: Optional[float] = None) -> RetrainJob:
+    """
+    Queue a retrain for the user, or return the job already waiting for them.
+    A job that is running does not absorb new requests, since it may have
+    read its training data before the latest writes.
+
+    With delay_seconds the job is debounced: it waits that long, and every
+    further delayed request pushes it back again. Without it the job (new or
+    coalesced) runs as soon as a worker is free.
+    """
+    run_after = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds) if delay_seconds else None
+
+    job = get_pending_job(user_id, db)
+    if job is None:
+        job = RetrainJob(user_id=user_id, status="pending", progress=0, run_after=run_after)
+        db.add(job)
+    elif job.run_after is not None:
+        job.run_after = run_after
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request queued one first (uq_retrain_jobs_user_pending)
+        db.rollback()
+        return enqueue_retrain(user_id, db, delay_seconds)
+    db.refresh(job)
+    return job
+
+
+def schedule_auto_retrain(db: Session, user_id: int) -> Optional[RetrainJob]:
+    """
+    Post-commit hook for mood writes: queue a debounced retrain once enough
+    moods were logged since the last one. A burst of writes keeps pushing
+    the same pending job back, so it trains once after the burst.
+    """
+    if not should_retrain_model(user_id, db):
+        return None
+    return enqueue_retrain(user_id, db, delay_seconds=settings.ml_auto_retrain_debounce_seconds)
+
+
+def fail_stale_jobs(db: Session) -> int:
+    """
+    Fail running jobs started more than ml_retrain_job_timeout_seconds ago:
+    their worker died mid-job, so nothing else would ever finish them.
+    The user's next retrain request or automatic retrain queues a new job.
+    Returns the number of jobs failed.
+    """
+    now = datetime.now(timezone.utc)
+    failed = db.execute(
+        update(RetrainJob)
+        .where(
+            RetrainJob.status == "running",
+            RetrainJob.started_at < now - timedelta(seconds=settings.ml_retrain_job_timeout_seconds)
+        )
+        .values(
+            status="failed", current_step=None, finished_at=now,
+            error=f"Still running {settings.ml_retrain_job_timeout_seconds}s after it started; its worker stopped"
+        )
+    ).rowcount
+    db.commit()
+    if failed:
+        logger.warning("Failed %d retrain jobs whose worker stopped", failed)
+    return failed
+
+
+def claim_next_job(db: Session) -> Optional[RetrainJob]:
+    """
+    Move the oldest due pending job to running and return it. The conditional
+    UPDATE makes the claim atomic when several workers share the queue.
+    Claiming restarts the user's mood write count, so writes from here on
+    count towards the next automatic retrain. Running jobs past the timeout
+    are failed first (fail_stale_jobs).
+    """
+    fail_stale_jobs(db)
+    while True:
+        now = datetime.now(timezone.utc)
+        job = db.execute(
+            select(RetrainJob.id, RetrainJob.user_id).where(
+                RetrainJob.status == "pending",
+                or_(RetrainJob.run_after.is_(None), RetrainJob.run_after <= now)
+            ).order_by(RetrainJob.created_at, RetrainJob.id).limit(1)
+        ).first()
+        if job is None:
+            return None
+
+        claimed = db.execute(
+            update(RetrainJob)
+            .where(RetrainJob.id == job.id, RetrainJob.status == "pending")
+            .values(status="running", started_at=now)
+        ).rowcount
+        if claimed:
+            db.execute(
+                update(User).where(User.id == job.user_id).values(mood_writes_since_retrain=0)
+            )
+        db.commit()
+        if claimed:
+            return db.get(RetrainJob, job.id)
+
+
+def run_retrain_job(job: RetrainJob, db: Session) -> RetrainJob:
+    """
+    Train every model for a claimed job, recording progress and wall times
+    as each one finishes, then refresh the user's stored predictions.
+    """
+    timings = {}
+
+    def record_progress(running: List[str], results: Dict[str, str]) -> None:
+        job.current_step = ",".join(running) or None
+        job.progress = len(results) * 100 // len(RETRAIN_STEPS)
+        job.results = json.dumps(results)
+        job.timings = json.dumps(timings)
+        db.commit()
+
+    job.current_step = ",".join(name for name, _ in RETRAIN_STEPS)
+    db.commit()
+    try:
+        results = retrain_user_models(job.user_id, db, on_step=record_progress, timings=timings)
+        refresh_daily_predictions(job.user_id, db)
+        job.status = "succeeded"
+        job.results = json.dumps(results)
+        job.timings = json.dumps(timings)
+        job.progress = 100
+    except Exception as e:
+        logger.exception("Retrain job %d failed", job.id)
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e)
+
+    job.current_step = None
+    job.finished_at = datetime.now(timezone.utc)
+    db.commit()
+    return job
+
+
+def drain_queue(db: Session, max_jobs: Optional[int] = None) -> int:
+    """
+    Run pending jobs until the queue is empty or max_jobs have run.
+    Returns the number of jobs run.
+    """
+    ran = 0
+    while max_jobs is None or ran < max_jobs:
+        job = claim_next_job(db)
+        if job is None:
+            break
+        run_retrain_job(job, db)
+        ran += 1
+    return ran
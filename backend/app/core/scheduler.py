@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..core.prediction_store import refresh_stale_predictions
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_scheduler_task: Optional[asyncio.Task] = None
+
+
+def _refresh_all_users() -> int:
+    db = SessionLocal()
+    try:
+        return refresh_stale_predictions(db)
+    finally:
+        db.close()
+
+
+async def _prediction_refresh_loop():
+    """Periodically refresh every user's stored predictions off the event loop"""
+    while True:
+        try:
+            refreshed = await run_in_threadpool(_refresh_all_users)
+            logger.info("Refreshed daily predictions for %d users", refreshed)
+        except Exception:
+            logger.exception("Daily prediction refresh failed")
+        await asyncio.sleep(settings.prediction_refresh_interval_minutes * 60)
+
+
+def start_prediction_scheduler() -> None:
+    global _scheduler_task
+    if settings.prediction_scheduler_enabled and _scheduler_task is None:
+        _scheduler_task = asyncio.create_task(_prediction_refresh_loop())
+
+
+async def stop_prediction_scheduler() -> None:
+    global _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+        _scheduler_task = None
@@ -4,9 +4,10 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..config import settings
-from ..database import get_db
+from ..database import get_async_db
 from ..models.user import User
 from ..schemas.auth import TokenData
 
@@ -64,9 +65,9 @@ def verify_token(token: str) -> Optional[TokenData]:
         return None
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get the current authenticated user"""
     credentials_exception = HTTPException(
@@ -79,7 +80,7 @@ def get_current_user(
     if token_data is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    user = await db.scalar(select(User).where(User.id == token_data.user_id))
     if user is None:
         raise credentials_exception
     
@@ -92,7 +93,7 @@ def get_current_user(
     return user
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get the current active user"""
     if not current_user.is_active:
         raise HTTPException(
@@ -102,9 +103,9 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     return current_user
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """Authenticate a user with email and password"""
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         return None
     if not verify_password(password, user.password_hash):
@@ -1,10 +1,12 @@
+import numpy as np
+import pandas as pd
 from datetime import date, timedelta
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from ..core.ml_model import make_prediction
-from ..core.mood_predictor_ml import make_mood_prediction
-from ..core.symptom_predictor_ml import make_symptom_prediction
+from ..core.predictor import Predictor
+from ..core.user_context import UserContext
+from ..config import settings
 
 # --- Recommendation Logic --- #
 
@@ -39,48 +41,87 @@ def get_recommendation(score: int) -> str:
             return recommendation
     return RECOMMENDATION_THRESHOLDS[3] # Default to productive day if score is very high
 
-def generate_7_day_plan(user_id: int, db: Session) -> List[Dict[str, Any]]:
+def score_plan_days(
+    energy_levels: List[Optional[str]],
+    moods: List[Optional[str]],
+    symptoms: List[List[str]]
+) -> np.ndarray:
     """
-    Generates a 7-day plan by combining predictions from all ML models.
+    Score every day at once: weight lookups for energy and mood plus a
+    multi-hot symptom matrix multiplied by the symptom weight vector.
+    """
+    energy_scores = pd.Series(energy_levels, dtype=object).map(ENERGY_WEIGHTS).fillna(0).to_numpy(dtype=int)
+    mood_scores = pd.Series(moods, dtype=object).map(MOOD_WEIGHTS).fillna(0).to_numpy(dtype=int)
+
+    symptom_names = list(SYMPTOM_WEIGHTS)
+    symptom_index = {name: i for i, name in enumerate(symptom_names)}
+    symptom_matrix = np.zeros((len(symptoms), len(symptom_names)), dtype=int)
+    for row, day_symptoms in enumerate(symptoms):
+        for symptom in day_symptoms:
+            if symptom in symptom_index:
+                symptom_matrix[row, symptom_index[symptom]] += 1
+    symptom_scores = symptom_matrix @ np.array([SYMPTOM_WEIGHTS[name] for name in symptom_names], dtype=int)
+
+    return energy_scores + mood_scores + symptom_scores
+
+
+def get_recommendations(scores: np.ndarray) -> List[str]:
+    """Vectorized get_recommendation: first threshold the score does not exceed"""
+    thresholds = sorted(RECOMMENDATION_THRESHOLDS)
+    recommendations = [RECOMMENDATION_THRESHOLDS[threshold] for threshold in thresholds]
+    indices = np.minimum(np.searchsorted(thresholds, scores, side='left'), len(thresholds) - 1)
+    return [recommendations[i] for i in indices]
+
+
+def generate_plan(user_id: int, db: Session, days: int = 7) -> List[Dict[str, Any]]:
+    """
+    Generates a plan for the next `days` days. Each model runs once over the
+    whole horizon and the daily scores are computed in a single vectorized pass.
     """
+    if not 1 <= days <= settings.planner_max_days:
+        raise ValueError(f"Plan horizon must be between 1 and {settings.planner_max_days} days")
+
     today = date.today()
-    seven_day_plan = []
+    target_dates = [today + timedelta(days=i) for i in range(days)]
 
-    for i in range(7):
-        target_date = today + timedelta(days=i)
-        daily_plan = {"date": target_date.isoformat()}
-        total_score = 0
+    # Serve from the materialized daily_predictions rows when they are fresh
+    from ..core.prediction_store import get_fresh_predictions
+    ctx = UserContext(user_id, db)
+    predictions = get_fresh_predictions(user_id, target_dates, db, ctx)
+    stored = predictions is not None
 
-        # 1. Get Energy Prediction
+    if not stored:
         try:
-            energy_pred = make_prediction(user_id, target_date, db)
-            daily_plan["predicted_energy_level"] = energy_pred["predicted_energy_level"]
-            total_score += ENERGY_WEIGHTS.get(energy_pred["predicted_energy_level"], 0)
+            predictions = Predictor(user_id, db, ctx).predict(target_dates)
         except ValueError:
-            daily_plan["predicted_energy_level"] = "N/A"
+            predictions = {}
 
-        # 2. Get Mood Prediction
-        try:
-            mood_pred = make_mood_prediction(user_id, target_date, db)
-            daily_plan["predicted_mood"] = mood_pred["predicted_mood"]
-            total_score += MOOD_WEIGHTS.get(mood_pred["predicted_mood"], 0)
-        except ValueError:
-            daily_plan["predicted_mood"] = "N/A"
+    energy_levels = [predictions.get(d, {}).get("predicted_energy_level") for d in target_dates]
+    moods = [predictions.get(d, {}).get("predicted_mood") for d in target_dates]
+    symptoms = [predictions.get(d, {}).get("predicted_symptoms", []) for d in target_dates]
 
-        # 3. Get Symptom Predictions
-        try:
-            symptom_pred = make_symptom_prediction(user_id, target_date, db)
-            predicted_symptoms = symptom_pred["predicted_symptoms"]
-            daily_plan["predicted_symptoms"] = predicted_symptoms
-            for symptom in predicted_symptoms:
-                total_score += SYMPTOM_WEIGHTS.get(symptom, 0)
-        except ValueError:
-            daily_plan["predicted_symptoms"] = []
+    if stored:
+        scores = np.array([predictions[d]["score"] for d in target_dates], dtype=int)
+    else:
+        scores = score_plan_days(energy_levels, moods, symptoms)
+    recommendations = get_recommendations(scores)
 
-        # 4. Generate Final Recommendation
-        daily_plan["recommendation"] = get_recommendation(total_score)
-        daily_plan["score"] = total_score
+    return [
+        {
+            "date": target_date.isoformat(),
+            "predicted_energy_level": energy_level if energy_level is not None else "N/A",
+            "predicted_mood": mood if mood is not None else "N/A",
+            "predicted_symptoms": day_symptoms,
+            "recommendation": recommendation,
+            "score": int(score),
+        }
+        for target_date, energy_level, mood, day_symptoms, recommendation, score
+        in zip(target_dates, energy_levels, moods, symptoms, recommendations, scores)
+    ]
 
-        seven_day_plan.append(daily_plan)
 
-    return seven_day_plan
+def generate_7_day_plan(user_id: int, db: Session) -> List[Dict[str, Any]]:
+    """
+    Generates a 7-day plan by combining predictions from all ML models.
+    """
+    return generate_plan(user_id, db, days=7)
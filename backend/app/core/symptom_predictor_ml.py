@@ -1,19 +1,25 @@
 import pandas as pd
 import numpy as np
-import pickle
 from datetime import date
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.multioutput import MultiOutputClassifier
 from sklearn.preprocessing import StandardScaler, MultiLabelBinarizer
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
-from ..models.profile import UserProfile
 from ..models.mood import DailyMood
 from ..models.model import UserModel
 from ..core.cycle_calculator import calculate_day_of_cycle
-from ..core.ml_model import compute_bmi
+from ..core.ml_model import compute_bmi, get_profile_features
+from ..core.model_cache import get_cached_model, cache_saved_model
+from ..core.model_format import serialize_model
+from ..core.model_budget import select_forest, predict_latency_ms
+from ..core.model_registry import get_active_model, activate_model
+from ..core.forest_params import load_forest_params
+from ..core.response_cache import bump_data_version
+from ..core.user_context import UserContext
 
 # Define the known symptoms. This must be consistent.
 ALL_SYMPTOMS = [
@@ -25,65 +31,77 @@ def prepare_symptom_training_data(user_id: int, db: Session) -> Optional[pd.Data
     """
     Prepare training data for the Symptom Prediction ML model.
     """
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    if not profile:
-        raise ValueError("User profile not found")
+    profile = get_profile_features(user_id, db)
 
-    moods = db.query(DailyMood).filter(
+    moods = db.execute(select(DailyMood.day_of_cycle, DailyMood.symptoms).where(
         DailyMood.user_id == user_id,
         DailyMood.day_of_cycle.isnot(None)
-    ).order_by(DailyMood.date).all()
+    ).order_by(DailyMood.date)).all()
 
     if len(moods) < 30: # Require at least 30 data points
         return None
 
-    training_data = []
-    for mood in moods:
+    days_of_cycle, symptoms = zip(*moods)
+    return pd.DataFrame({
+        'day_of_cycle': np.array(days_of_cycle, dtype=np.int64),
+        'cycle_length': profile['cycle_length'],
+        'luteal_length': profile['luteal_length'],
+        'bmi': profile['bmi'],
         # For now, we handle a single symptom string. We wrap it in a list.
-        symptoms_list = [mood.symptoms] if mood.symptoms else []
-        record = {
-            'day_of_cycle': int(mood.day_of_cycle),
-            'cycle_length': int(profile.cycle_length),
-            'luteal_length': int(profile.luteal_length),
-            'bmi': float(compute_bmi(profile.height_cm, profile.weight_kg)),
-            'symptoms': symptoms_list
-        }
-        training_data.append(record)
-    
-    return pd.DataFrame(training_data)
+        'symptoms': [[symptom] if symptom else [] for symptom in symptoms],
+    })
 
-def train_symptom_model(user_id: int, db: Session) -> Optional[tuple]:
+def train_symptom_model(user_id: int, db: Session, n_jobs: int = 1) -> Optional[tuple]:
     """
     Train the Symptom Prediction ML model for a user.
     """
     df = prepare_symptom_training_data(user_id, db)
-    if df is None or df.empty:
+    if df is None:
+        return None
+    return fit_symptom_model(df, n_jobs=n_jobs)
+
+def symptom_training_set(df: pd.DataFrame) -> Optional[Tuple[pd.DataFrame, np.ndarray, MultiLabelBinarizer]]:
+    """
+    Features, binarized symptoms and the binarizer of prepared symptom
+    training data. Returns None if there is no data.
+    """
+    if df.empty:
         return None
 
     mlb = MultiLabelBinarizer(classes=ALL_SYMPTOMS)
     y = mlb.fit_transform(df['symptoms'])
+    return df[SYMPTOM_FEATURES], y, mlb
 
-    features = ['day_of_cycle', 'cycle_length', 'luteal_length', 'bmi']
-    X = df[features]
-
-    # Define the model pipeline
-    numeric_features = features
+def build_symptom_pipeline(params: Dict[str, Any], n_jobs: int = 1) -> Pipeline:
+    """
+    Unfitted symptom pipeline with one forest of the given parameters per symptom
+    """
     preprocessor = ColumnTransformer([
-        ('num', StandardScaler(), numeric_features)
+        ('num', StandardScaler(), SYMPTOM_FEATURES)
     ])
 
     # We use a RandomForestClassifier wrapped in a MultiOutputClassifier
     # to handle multi-label symptom prediction.
-    base_classifier = RandomForestClassifier(n_estimators=100, random_state=42)
-    model = Pipeline([
+    base_classifier = RandomForestClassifier(**params, oob_score=True, random_state=42)
+    return Pipeline([
         ('preprocessor', preprocessor),
-        ('classifier', MultiOutputClassifier(base_classifier))
+        ('classifier', MultiOutputClassifier(base_classifier, n_jobs=n_jobs))
     ])
 
-    model.fit(X, y)
+def fit_symptom_model(df: pd.DataFrame, n_jobs: int = 1) -> Optional[tuple]:
+    """
+    Fit the symptom model on prepared training data.
+    Needs no database, so it can run in the ML process pool.
+    The per-symptom forests are fitted n_jobs at a time, and are the
+    smallest within the model budget (see select_forest).
+    """
+    training_set = symptom_training_set(df)
+    if training_set is None:
+        return None
 
-    # Accuracy for multi-label is complex. We can use subset accuracy (a strict metric).
-    accuracy = model.score(X, y)
+    X, y, mlb = training_set
+    # Accuracy for multi-label is complex. We use out-of-bag subset accuracy (a strict metric).
+    model, accuracy = select_forest(build_symptom_pipeline, X, y, load_forest_params("symptom"), n_jobs=n_jobs)
 
     return model, accuracy, mlb
 
@@ -93,45 +111,48 @@ def save_symptom_model(user_id: int, model: Pipeline, mlb: MultiLabelBinarizer,
     """
     # We need to save both the model and the binarizer
     model_and_mlb = {"model": model, "mlb": mlb}
-    model_data = pickle.dumps(model_and_mlb)
+    model_data = serialize_model(model_and_mlb)
     
     db_model = UserModel(
         user_id=user_id,
         model_type="symptom",
         model_data=model_data,
         accuracy_score=accuracy,
+        blob_size_bytes=len(model_data),
+        predict_latency_ms=predict_latency_ms(model_data, SYMPTOM_FEATURES),
         model_version="1.0"
     )
     
     db.add(db_model)
+    db.flush()
+    activate_model(db_model, db)
+    bump_data_version(user_id, db)
     db.commit()
     db.refresh(db_model)
+    cache_saved_model(db_model, model_and_mlb)
     
     return db_model
 
 def load_symptom_model(user_id: int, db: Session) -> Optional[Dict[str, Any]]:
     """
-    Load the latest trained symptom model record for a user.
+    Load the active symptom model for a user.
     """
-    model_record = db.query(UserModel).filter(
-        UserModel.user_id == user_id,
-        UserModel.model_type == "symptom"
-    ).order_by(UserModel.created_at.desc()).first()
+    model_record = get_active_model(user_id, "symptom", db)
 
     if not model_record:
         return None
 
-    model_and_mlb = pickle.loads(model_record.model_data)
+    # Copy so the cached dict is never mutated
+    model_and_mlb = dict(get_cached_model(model_record))
     model_and_mlb["accuracy_score"] = model_record.accuracy_score
     return model_and_mlb
 
-def make_symptom_prediction(user_id: int, target_date: date, db: Session) -> Dict[str, Any]:
+def make_symptom_prediction(user_id: int, target_date: date, db: Session, ctx: Optional[UserContext] = None) -> Dict[str, Any]:
     """
     Make a symptom prediction for a given date.
     """
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    if not profile:
-        raise ValueError("User profile not found")
+    ctx = ctx or UserContext(user_id, db)
+    profile = ctx.require_profile()
 
     loaded_data = load_symptom_model(user_id, db)
     if not loaded_data:
@@ -140,7 +161,7 @@ def make_symptom_prediction(user_id: int, target_date: date, db: Session) -> Dic
     model = loaded_data["model"]
     mlb = loaded_data["mlb"]
 
-    day_of_cycle = calculate_day_of_cycle(user_id, target_date, db)
+    day_of_cycle = calculate_day_of_cycle(user_id, target_date, db, ctx)
 
     input_data = {
         'day_of_cycle': int(day_of_cycle),
@@ -157,3 +178,14 @@ def make_symptom_prediction(user_id: int, target_date: date, db: Session) -> Dic
         "predicted_symptoms": list(predicted_symptoms),
         "confidence_score": loaded_data.get("accuracy_score")
     }
+
+SYMPTOM_FEATURES = ['day_of_cycle', 'cycle_length', 'luteal_length', 'bmi']
+
+def predict_symptoms(model_and_mlb: Dict[str, Any], features: pd.DataFrame) -> List[List[str]]:
+    """
+    Run the symptom head over a shared feature frame (one row per date).
+    """
+    model = model_and_mlb["model"]
+    mlb = model_and_mlb["mlb"]
+    prediction_encoded = model.predict(features[SYMPTOM_FEATURES])
+    return [list(symptoms) for symptoms in mlb.inverse_transform(prediction_encoded)]
@@ -0,0 +1,106 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import TYPE_CHECKING, List, Optional
+from sqlalchemy.orm import Session
+
+from ..models.user import User
+from ..models.profile import UserProfile
+from ..models.period import PeriodRecord
+from ..models.mood import DailyMood
+
+if TYPE_CHECKING:
+    from ..core.cycle_index import CycleIndex
+    from ..models.cycle_stats import CycleStats
+
+
+class UserContext:
+    """
+    Request-scoped snapshot of the data the predictors and cycle functions share.
+    The profile, period start dates and mood history are each queried at most
+    once, on first use, however many functions the context is passed to.
+    """
+
+    def __init__(self, user_id: int, db: Session):
+        self.user_id = user_id
+        self.db = db
+        self._profile_loaded = False
+        self._profile: Optional[UserProfile] = None
+        self._period_starts: Optional[List[date]] = None
+        self._moods: Optional[list] = None
+        self._mood_dates: Optional[List[date]] = None
+        self._data_version: Optional[int] = None
+        self._cycle_index: Optional["CycleIndex"] = None
+        self._cycle_stats: Optional["CycleStats"] = None
+
+    @property
+    def profile(self) -> Optional[UserProfile]:
+        if not self._profile_loaded:
+            self._profile = self.db.query(UserProfile).filter(
+                UserProfile.user_id == self.user_id
+            ).first()
+            self._profile_loaded = True
+        return self._profile
+
+    @property
+    def period_starts(self) -> List[date]:
+        """All period start dates, oldest first"""
+        if self._period_starts is None:
+            self._period_starts = [
+                row.start_date for row in self.db.query(PeriodRecord.start_date).filter(
+                    PeriodRecord.user_id == self.user_id
+                ).order_by(PeriodRecord.start_date).all()
+            ]
+        return self._period_starts
+
+    @property
+    def data_version(self) -> int:
+        if self._data_version is None:
+            self._data_version = self.db.query(User.data_version).filter(User.id == self.user_id).scalar() or 0
+        return self._data_version
+
+    @property
+    def cycle_index(self) -> "CycleIndex":
+        """The user's cycle index, shared across requests until their data changes"""
+        if self._cycle_index is None:
+            from ..core.cycle_index import get_cycle_index
+            self._cycle_index = get_cycle_index(self)
+        return self._cycle_index
+
+    @property
+    def cycle_stats(self) -> "CycleStats":
+        """Period count, cycle length aggregates and next start, read from cycle_stats"""
+        if self._cycle_stats is None:
+            from ..core.cycle_stats import load_cycle_stats
+            self._cycle_stats = load_cycle_stats(self)
+        return self._cycle_stats
+
+    @property
+    def moods(self) -> list:
+        """(date, energy_level) of every mood entry, oldest first"""
+        if self._moods is None:
+            self._moods = self.db.query(DailyMood.date, DailyMood.energy_level).filter(
+                DailyMood.user_id == self.user_id
+            ).order_by(DailyMood.date).all()
+        return self._moods
+
+    @property
+    def mood_dates(self) -> List[date]:
+        if self._mood_dates is None:
+            self._mood_dates = [mood.date for mood in self.moods]
+        return self._mood_dates
+
+    def require_profile(self) -> UserProfile:
+        profile = self.profile
+        if not profile:
+            raise ValueError("User profile not found")
+        return profile
+
+    def last_period_start(self, target_date: date) -> Optional[date]:
+        """Most recent period start on or before the target date"""
+        idx = bisect_right(self.period_starts, target_date)
+        return self.period_starts[idx - 1] if idx else None
+
+    def moods_before(self, target_date: date, count: int) -> list:
+        """The last `count` mood entries strictly before the target date, newest first"""
+        idx = bisect_left(self.mood_dates, target_date)
+        return self.moods[max(0, idx - count):idx][::-1]
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
@@ -13,6 +15,30 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Map the configured URL onto its async driver:
+    aiosqlite for SQLite and async psycopg (psycopg 3) for Postgres
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    elif url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+psycopg")
+    return url.render_as_string(hide_password=False)
+
+
+# Create async database engine for the async route handlers
+async_engine = create_async_engine(
+    get_async_database_url(settings.database_url),
+    echo=settings.database_echo,
+    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+)
+
+# Objects stay usable after commit, since lazy refreshes cannot run outside an await
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -28,6 +54,14 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency to get an async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def create_tables():
     """
     Create all tables in the database
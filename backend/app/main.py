@@ -2,6 +2,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
 from .database import create_tables
+from .core.model_cache import model_cache
+from .core.scheduler import start_prediction_scheduler, stop_prediction_scheduler
+from .core.process_pool import shutdown_process_pool
 from .api import auth, users, profiles, periods, moods, predictions, insights
 
 # Create FastAPI app
@@ -32,8 +35,16 @@ app.include_router(insights.router, prefix="/insights", tags=["insights"])
 
 @app.on_event("startup")
 async def startup_event():
-    """Create database tables on startup"""
+    """Create database tables and start the prediction refresh job on startup"""
     create_tables()
+    start_prediction_scheduler()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background jobs and the ML process pool on shutdown"""
+    await stop_prediction_scheduler()
+    shutdown_process_pool()
 
 
 @app.get("/")
@@ -49,4 +60,4 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {"status": "healthy", "model_cache": model_cache.stats()}
@@ -2,6 +2,10 @@ from .user import User
 from .profile import UserProfile
 from .period import PeriodRecord
 from .mood import DailyMood
-from .model import UserModel
+from .model import UserModel, ActiveModel
+from .prediction import DailyPrediction
+from .retrain_job import RetrainJob
+from .population import PopulationModel, UserCalibration
+from .cycle_stats import CycleStats
 
-__all__ = ["User", "UserProfile", "PeriodRecord", "DailyMood", "UserModel"]
+__all__ = ["User", "UserProfile", "PeriodRecord", "DailyMood", "UserModel", "ActiveModel", "DailyPrediction", "RetrainJob", "PopulationModel", "UserCalibration", "CycleStats"]
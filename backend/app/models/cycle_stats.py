@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, Float, DateTime, Date, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+
+class CycleStats(Base):
+    """
+    Running aggregates of a user's period starts and the cycle lengths between
+    them, kept in step with period writes by app.core.cycle_stats
+    """
+    __tablename__ = "cycle_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    # Aggregates
+    period_count = Column(Integer, nullable=False, default=0)
+    cycle_count = Column(Integer, nullable=False, default=0)  # period_count - 1, once there is a period
+    cycle_length_sum = Column(Integer, nullable=False, default=0)
+    cycle_length_sum_sq = Column(Integer, nullable=False, default=0)
+    min_cycle_length = Column(Integer)
+    max_cycle_length = Column(Integer)
+    last_period_start = Column(Date)
+    predicted_next_start = Column(Date)
+
+    # Exponentially weighted cycle length and variance, oldest cycle first; None before the first cycle
+    ewma_cycle_length = Column(Float)
+    ewma_cycle_variance = Column(Float)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    user = relationship("User", back_populates="cycle_stats")
+
+    def __repr__(self):
+        return f"<CycleStats(user_id={self.user_id}, period_count={self.period_count}, predicted_next_start={self.predicted_next_start})>"
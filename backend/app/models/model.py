@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Numeric, Float
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -15,6 +15,8 @@ class UserModel(Base):
     model_data = Column(LargeBinary)  # Serialized ML model
     accuracy_score = Column(Numeric(5, 4))
     model_version = Column(String(50), default="1.0")
+    blob_size_bytes = Column(Integer, nullable=True)  # len(model_data)
+    predict_latency_ms = Column(Float, nullable=True)  # One-day prediction with the decoded blob, measured at save
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -23,4 +25,25 @@ class UserModel(Base):
     user = relationship("User", back_populates="models")
 
     def __repr__(self):
-        return f"<UserModel(id={self.id}, user_id={self.user_id}, model_type='{self.model_type}', accuracy_score={self.accuracy_score})>"
\ No newline at end of file
+        return f"<UserModel(id={self.id}, user_id={self.user_id}, model_type='{self.model_type}', accuracy_score={self.accuracy_score})>"
+
+
+class ActiveModel(Base):
+    """
+    Registry pointer to the UserModel version in use for a (user, model type)
+    """
+    __tablename__ = "active_models"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    model_type = Column(String(50), primary_key=True)
+    model_id = Column(Integer, ForeignKey("user_models.id"), nullable=False)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    user = relationship("User", back_populates="active_models")
+    model = relationship("UserModel")
+
+    def __repr__(self):
+        return f"<ActiveModel(user_id={self.user_id}, model_type='{self.model_type}', model_id={self.model_id})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -6,6 +6,10 @@ from ..database import Base
 
 class DailyMood(Base):
     __tablename__ = "daily_moods"
+    __table_args__ = (
+        # Per-user history in date order: training data and the mood list
+        Index("ix_daily_moods_user_id_date", "user_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
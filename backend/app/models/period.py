@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -6,6 +6,10 @@ from ..database import Base
 
 class PeriodRecord(Base):
     __tablename__ = "period_records"
+    __table_args__ = (
+        # Period start lookups and the neighbour queries of cycle_stats updates
+        Index("ix_period_records_user_id_start_date", "user_id", "start_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
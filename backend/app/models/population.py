@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Numeric, Text, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+
+class PopulationModel(Base):
+    __tablename__ = "population_models"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Model data
+    model_type = Column(String(50), nullable=False)  # "energy", "mood" or "symptom"
+    model_data = Column(LargeBinary)  # Serialized model bundle with its class priors
+    accuracy_score = Column(Numeric(5, 4))
+    n_users = Column(Integer, nullable=False)
+    n_samples = Column(Integer, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<PopulationModel(id={self.id}, model_type='{self.model_type}', n_users={self.n_users})>"
+
+
+class UserCalibration(Base):
+    __tablename__ = "user_calibrations"
+    __table_args__ = (
+        UniqueConstraint("user_id", "model_type", name="uq_user_calibrations_user_type"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Calibration data
+    model_type = Column(String(50), nullable=False)
+    class_weights = Column(Text, nullable=False)  # JSON: label -> user prior / population prior
+    n_samples = Column(Integer, nullable=False)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    user = relationship("User", back_populates="calibrations")
+
+    def __repr__(self):
+        return f"<UserCalibration(user_id={self.user_id}, model_type='{self.model_type}', n_samples={self.n_samples})>"
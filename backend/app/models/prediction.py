@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Numeric, Text, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+
+class DailyPrediction(Base):
+    __tablename__ = "daily_predictions"
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", "model_version", name="uq_daily_predictions_user_date_version"),
+        Index("ix_daily_predictions_user_date", "user_id", "date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Prediction key
+    date = Column(Date, nullable=False)
+    model_version = Column(String(50), nullable=False)  # Ids of the energy/mood/symptom models used
+    computed_on = Column(Date, nullable=False)  # next_period_in_days is relative to this day
+    data_version = Column(Integer, nullable=True)  # users.data_version the refresh read before predicting
+
+    # Prediction data
+    day_of_cycle = Column(Integer, nullable=False)
+    cycle_phase = Column(String(20), nullable=False)
+    predicted_energy_level = Column(String(10), nullable=True)
+    predicted_mood = Column(String, nullable=True)
+    predicted_symptoms = Column(Text, nullable=True)  # JSON list
+    next_period_in_days = Column(Integer, nullable=True)
+    next_period_earliest_in_days = Column(Integer, nullable=True)
+    next_period_latest_in_days = Column(Integer, nullable=True)
+    confidence_score = Column(Numeric(5, 4), nullable=True)
+    score = Column(Integer, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    user = relationship("User", back_populates="daily_predictions")
+
+    def __repr__(self):
+        return f"<DailyPrediction(id={self.id}, user_id={self.user_id}, date={self.date}, model_version='{self.model_version}')>"
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, text
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+
+class RetrainJob(Base):
+    __tablename__ = "retrain_jobs"
+    __table_args__ = (
+        Index("ix_retrain_jobs_status_created_at", "status", "created_at"),
+        # At most one pending job per user: duplicate requests coalesce into it
+        Index(
+            "uq_retrain_jobs_user_pending", "user_id",
+            unique=True,
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Job state
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, succeeded, failed
+    progress = Column(Integer, nullable=False, default=0)  # Percent of models trained
+    current_step = Column(String(50), nullable=True)  # Comma-separated models still training while running
+    results = Column(Text, nullable=True)  # JSON: model name -> status message
+    timings = Column(Text, nullable=True)  # JSON: model name -> wall time in seconds
+    error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    run_after = Column(DateTime(timezone=True), nullable=True)  # Debounced jobs wait until then; None runs as soon as possible
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    user = relationship("User", back_populates="retrain_jobs")
+
+    def __repr__(self):
+        return f"<RetrainJob(id={self.id}, user_id={self.user_id}, status='{self.status}', progress={self.progress})>"
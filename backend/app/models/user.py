@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -12,6 +12,8 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
     name = Column(String(255))
     is_active = Column(Boolean, default=True)
+    data_version = Column(Integer, nullable=False, default=0, server_default=text("0"))  # Bumped on every data or model write
+    mood_writes_since_retrain = Column(Integer, nullable=False, default=0, server_default=text("0"))  # Reset when a retrain starts
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -20,6 +22,11 @@ class User(Base):
     periods = relationship("PeriodRecord", back_populates="user", cascade="all, delete-orphan")
     moods = relationship("DailyMood", back_populates="user", cascade="all, delete-orphan")
     models = relationship("UserModel", back_populates="user", cascade="all, delete-orphan")
+    active_models = relationship("ActiveModel", back_populates="user", cascade="all, delete-orphan")
+    daily_predictions = relationship("DailyPrediction", back_populates="user", cascade="all, delete-orphan")
+    retrain_jobs = relationship("RetrainJob", back_populates="user", cascade="all, delete-orphan")
+    calibrations = relationship("UserCalibration", back_populates="user", cascade="all, delete-orphan")
+    cycle_stats = relationship("CycleStats", back_populates="user", uselist=False, cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<User(id={self.id}, email='{self.email}', name='{self.name}')>"
@@ -10,4 +10,8 @@ class DailyPlan(BaseModel):
     score: int
 
 class SevenDayPlanResponse(BaseModel):
-    plan: list[DailyPlan]
\ No newline at end of file
+    plan: list[DailyPlan]
+
+class PlanResponse(BaseModel):
+    days: int
+    plan: list[DailyPlan]
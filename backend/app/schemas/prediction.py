@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import date
 from typing import Optional
 
 
@@ -9,4 +10,17 @@ class PredictionResponse(BaseModel):
     predicted_mood: Optional[str] = None
     predicted_symptoms: Optional[list[str]] = None
     confidence_score: Optional[float] = None
-    next_period_in_days: Optional[int] = None
\ No newline at end of file
+    next_period_in_days: Optional[int] = None
+    next_period_earliest_in_days: Optional[int] = None
+    next_period_latest_in_days: Optional[int] = None
+
+
+class CalendarResponse(BaseModel):
+    """One list per field, entry i describing start + i days"""
+    start: date
+    end: date
+    phase_names: list[str]
+    day_of_cycle: list[Optional[int]]
+    cycle_phase: list[Optional[int]]  # Index into phase_names
+    predicted_period: list[bool]
+    fertile: list[bool]
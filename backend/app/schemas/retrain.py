@@ -0,0 +1,27 @@
+import json
+from pydantic import BaseModel, field_validator
+from typing import Dict, Optional
+from datetime import datetime
+
+
+class RetrainJobResponse(BaseModel):
+    id: int
+    status: str  # "pending", "running", "succeeded", "failed"
+    progress: int  # Percent of models trained
+    current_step: Optional[str] = None
+    results: Optional[Dict[str, str]] = None
+    timings: Optional[Dict[str, float]] = None  # Seconds per model
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    run_after: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @field_validator("results", "timings", mode="before")
+    @classmethod
+    def parse_json(cls, value):
+        # Stored as JSON text on the job row
+        return json.loads(value) if isinstance(value, str) else value
+
+    class Config:
+        from_attributes = True
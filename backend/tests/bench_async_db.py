@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark: sync Session vs AsyncSession inside async handlers
+
+Runs the same mood-history query the /moods route issues, from many concurrent
+coroutines, once through a blocking SessionLocal-style session (the old routes)
+and once through an AsyncSession (the ported routes), and prints requests/second.
+
+Usage: python3 bench_async_db.py [--database-url URL] [--requests N] [--concurrency C]
+The database is seeded with throwaway users; by default a temporary SQLite file is used.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, get_async_database_url
+from app.models import User, DailyMood
+
+USERS = 50
+MOODS_PER_USER = 200
+
+
+def seed(database_url):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(0)
+    today = date.today()
+    user_ids = []
+    for i in range(USERS):
+        user = User(email=f"bench{i}@example.com", password_hash="x", name=f"Bench {i}")
+        db.add(user)
+        db.flush()
+        user_ids.append(user.id)
+        db.add_all([
+            DailyMood(user_id=user.id, date=today - timedelta(days=d), energy_level=rng.randint(0, 2))
+            for d in range(MOODS_PER_USER)
+        ])
+    db.commit()
+    db.close()
+    engine.dispose()
+    return user_ids
+
+
+def mood_history_query(user_id):
+    return select(DailyMood).where(DailyMood.user_id == user_id).order_by(DailyMood.date.desc()).limit(100)
+
+
+async def run(handler, user_ids, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await handler(user_ids[i % len(user_ids)])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    print(f"📊 Seeding {USERS} users x {MOODS_PER_USER} moods into {database_url}")
+    user_ids = seed(database_url)
+
+    sync_engine = create_engine(database_url, pool_size=args.concurrency)
+    SyncSession = sessionmaker(bind=sync_engine)
+    async_engine = create_async_engine(get_async_database_url(database_url), pool_size=args.concurrency)
+    AsyncSessionFactory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def sync_session_handler(user_id):
+        # What the routes did before: a blocking call inside `async def`
+        db = SyncSession()
+        try:
+            db.scalars(mood_history_query(user_id)).all()
+        finally:
+            db.close()
+
+    async def async_session_handler(user_id):
+        async with AsyncSessionFactory() as db:
+            (await db.scalars(mood_history_query(user_id))).all()
+
+    # Warm both pools before timing
+    await run(sync_session_handler, user_ids, args.concurrency, args.concurrency)
+    await run(async_session_handler, user_ids, args.concurrency, args.concurrency)
+
+    sync_rps = await run(sync_session_handler, user_ids, args.requests, args.concurrency)
+    async_rps = await run(async_session_handler, user_ids, args.requests, args.concurrency)
+
+    print(f"   sync Session in async handler: {sync_rps:8.0f} req/s")
+    print(f"   AsyncSession:                  {async_rps:8.0f} req/s")
+    print(f"   speedup:                       {async_rps / sync_rps:8.2f}x")
+
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Model format benchmark: pickle vs the compact format
+
+Trains the energy, mood and symptom models of one synthetic user, stores each
+as a pickle and as a compact blob, and compares blob size, load time (from
+bytes, and from an mmap'd file for the compact format) and prediction latency
+for one day and for a 30-day plan.
+
+Usage: python3 bench_model_format.py [--mood-days N] [--repeat N]
+"""
+
+import argparse
+import mmap
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from conftest import seed_user
+from app.database import Base
+from app.core.ml_model import train_model, prepare_training_data
+from app.core.mood_predictor_ml import train_mood_model, prepare_mood_training_data
+from app.core.symptom_predictor_ml import train_symptom_model, prepare_symptom_training_data
+from app.core.model_format import export_model, load_compact_model
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pickle vs compact model format")
+    parser.add_argument("--mood-days", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user_id = seed_user(db, mood_days=args.mood_days)
+
+    symptom_model, _, mlb = train_symptom_model(user_id, db)
+    models = {
+        "energy": (train_model(user_id, db)[0], prepare_training_data(user_id, db)),
+        "mood": (train_mood_model(user_id, db)[0], prepare_mood_training_data(user_id, db)),
+        "symptom": ({"model": symptom_model, "mlb": mlb}, prepare_symptom_training_data(user_id, db)),
+    }
+
+    print(f"   {'model':9}{'format':9}{'size':>10}{'load':>10}{'1 day':>10}{'30 days':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (model, df) in models.items():
+            pickled, compact = pickle.dumps(model), export_model(model)
+            path = os.path.join(directory, name)
+            with open(path, "wb") as f:
+                f.write(compact)
+
+            def load_mmap():
+                with open(path, "rb") as f:
+                    return load_compact_model(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+            for label, blob, load in (
+                ("pickle", pickled, lambda: pickle.loads(pickled)),
+                ("compact", compact, lambda: load_compact_model(compact)),
+                ("mmap", compact, load_mmap),
+            ):
+                loaded = load()
+                estimator = loaded["model"] if isinstance(loaded, dict) else loaded
+                one_day, month = df.head(1), df.head(30)
+                print(
+                    f"   {name:9}{label:9}{len(blob) / 1024:>8.0f}KB"
+                    f"{best_ms(load, args.repeat):>8.2f}ms"
+                    f"{best_ms(lambda: estimator.predict(one_day), args.repeat):>8.2f}ms"
+                    f"{best_ms(lambda: estimator.predict(month), args.repeat):>8.2f}ms"
+                )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
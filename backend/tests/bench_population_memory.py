@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: per-user forests vs one population model with calibration
+
+Trains both approaches on a sample of synthetic users, measures serialized
+size and the memory taken by the deserialized models, and extrapolates to
+10,000 users.
+
+Usage: python3 bench_population_memory.py [--users N]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from conftest import seed_user
+from app.database import Base
+from app.core.ml_model import train_model
+from app.core.mood_predictor_ml import train_mood_model
+from app.core.symptom_predictor_ml import train_symptom_model
+from app.core.population_model import build_population_frame, train_population_models, load_user_calibrations
+from app.models import PopulationModel
+
+TARGET_USERS = 10_000
+
+
+def loaded_bytes(blobs):
+    """Python heap taken by unpickling the blobs and keeping the objects alive"""
+    tracemalloc.start()
+    objects = [pickle.loads(blob) for blob in blobs]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size
+
+
+def mb(n):
+    return f"{n / 1024 / 1024:10.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-user vs population model memory")
+    parser.add_argument("--users", type=int, default=20, help="sample size to extrapolate from")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user_ids = [seed_user(db, email=f"bench{i}@example.com", seed=i) for i in range(args.users)]
+    print(f"📊 {args.users} sample users, extrapolated to {TARGET_USERS:,}")
+
+    # Per-user approach: three pickled forests per user
+    per_user_blobs = []
+    for user_id in user_ids:
+        model, _ = train_model(user_id, db)
+        mood_model, _ = train_mood_model(user_id, db)
+        symptom_model, _, mlb = train_symptom_model(user_id, db)
+        per_user_blobs += [pickle.dumps(model), pickle.dumps(mood_model), pickle.dumps({"model": symptom_model, "mlb": mlb})]
+    per_user_stored = sum(map(len, per_user_blobs)) / args.users * TARGET_USERS
+    per_user_resident = loaded_bytes(per_user_blobs) / args.users * TARGET_USERS
+
+    # Population approach: three shared bundles plus a calibration row per user and model
+    train_population_models(db)
+    population_blobs = [record.model_data for record in db.query(PopulationModel).all()]
+    calibration_rows = [json.dumps(load_user_calibrations(user_id, db)).encode() for user_id in user_ids]
+    tracemalloc.start()
+    calibrations = [json.loads(row) for row in calibration_rows]
+    calibration_resident, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del calibrations
+
+    population_stored = sum(map(len, population_blobs)) + sum(map(len, calibration_rows)) / args.users * TARGET_USERS
+    population_resident = loaded_bytes(population_blobs) + calibration_resident / args.users * TARGET_USERS
+
+    print(f"   {'':28}{'stored':>13}{'in memory':>13}")
+    print(f"   {'per-user forests':28}{mb(per_user_stored)}   {mb(per_user_resident)}")
+    print(f"   {'population + calibration':28}{mb(population_stored)}   {mb(population_resident)}")
+    print(f"   population training rows: {len(build_population_frame(db)):,}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
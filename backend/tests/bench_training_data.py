@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Training data benchmark: ORM row loop vs column-projected queries
+
+Seeds one user with N mood rows and times building the energy, mood and
+symptom training frames the old way (full DailyMood objects, a dict per row,
+BMI recomputed per row) against the current prepare_* functions.
+
+Usage: python3 bench_training_data.py [--rows 1000 10000 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pandas as pd
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import User, UserProfile, DailyMood
+from app.core.ml_model import compute_bmi, prepare_training_data
+from app.core.mood_predictor_ml import prepare_mood_training_data
+from app.core.symptom_predictor_ml import prepare_symptom_training_data
+
+MOODS = ["Happy", "Calm", "Sad", "Anxious", "Irritated"]
+SYMPTOMS = ["Cramps", "Headache", "Bloating", "Fatigue", None]
+
+
+def seed(db, rows):
+    rng = random.Random(0)
+    user = User(email="bench@example.com", password_hash="x", name="Bench")
+    db.add(user)
+    db.flush()
+    start = date.today() - timedelta(days=rows)
+    db.add(UserProfile(
+        user_id=user.id, height_cm=165, weight_kg=60.0, cycle_length=28, luteal_length=14,
+        menses_length=5, unusual_bleeding=False, number_of_peak=1, period_regularity="regular",
+        period_description="usual", last_period_start=start, last_period_end=start + timedelta(days=5),
+    ))
+    db.execute(insert(DailyMood), [
+        {
+            "user_id": user.id, "date": start + timedelta(days=i), "day_of_cycle": i % 28 + 1,
+            "energy_level": rng.randint(0, 2), "mood": rng.choice(MOODS), "symptoms": rng.choice(SYMPTOMS),
+            "notes": "Slept badly, long day at work, skipped the gym" * 4,
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+    return user.id
+
+
+def legacy_frames(user_id, db):
+    """The row-by-row preparation the prepare_* functions replaced"""
+    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+    moods = db.query(DailyMood).filter(
+        DailyMood.user_id == user_id, DailyMood.day_of_cycle.isnot(None)
+    ).order_by(DailyMood.date).all()
+
+    energy = []
+    for i, mood in enumerate(moods[3:], start=3):
+        energy.append({
+            'mood_id': int(mood.id), 'day_of_cycle': int(mood.day_of_cycle),
+            'Length_of_cycle': int(profile.cycle_length), 'Length_of_Leutal_Phase': int(profile.luteal_length),
+            'Length_of_menses': int(profile.menses_length), 'number_of_peak': int(profile.number_of_peak),
+            'BMI': float(compute_bmi(profile.height_cm, profile.weight_kg)),
+            'Unusual_Bleeding': bool(profile.unusual_bleeding), 'energy_level': int(mood.energy_level),
+            'energy_lag_1': int(moods[i - 1].energy_level), 'energy_lag_2': int(moods[i - 2].energy_level),
+            'energy_lag_3': int(moods[i - 3].energy_level),
+        })
+    mood_rows, symptom_rows = [], []
+    for mood in moods:
+        base = {
+            'day_of_cycle': int(mood.day_of_cycle), 'cycle_length': int(profile.cycle_length),
+            'luteal_length': int(profile.luteal_length),
+            'bmi': float(compute_bmi(profile.height_cm, profile.weight_kg)),
+        }
+        if mood.mood is not None:
+            mood_rows.append({**base, 'mood': mood.mood})
+        symptom_rows.append({**base, 'symptoms': [mood.symptoms] if mood.symptoms else []})
+    return pd.DataFrame(energy), pd.DataFrame(mood_rows), pd.DataFrame(symptom_rows)
+
+
+def current_frames(user_id, db):
+    return (
+        prepare_training_data(user_id, db),
+        prepare_mood_training_data(user_id, db),
+        prepare_symptom_training_data(user_id, db),
+    )
+
+
+def best_of(fn, user_id, db, repeat):
+    times = []
+    for _ in range(repeat):
+        db.expunge_all()  # no identity-map hits between runs
+        started = time.perf_counter()
+        frames = fn(user_id, db)
+        times.append(time.perf_counter() - started)
+    return min(times), frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training data preparation benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"   {'rows':>8}{'row loop':>12}{'projected':>12}{'speedup':>10}")
+    for rows in args.rows:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        user_id = seed(db, rows)
+
+        legacy_time, legacy = best_of(legacy_frames, user_id, db, args.repeat)
+        current_time, current = best_of(current_frames, user_id, db, args.repeat)
+        for old, new in zip(legacy, current):
+            pd.testing.assert_frame_equal(old, new)
+
+        print(f"   {rows:>8,}{legacy_time * 1000:>10.1f}ms{current_time * 1000:>10.1f}ms{legacy_time / current_time:>9.1f}x")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
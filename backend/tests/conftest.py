@@ -0,0 +1,143 @@
+"""
+Shared fixtures for tests that run against a throwaway SQLite database
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.models import User, UserProfile, PeriodRecord, DailyMood
+
+MOOD_CHOICES = ["Happy", "Calm", "Sad", "Anxious", "Irritated"]
+SYMPTOM_CHOICES = ["Cramps", "Headache", "Bloating", "Fatigue", None]
+
+
+@pytest.fixture(autouse=True)
+def clear_model_cache():
+    """Model ids and data versions repeat across test databases, so never share cached models or cycle indexes between tests"""
+    from app.core.model_cache import model_cache
+    from app.core.cycle_index import cycle_index_cache
+    model_cache.clear()
+    cycle_index_cache.clear()
+    yield
+    model_cache.clear()
+    cycle_index_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def inline_ml_work(monkeypatch):
+    """Pool processes would open settings.database_url, not the test database"""
+    from app.config import settings
+    monkeypatch.setattr(settings, "ml_process_pool_workers", 0)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A file rather than :memory:, so sync and async engines can share it"""
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def db(db_path):
+    """Fresh database session per test"""
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def async_db_override(db, db_path):
+    """Replacement for the get_async_db dependency, bound to the test database"""
+    # NullPool: TestClient runs the app on its own event loop, so connections must not be reused
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    async def get_test_async_db():
+        async with session_factory() as session:
+            yield session
+
+    return get_test_async_db
+
+
+def seed_user(db, email="seed@example.com", seed=7, mood_days=90):
+    """Add a user with a profile, six periods and `mood_days` days of mood logs"""
+    rng = random.Random(seed)
+    today = date.today()
+
+    user = User(email=email, password_hash="x", name="Seed")
+    db.add(user)
+    db.commit()
+
+    first_start = today - timedelta(days=150)
+    db.add(UserProfile(
+        user_id=user.id,
+        height_cm=165,
+        weight_kg=60.0,
+        cycle_length=28,
+        luteal_length=14,
+        menses_length=5,
+        unusual_bleeding=False,
+        number_of_peak=1,
+        period_regularity="regular",
+        period_description="usual",
+        last_period_start=first_start,
+        last_period_end=first_start + timedelta(days=5),
+    ))
+
+    starts = [first_start + timedelta(days=28 * i + rng.randint(-1, 1)) for i in range(6)]
+    for start in starts:
+        db.add(PeriodRecord(user_id=user.id, start_date=start, end_date=start + timedelta(days=5)))
+
+    for i in range(mood_days):
+        mood_date = today - timedelta(days=mood_days - i)
+        day_of_cycle = (mood_date - max(s for s in starts if s <= mood_date)).days + 1
+        db.add(DailyMood(
+            user_id=user.id,
+            date=mood_date,
+            day_of_cycle=day_of_cycle,
+            energy_level=rng.randint(0, 2),
+            mood=rng.choice(MOOD_CHOICES),
+            symptoms=rng.choice(SYMPTOM_CHOICES),
+        ))
+
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def seeded_user(db):
+    """A user with a profile, six periods and 90 days of mood logs"""
+    return seed_user(db)
+
+
+@pytest.fixture
+def trained_user(db, seeded_user):
+    """The seeded user with energy, mood and symptom models trained and saved"""
+    from app.core.ml_model import train_model, save_model
+    from app.core.mood_predictor_ml import train_mood_model, save_mood_model
+    from app.core.symptom_predictor_ml import train_symptom_model, save_symptom_model
+
+    model, accuracy = train_model(seeded_user, db)
+    save_model(seeded_user, model, accuracy, db)
+
+    mood_model, mood_accuracy = train_mood_model(seeded_user, db)
+    save_mood_model(seeded_user, mood_model, mood_accuracy, db)
+
+    symptom_model, symptom_accuracy, mlb = train_symptom_model(seeded_user, db)
+    save_symptom_model(seeded_user, symptom_model, mlb, symptom_accuracy, db)
+
+    return seeded_user
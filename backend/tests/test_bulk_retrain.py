@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test bulk retraining and resuming from its checkpoint
+"""
+
+import json
+
+import pytest
+
+from app.core.bulk_retrain import bulk_retrain, iter_user_id_chunks, load_checkpoint
+from app.core.ml_model import load_model
+from conftest import seed_user
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_interrupted_run_resumes(db, seeded_user, tmp_path):
+    """A run stopped after one user retrains only the other on resume"""
+    print("🧪 Testing bulk retrain...")
+    other_user = seed_user(db, email="other@example.com", seed=3)
+    checkpoint = str(tmp_path / "retrain.jsonl")
+    assert list(iter_user_id_chunks(db, 1)) == [[seeded_user], [other_user]]
+
+    def interrupt(stats):
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        bulk_retrain(db, checkpoint, workers=0, chunk_size=1, on_progress=interrupt)
+    assert load_checkpoint(checkpoint) == {seeded_user}
+    assert load_model(seeded_user, db) is not None
+    assert load_model(other_user, db) is None
+
+    stats = bulk_retrain(db, checkpoint, workers=0, chunk_size=1)
+    assert (stats["users"], stats["skipped"], stats["failed"]) == (1, 1, 0)
+    assert stats["users_per_second"] > 0 and stats["cpu_seconds_per_user"] > 0
+    assert load_checkpoint(checkpoint) == {seeded_user, other_user}
+    assert load_model(other_user, db) is not None
+    print("✅ Resumed after the checkpointed user")
+
+
+def test_checkpoint_retries_failures(tmp_path):
+    """Failed users and a line cut short by an interrupted write are not done"""
+    path = tmp_path / "retrain.jsonl"
+    path.write_text(
+        json.dumps({"user_id": 1, "results": {}}) + "\n"
+        + json.dumps({"user_id": 2, "error": "boom"}) + "\n"
+        + '{"user_id": 3, "res'
+    )
+    assert load_checkpoint(str(path)) == {1}
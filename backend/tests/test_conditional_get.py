@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test ETag / If-None-Match handling on the prediction endpoints
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import get_async_db
+from app.core.security import get_current_active_user
+from app.core.response_cache import response_cache, bump_data_version
+from app.models import User
+
+
+@pytest.fixture
+def client(db, seeded_user, async_db_override):
+    user = db.query(User).filter(User.id == seeded_user).first()
+    app.dependency_overrides[get_async_db] = async_db_override
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    response_cache.clear()
+    # No lifespan: the prediction scheduler must not start against the dev database
+    yield TestClient(app), user
+    app.dependency_overrides.clear()
+    response_cache.clear()
+
+
+@pytest.mark.parametrize("path", ["/predictions/current", "/predictions/7-day-plan", "/predictions/model-status"])
+def test_not_modified_until_data_changes(db, client, path):
+    """Same data version -> 304, new data version -> new ETag and body"""
+    print(f"🧪 Testing conditional GET on {path}...")
+    client, user = client
+
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = client.get(path)
+    assert cached.content == first.content
+    assert response_cache.stats()["hits"] >= 1
+
+    not_modified = client.get(path, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    bump_data_version(user.id, db)
+    db.commit()
+    db.refresh(user)
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    print("✅ 304 until the user's data version changes")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test the columnar calendar against the per-date cycle functions
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import get_async_db
+from app.core.security import get_current_active_user
+from app.core.cycle_calculator import (
+    calculate_cycle_phase, calculate_day_of_cycle, calculate_next_period_date, get_cycle_calendar
+)
+from app.models import User, UserProfile, PeriodRecord
+
+
+def test_calendar_matches_per_date_calls(db, seeded_user):
+    """A year around today: every day of cycle and phase as the per-date functions give them"""
+    print("🧪 Testing cycle calendar...")
+    profile = db.query(UserProfile).filter(UserProfile.user_id == seeded_user).first()
+    start, end = date.today() - timedelta(days=200), date.today() + timedelta(days=165)
+    calendar = get_cycle_calendar(seeded_user, start, end, db)
+
+    assert len(calendar["day_of_cycle"]) == len(calendar["fertile"]) == 366
+    for offset, (day_of_cycle, phase) in enumerate(zip(calendar["day_of_cycle"], calendar["cycle_phase"])):
+        expected = calculate_day_of_cycle(seeded_user, start + timedelta(days=offset), db)
+        assert day_of_cycle == expected
+        assert calendar["phase_names"][phase] == calculate_cycle_phase(expected, profile.cycle_length, profile.luteal_length)
+    print("✅ Calendar matches calculate_day_of_cycle and calculate_cycle_phase")
+
+
+def test_predicted_period_and_fertile_days(db, seeded_user):
+    """Predicted periods start at the next-period prediction and repeat; each cycle has one fertile window"""
+    profile = db.query(UserProfile).filter(UserProfile.user_id == seeded_user).first()
+    next_start = calculate_next_period_date(seeded_user, db)
+    start, end = next_start - timedelta(days=40), next_start + timedelta(days=80)
+    calendar = get_cycle_calendar(seeded_user, start, end, db)
+
+    period_days = [start + timedelta(days=i) for i, flag in enumerate(calendar["predicted_period"]) if flag]
+    assert period_days[:profile.menses_length] == [next_start + timedelta(days=i) for i in range(profile.menses_length)]
+    assert next_start - timedelta(days=1) not in period_days
+    assert len(period_days) == 3 * profile.menses_length
+
+    fertile_days = [start + timedelta(days=i) for i, flag in enumerate(calendar["fertile"]) if flag]
+    ovulation = next_start + timedelta(days=profile.cycle_length - profile.luteal_length - 2)
+    assert [day for day in fertile_days if next_start <= day < next_start + timedelta(days=profile.cycle_length)] == [
+        ovulation + timedelta(days=i) for i in range(-5, 2)
+    ]
+
+
+def test_calendar_without_periods(db, seeded_user):
+    """With no periods logged, days count from the profile's last start and nothing is predicted"""
+    today = date.today()
+    db.query(PeriodRecord).filter(PeriodRecord.user_id == seeded_user).delete()
+    db.query(UserProfile).filter(UserProfile.user_id == seeded_user).update({UserProfile.last_period_start: today})
+    db.commit()
+    calendar = get_cycle_calendar(seeded_user, today - timedelta(days=2), today + timedelta(days=1), db)
+    # Dates before it count back from it, as calculate_day_of_cycle does
+    assert calendar["day_of_cycle"] == [-1, 0, 1, 2]
+    assert calendar["cycle_phase"] == [0, 0, 0, 0]
+    assert not any(calendar["predicted_period"])
+
+
+@pytest.fixture
+def client(db, seeded_user, async_db_override):
+    user = db.query(User).filter(User.id == seeded_user).first()
+    app.dependency_overrides[get_async_db] = async_db_override
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_calendar_endpoint(client):
+    """One call covers up to a year; longer or reversed ranges are rejected"""
+    today = date.today()
+    response = client.get("/predictions/calendar", params={"start": today.isoformat(), "end": (today + timedelta(days=365)).isoformat()})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["start"] == today.isoformat()
+    assert len(body["day_of_cycle"]) == len(body["cycle_phase"]) == len(body["predicted_period"]) == 366
+
+    cached = client.get(
+        "/predictions/calendar", params={"start": today.isoformat(), "end": (today + timedelta(days=365)).isoformat()},
+        headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert cached.status_code == 304
+
+    too_long = client.get("/predictions/calendar", params={"start": today.isoformat(), "end": (today + timedelta(days=366)).isoformat()})
+    assert too_long.status_code == 400
+    reversed_range = client.get("/predictions/calendar", params={"start": today.isoformat(), "end": (today - timedelta(days=1)).isoformat()})
+    assert reversed_range.status_code == 400
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test the per-user cycle index against a linear scan of the period starts
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.core.cycle_calculator import calculate_cycle_phase
+from app.core.cycle_index import CycleIndex
+from app.core.data_events import record_user_data_change
+from app.core.user_context import UserContext
+from app.models import PeriodRecord
+
+STARTS = [date(2026, 1, 3), date(2026, 1, 31), date(2026, 3, 1)]
+FALLBACK = date(2025, 12, 5)
+
+
+def scan_day_of_cycle(target_date):
+    earlier = [start for start in STARTS if start <= target_date]
+    return (target_date - (earlier[-1] if earlier else FALLBACK)).days + 1
+
+
+def test_matches_a_linear_scan():
+    """Single and array lookups agree with the scan, before, on and after every start"""
+    index = CycleIndex(STARTS, FALLBACK, 28, 14)
+    target_dates = [date(2025, 12, 20) + timedelta(days=i) for i in range(120)]
+    expected = [scan_day_of_cycle(target_date) for target_date in target_dates]
+
+    assert [index.day_of_cycle(target_date) for target_date in target_dates] == expected
+    assert index.days_of_cycle(target_dates).tolist() == expected
+    assert index.phases(expected).tolist() == [calculate_cycle_phase(day, 28, 14) for day in expected]
+    assert index.phase(date(2026, 1, 3)) == "Menses"
+
+
+def test_no_period_before_the_date():
+    """No earlier start and no profile fallback is an error, as before"""
+    index = CycleIndex(STARTS, None, 28, 14)
+    assert index.days_of_cycle([date(2026, 1, 4)]).tolist() == [2]
+    with pytest.raises(ValueError):
+        index.day_of_cycle(date(2026, 1, 1))
+    with pytest.raises(ValueError):
+        index.days_of_cycle([date(2026, 1, 4), date(2026, 1, 1)])
+    assert CycleIndex([], FALLBACK, 28, 14).days_of_cycle([FALLBACK]).tolist() == [1]
+
+
+def test_period_write_invalidates(db, seeded_user):
+    """A new context after a period write sees the new start"""
+    print("🧪 Testing cycle index invalidation...")
+    today = date.today()
+    before = UserContext(seeded_user, db).cycle_index
+    assert UserContext(seeded_user, db).cycle_index is before
+
+    db.add(PeriodRecord(user_id=seeded_user, start_date=today, end_date=today + timedelta(days=5)))
+    record_user_data_change(db, seeded_user)
+    db.commit()
+
+    after = UserContext(seeded_user, db).cycle_index
+    assert after is not before
+    assert after.day_of_cycle(today) == 1
+    print("✅ Index rebuilt after the period write")
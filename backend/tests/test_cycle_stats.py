@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test the incrementally maintained cycle_stats aggregates
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import get_async_db
+from app.core.security import get_current_active_user
+from app.core.cycle_calculator import calculate_next_period_date, calculate_next_period_window, get_cycle_statistics
+from app.core.cycle_stats import STATS_FIELDS, check_cycle_stats, compute_cycle_stats, update_cycle_stats
+from app.core.mathematical_predictor import get_mathematical_prediction
+from app.models import User, PeriodRecord, CycleStats
+from test_user_context import count_queries
+
+
+def stored_matches_rebuild(db, user_id):
+    db.expire_all()
+    stored, computed = db.get(CycleStats, user_id), compute_cycle_stats(user_id, db)
+    return all(getattr(stored, field) == getattr(computed, field) for field in STATS_FIELDS)
+
+
+def test_random_writes_stay_consistent(db, seeded_user):
+    """Creates, deletes and start date edits in random order, each checked against a rebuild"""
+    print("🧪 Testing incremental cycle stats...")
+    rng = random.Random(11)
+    update_cycle_stats(db, seeded_user)
+    db.commit()
+    assert check_cycle_stats(db) == []
+
+    for _ in range(60):
+        periods = db.query(PeriodRecord).filter(PeriodRecord.user_id == seeded_user).all()
+        taken = {period.start_date for period in periods}
+        new_start = date(2026, 1, 1) + timedelta(days=rng.randint(-400, 100))
+        operation = rng.choice(["create", "delete", "edit"]) if periods else "create"
+        if new_start in taken and operation != "delete":
+            continue
+
+        if operation == "create":
+            db.add(PeriodRecord(user_id=seeded_user, start_date=new_start))
+            update_cycle_stats(db, seeded_user, added=new_start)
+        elif operation == "delete":
+            period = rng.choice(periods)
+            db.delete(period)
+            update_cycle_stats(db, seeded_user, removed=period.start_date)
+        else:
+            period = rng.choice(periods)
+            previous_start, period.start_date = period.start_date, new_start
+            update_cycle_stats(db, seeded_user, removed=previous_start, added=new_start)
+        db.commit()
+        assert stored_matches_rebuild(db, seeded_user), operation
+
+    assert check_cycle_stats(db) == []
+    print("✅ Aggregates match a rebuild after every write")
+
+
+def test_checker_rebuilds_drift(db, seeded_user):
+    """Missing or wrong rows are reported, and fixed on request"""
+    assert check_cycle_stats(db) == [seeded_user]
+    assert check_cycle_stats(db, fix=True) == [seeded_user]
+
+    db.get(CycleStats, seeded_user).max_cycle_length = 99
+    db.commit()
+    assert check_cycle_stats(db, fix=True) == [seeded_user]
+    assert check_cycle_stats(db) == []
+
+
+def test_appends_update_the_ewma_without_a_scan(db, seeded_user):
+    """New latest periods fold into the EWMA in O(1), which follows a shift in cycle length"""
+    update_cycle_stats(db, seeded_user)
+    db.commit()
+    stats = db.get(CycleStats, seeded_user)
+
+    for _ in range(4):
+        new_start = stats.last_period_start + timedelta(days=35)
+        db.add(PeriodRecord(user_id=seeded_user, start_date=new_start))
+        with count_queries(db) as statements:
+            update_cycle_stats(db, seeded_user, added=new_start)
+        assert not [s for s in statements if "FROM period_records" in s and "ORDER BY" in s]
+        db.commit()
+        assert stored_matches_rebuild(db, seeded_user)
+
+    # Recent 35-day cycles outweigh the earlier ~28-day ones the plain mean still leans on
+    stats = db.get(CycleStats, seeded_user)
+    plain_mean = stats.cycle_length_sum / stats.cycle_count
+    assert plain_mean < stats.ewma_cycle_length < 35
+    assert stats.predicted_next_start == stats.last_period_start + timedelta(days=round(stats.ewma_cycle_length))
+
+
+def test_next_period_window(db, seeded_user):
+    """The window brackets the prediction and widens with irregular cycles"""
+    update_cycle_stats(db, seeded_user)
+    db.commit()
+    predicted, earliest, latest = calculate_next_period_window(seeded_user, db)
+    assert predicted == (calculate_next_period_date(seeded_user, db) - date.today()).days
+    assert earliest <= predicted <= latest
+    regular_width = latest - earliest
+
+    stats = db.get(CycleStats, seeded_user)
+    for gap in (22, 38, 24):
+        new_start = stats.last_period_start + timedelta(days=gap)
+        db.add(PeriodRecord(user_id=seeded_user, start_date=new_start))
+        update_cycle_stats(db, seeded_user, added=new_start)
+        db.commit()
+    _, earliest, latest = calculate_next_period_window(seeded_user, db)
+    assert latest - earliest > regular_width
+
+    prediction = get_mathematical_prediction(seeded_user, date.today(), db)
+    assert (
+        prediction["next_period_earliest_in_days"], prediction["next_period_latest_in_days"]
+    ) == (earliest, latest)
+
+
+@pytest.fixture
+def client(db, seeded_user, async_db_override, monkeypatch):
+    user = db.query(User).filter(User.id == seeded_user).first()
+    # The prediction refresh task opens settings.database_url, not the test database
+    monkeypatch.setattr("app.api.periods.refresh_user_predictions_task", lambda user_id: None)
+    app.dependency_overrides[get_async_db] = async_db_override
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_period_endpoints_update_the_aggregates(db, seeded_user, client):
+    """The period handlers keep the row in step, and reads use it"""
+    today = date.today()
+    created = client.post("/periods/", json={"start_date": today.isoformat()})
+    assert created.status_code == 201
+    assert stored_matches_rebuild(db, seeded_user)
+
+    period_id = created.json()["id"]
+    edited = client.put(f"/periods/{period_id}", json={"start_date": (today - timedelta(days=2)).isoformat()})
+    assert edited.status_code == 200
+    assert stored_matches_rebuild(db, seeded_user)
+
+    stats = db.get(CycleStats, seeded_user)
+    assert stats.last_period_start == today - timedelta(days=2)
+    assert calculate_next_period_date(seeded_user, db) == stats.predicted_next_start
+    assert get_cycle_statistics(seeded_user, db)["total_periods"] == stats.period_count == 7
+
+    assert client.delete(f"/periods/{period_id}").status_code == 204
+    assert stored_matches_rebuild(db, seeded_user)
+    assert db.get(CycleStats, seeded_user).period_count == 6
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test offline forest tuning and the parameter file training reads
+"""
+
+import json
+
+from app.config import settings
+from app.core.forest_params import DEFAULT_FOREST_PARAMS, load_forest_params, write_forest_params
+from app.core.forest_tuning import pick_params, sample_users, tune_forest_params
+from app.core.ml_model import train_model
+
+SMALL_GRID = {"n_estimators": [25, 50], "max_depth": [6], "min_samples_leaf": [1, 3], "max_features": ["sqrt"]}
+
+
+def test_defaults_without_a_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ml_forest_params_path", str(tmp_path / "missing.json"))
+    assert load_forest_params("mood") == DEFAULT_FOREST_PARAMS["mood"]
+
+
+def test_pick_params_prefers_the_cheapest_within_tolerance(monkeypatch):
+    monkeypatch.setattr(settings, "ml_model_accuracy_tolerance", 0.02)
+    combinations = [{"n_estimators": 200}, {"n_estimators": 50}, {"n_estimators": 25}]
+    scores = {0: (0.80, 9000.0), 1: (0.79, 3000.0), 2: (0.70, 1000.0)}
+    assert pick_params(scores, combinations) == ({"n_estimators": 50}, 0.79, 3000.0)
+
+
+def test_tuned_params_reach_training(db, seeded_user, tmp_path, monkeypatch):
+    """Tune on the seeded user, write the file, and train with its forest"""
+    print("🧪 Testing forest tuning...")
+    path = tmp_path / "forest_params.json"
+    monkeypatch.setattr(settings, "ml_forest_params_path", str(path))
+    monkeypatch.setattr(settings, "ml_model_accuracy_tolerance", 1.0)
+
+    assert sample_users(db, 5) == [seeded_user]
+    results = tune_forest_params(db, [seeded_user], ["energy", "mood"], workers=0, grid=SMALL_GRID)
+    assert set(results) == {"energy", "mood"}
+    assert results["energy"]["users"] == 1
+    assert results["energy"]["params"]["n_estimators"] == 25
+
+    # Tuning one type keeps the other's entry
+    write_forest_params({"mood": results["mood"]})
+    write_forest_params({"energy": results["energy"]})
+    assert set(json.loads(path.read_text())) == {"energy", "mood"}
+    assert load_forest_params("energy") == results["energy"]["params"]
+    assert load_forest_params("symptom") == DEFAULT_FOREST_PARAMS["symptom"]
+
+    # The tuned forest is the full configuration the model budget starts from
+    monkeypatch.setattr(settings, "ml_model_accuracy_tolerance", -1.0)
+    model, _ = train_model(seeded_user, db)
+    classifier = model.named_steps["classifier"]
+    assert (classifier.n_estimators, classifier.max_depth) == (25, 6)
+    assert classifier.min_samples_leaf == results["energy"]["params"]["min_samples_leaf"]
+    print("✅ Tuned parameters used by training")
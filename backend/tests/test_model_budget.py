@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test forest selection under the model budget
+"""
+
+from app.config import settings
+from app.core.ml_model import train_model, save_model, load_model
+from app.core.model_budget import forest_candidates
+
+
+def forest_of(model):
+    classifier = model.named_steps["classifier"]
+    return classifier.n_estimators, classifier.max_depth
+
+
+def test_candidates_stay_below_the_caps():
+    assert list(forest_candidates(50, 10)) == [(25, 6), (25, 10), (50, 6)]
+    assert (200, None) not in forest_candidates(200, None)
+    assert all(trees <= 100 for trees, _ in forest_candidates(100, None))
+
+
+def test_tolerance_picks_the_forest(db, seeded_user, monkeypatch):
+    """Any loss allowed: the smallest forest; none allowed: the capped full forest"""
+    print("🧪 Testing forest selection...")
+    monkeypatch.setattr(settings, "ml_model_accuracy_tolerance", 1.0)
+    model, accuracy = train_model(seeded_user, db)
+    assert forest_of(model) == (25, 6)
+    assert 0.0 <= accuracy <= 1.0
+
+    monkeypatch.setattr(settings, "ml_model_accuracy_tolerance", -1.0)
+    monkeypatch.setattr(settings, "ml_model_max_trees", 50)
+    model, _ = train_model(seeded_user, db)
+    assert forest_of(model) == (50, None)
+    print("✅ Tolerance and caps respected")
+
+
+def test_blob_budget(db, seeded_user, monkeypatch):
+    """A forest over the byte budget is never chosen while a smaller one fits"""
+    monkeypatch.setattr(settings, "ml_model_accuracy_tolerance", -1.0)
+    monkeypatch.setattr(settings, "ml_model_max_blob_bytes", 60_000)
+    model, accuracy = train_model(seeded_user, db)
+    record = save_model(seeded_user, model, accuracy, db)
+    assert record.blob_size_bytes == len(load_model(seeded_user, db).model_data) <= 60_000
+    assert record.predict_latency_ms > 0
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test the in-process LRU cache of deserialized models
+"""
+
+from datetime import date
+
+from app.core.lru_cache import LRUCache
+from app.core.model_cache import model_cache
+from app.core.ml_model import make_prediction, train_model, save_model
+
+
+def test_lru_entry_and_byte_caps():
+    """Least recently used entries are evicted by either cap"""
+    print("🧪 Testing model cache eviction...")
+    cache = LRUCache(max_entries=2, max_bytes=100)
+    cache.put((1, "energy", 1), "a", 10)
+    cache.put((2, "energy", 2), "b", 10)
+    assert cache.get((1, "energy", 1)) == "a"
+
+    # Entry cap: key 2 is now least recently used
+    cache.put((3, "energy", 3), "c", 10)
+    assert cache.get((2, "energy", 2)) is None
+    assert cache.get((1, "energy", 1)) == "a"
+
+    # Byte cap: 10 + 85 fits, adding 10 more does not
+    cache.put((3, "energy", 3), "c", 85)
+    cache.put((4, "energy", 4), "d", 10)
+    assert cache.get((1, "energy", 1)) is None
+    assert cache.stats()["bytes"] <= 100
+
+    # Larger than the whole cache is never stored
+    cache.put((5, "energy", 5), "e", 101)
+    assert cache.get((5, "energy", 5)) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 3
+    print(f"✅ Eviction works: {stats}")
+
+
+def test_save_populates_and_invalidates(db, seeded_user):
+    """save_model writes through, so predictions never unpickle a fresh model"""
+    print("🧪 Testing model cache write-through...")
+    model, accuracy = train_model(seeded_user, db)
+    first = save_model(seeded_user, model, accuracy, db)
+
+    make_prediction(seeded_user, date.today(), db)
+    make_prediction(seeded_user, date.today(), db)
+    assert model_cache.stats()["misses"] == 0
+    assert model_cache.stats()["hits"] == 2
+
+    second = save_model(seeded_user, model, accuracy, db)
+    assert model_cache.get((seeded_user, "energy", first.id)) is None
+    assert model_cache.get((seeded_user, "energy", second.id)) is model
+    print("✅ Saving a model replaces the cached version")
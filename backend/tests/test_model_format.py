@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the compact model format
+"""
+
+import pickle
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.ml_model import train_model, prepare_training_data, save_model, load_model
+from app.core.mood_predictor_ml import train_mood_model, prepare_mood_training_data
+from app.core.symptom_predictor_ml import train_symptom_model, prepare_symptom_training_data
+from app.core.online_energy_model import OnlineEnergyModel
+from app.core.model_format import (
+    FORMAT_MAGIC, export_model, load_compact_model, serialize_model, deserialize_model,
+)
+
+
+def random_rows(df, columns, n=500):
+    """Inputs spread around and beyond the training range"""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        column: rng.uniform(float(df[column].min()) - 5, float(df[column].max()) + 5, n) for column in columns
+    })
+
+
+def test_forests_round_trip(db, seeded_user):
+    """Compact energy and mood models score exactly like the sklearn pipelines"""
+    print("🧪 Testing compact forests...")
+    energy_model, _ = train_model(seeded_user, db)
+    energy_df = prepare_training_data(seeded_user, db)
+    compact = load_compact_model(export_model(energy_model))
+    assert (compact.predict(energy_df) == energy_model.predict(energy_df)).all()
+    np.testing.assert_allclose(compact.predict_proba(energy_df), energy_model.predict_proba(energy_df))
+
+    mood_model, _ = train_mood_model(seeded_user, db)
+    mood_df = prepare_mood_training_data(seeded_user, db)
+    compact = load_compact_model(export_model(mood_model))
+    assert compact.columns == ['day_of_cycle', 'cycle_length', 'luteal_length', 'bmi']
+    assert (compact.predict(mood_df) == mood_model.predict(mood_df)).all()
+    rows = random_rows(mood_df, compact.columns)
+    assert (compact.predict(rows) == mood_model.predict(rows)).all()
+    print("✅ Same predictions as sklearn")
+
+
+def test_symptom_model_round_trip(db, seeded_user):
+    """One forest per symptom, with the binarizer rebuilt from the header"""
+    print("🧪 Testing compact symptom model...")
+    model, _, mlb = train_symptom_model(seeded_user, db)
+    df = prepare_symptom_training_data(seeded_user, db)
+    loaded = deserialize_model(serialize_model({"model": model, "mlb": mlb}))
+
+    assert list(loaded["mlb"].classes_) == list(mlb.classes_)
+    assert (loaded["model"].predict(df) == model.predict(df)).all()
+    assert loaded["mlb"].inverse_transform(loaded["model"].predict(df)) == mlb.inverse_transform(model.predict(df))
+    print("✅ Symptom labels match")
+
+
+def test_blob_is_compact_and_zero_copy(db, seeded_user):
+    """Saved forests use the compact format; loaded arrays are views of the blob"""
+    model, accuracy = train_model(seeded_user, db)
+    save_model(seeded_user, model, accuracy, db)
+    blob = load_model(seeded_user, db).model_data
+    assert blob.startswith(FORMAT_MAGIC)
+    assert len(blob) < len(pickle.dumps(model))
+
+    compact = load_compact_model(blob)
+    threshold = compact.forests[0].threshold
+    assert not threshold.flags.owndata and not threshold.flags.writeable
+
+
+def test_pickle_fallback_and_versioning():
+    """Other models stay pickled; unknown format versions are refused"""
+    online = OnlineEnergyModel()
+    assert isinstance(deserialize_model(serialize_model(online)), OnlineEnergyModel)
+
+    with pytest.raises(ValueError):
+        export_model(online)
+    with pytest.raises(ValueError):
+        load_compact_model(struct.pack("<4sHHI", FORMAT_MAGIC, 99, 0, 0))
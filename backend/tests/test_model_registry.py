@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test the model registry and version retention
+"""
+
+from app.config import settings
+from app.core.ml_model import train_model, save_model, load_model
+from app.core.model_registry import activate_model, prune_all_model_versions
+from app.core.prediction_store import get_model_version
+from app.models import UserModel, ActiveModel
+
+
+def test_save_activates_and_prunes(db, seeded_user, monkeypatch):
+    """Each save moves the pointer; only the newest versions are kept"""
+    print("🧪 Testing model registry...")
+    monkeypatch.setattr(settings, "ml_model_retention_versions", 2)
+    model, accuracy = train_model(seeded_user, db)
+    saved = [save_model(seeded_user, model, accuracy, db).id for _ in range(4)]
+
+    assert load_model(seeded_user, db).id == saved[-1]
+    kept = [row.id for row in db.query(UserModel.id).filter(UserModel.user_id == seeded_user).order_by(UserModel.id)]
+    assert kept == saved[-2:]
+    assert get_model_version(seeded_user, db) == f"e{saved[-1]}.m0.s0.p0"
+    print("✅ Pointer follows saves, old versions pruned")
+
+
+def test_rollback_keeps_the_active_version(db, seeded_user, monkeypatch):
+    """Re-activating an older version serves it, and pruning never removes it"""
+    model, accuracy = train_model(seeded_user, db)
+    first = save_model(seeded_user, model, accuracy, db)
+    second_id = save_model(seeded_user, model, accuracy, db).id
+
+    activate_model(first, db)
+    db.commit()
+    assert load_model(seeded_user, db).id == first.id
+
+    monkeypatch.setattr(settings, "ml_model_retention_versions", 1)
+    assert prune_all_model_versions(db) == 1
+    assert db.get(UserModel, second_id) is None
+    assert db.get(ActiveModel, (seeded_user, "energy")).model_id == first.id
+
+
+def test_status_reads_no_blobs(db, seeded_user):
+    """The active record is found without loading model_data"""
+    model, accuracy = train_model(seeded_user, db)
+    save_model(seeded_user, model, accuracy, db)
+    db.expunge_all()
+    record = load_model(seeded_user, db)
+    assert "model_data" not in record.__dict__
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test that period writes recompute the stored day_of_cycle of affected moods
+"""
+
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import get_async_db
+from app.core.security import get_current_active_user
+from app.core.cycle_calculator import recompute_mood_days_of_cycle
+from app.core.data_events import record_user_data_change
+from app.models import User, DailyMood, PeriodRecord
+
+
+def stored_days(db, user_id):
+    db.expire_all()
+    return {mood.date: mood.day_of_cycle for mood in db.query(DailyMood).filter(DailyMood.user_id == user_id)}
+
+
+def expected_days(db, user_id):
+    starts = sorted(row.start_date for row in db.query(PeriodRecord.start_date).filter(PeriodRecord.user_id == user_id))
+    return {
+        mood_date: (mood_date - max(start for start in starts if start <= mood_date)).days + 1
+        for mood_date in stored_days(db, user_id)
+    }
+
+
+def test_recompute_only_touches_the_window(db, seeded_user):
+    """A new start mid-cycle renumbers the moods from it to the next start, and only those"""
+    print("🧪 Testing day_of_cycle recompute...")
+    before = stored_days(db, seeded_user)
+    starts = sorted(row.start_date for row in db.query(PeriodRecord.start_date).filter(PeriodRecord.user_id == seeded_user))
+    new_start = starts[-2] + timedelta(days=10)
+
+    db.add(PeriodRecord(user_id=seeded_user, start_date=new_start))
+    record_user_data_change(db, seeded_user)
+    db.commit()
+    updated = recompute_mood_days_of_cycle(seeded_user, [new_start], db)
+    db.commit()
+
+    after = stored_days(db, seeded_user)
+    assert after == expected_days(db, seeded_user)
+    changed = {mood_date for mood_date in after if after[mood_date] != before[mood_date]}
+    assert updated == len(changed) > 0
+    assert all(new_start <= mood_date < starts[-1] for mood_date in changed)
+    print("✅ Only moods in the affected window were renumbered")
+
+
+@pytest.fixture
+def client(db, seeded_user, async_db_override, monkeypatch):
+    user = db.query(User).filter(User.id == seeded_user).first()
+
+    # Background work opens settings.database_url; run the recompute on the test database instead
+    def recompute_task(user_id, changed_starts):
+        recompute_mood_days_of_cycle(user_id, changed_starts, db)
+        db.commit()
+
+    monkeypatch.setattr("app.api.periods.recompute_mood_days_of_cycle_task", recompute_task)
+    monkeypatch.setattr("app.api.periods.refresh_user_predictions_task", lambda user_id: None)
+    monkeypatch.setattr("app.api.moods.refresh_user_predictions_task", lambda user_id: None)
+    app.dependency_overrides[get_async_db] = async_db_override
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_period_writes_keep_moods_current(db, seeded_user, client):
+    """Create, move and delete a period; the stored days always match the periods"""
+    latest_mood = max(stored_days(db, seeded_user))
+    start = latest_mood - timedelta(days=6)
+
+    period_id = client.post("/periods/", json={"start_date": start.isoformat()}).json()["id"]
+    assert stored_days(db, seeded_user)[latest_mood] == 7
+    assert stored_days(db, seeded_user) == expected_days(db, seeded_user)
+
+    moved = client.put(f"/periods/{period_id}", json={"start_date": (start - timedelta(days=2)).isoformat()})
+    assert moved.status_code == 200
+    assert stored_days(db, seeded_user)[latest_mood] == 9
+
+    assert client.delete(f"/periods/{period_id}").status_code == 204
+    assert stored_days(db, seeded_user) == expected_days(db, seeded_user)
+
+
+def test_mood_date_edit_recomputes_its_day(db, seeded_user, client):
+    """Moving a mood to another date stores that date's day of cycle"""
+    mood = db.query(DailyMood).filter(DailyMood.user_id == seeded_user).order_by(DailyMood.date).first()
+    new_date = min(stored_days(db, seeded_user)) - timedelta(days=1)
+    response = client.put(f"/moods/{mood.id}", json={"date": new_date.isoformat(), "energy_level": mood.energy_level})
+    assert response.status_code == 200
+    stored = stored_days(db, seeded_user)
+    assert stored[new_date] == expected_days(db, seeded_user)[new_date]
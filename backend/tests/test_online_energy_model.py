@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the incremental (online) energy model
+"""
+
+from datetime import date, timedelta
+
+from app.config import settings
+from app.core.ml_model import save_model, load_model
+from app.core.online_energy_model import ONLINE_ENERGY_MODEL_TYPE, OnlineEnergyModel, train_online_energy_model
+from app.core.predictor import Predictor
+from app.core.model_cache import get_cached_model
+from app.models import DailyMood
+
+
+def test_updates_fold_in_only_new_moods(db, seeded_user):
+    """Each update learns the rows logged since the saved model, and resumes its state"""
+    print("🧪 Testing online energy model updates...")
+    model, accuracy = train_online_energy_model(seeded_user, db)
+    assert isinstance(model, OnlineEnergyModel)
+    # The first batch is learned without being scored
+    assert accuracy is None and model.samples_scored == 0
+    first_seen = model.samples_seen
+    assert model.last_mood_id == db.query(DailyMood.id).order_by(DailyMood.id.desc()).first()[0]
+    save_model(seeded_user, model, accuracy, db, model_type=ONLINE_ENERGY_MODEL_TYPE)
+
+    # Nothing new: no update
+    assert train_online_energy_model(seeded_user, db) is None
+
+    today = date.today()
+    for i in range(5):
+        db.add(DailyMood(user_id=seeded_user, date=today + timedelta(days=i), day_of_cycle=i + 1, energy_level=i % 3))
+    db.commit()
+
+    updated, accuracy = train_online_energy_model(seeded_user, db)
+    assert updated.samples_seen == first_seen + 5
+    assert updated.samples_scored == 5 and 0.0 <= accuracy <= 1.0
+    # The saved model was resumed, not the cached instance mutated
+    saved = get_cached_model(load_model(seeded_user, db, model_type=ONLINE_ENERGY_MODEL_TYPE))
+    assert saved.samples_seen == first_seen
+    print("✅ Only new moods were learned")
+
+
+def test_predictor_serves_online_model(db, seeded_user, monkeypatch):
+    """With ml_energy_model_type = energy_online the predictor uses it"""
+    monkeypatch.setattr(settings, "ml_energy_model_type", ONLINE_ENERGY_MODEL_TYPE)
+    model, accuracy = train_online_energy_model(seeded_user, db)
+    save_model(seeded_user, model, accuracy, db, model_type=ONLINE_ENERGY_MODEL_TYPE)
+
+    prediction = Predictor(seeded_user, db).predict_one(date.today())
+    assert prediction["predicted_energy_level"] in {"low", "medium", "high"}
+
+
+def test_retrain_job_uses_online_model(db, seeded_user, monkeypatch):
+    """The retrain worker updates the online model instead of refitting a forest"""
+    from app.core.retrain_queue import retrain_user_models
+    monkeypatch.setattr(settings, "ml_energy_model_type", ONLINE_ENERGY_MODEL_TYPE)
+
+    assert retrain_user_models(seeded_user, db)["energy_model"].startswith("Updated")
+    assert retrain_user_models(seeded_user, db)["energy_model"] == "No new mood data since the last update."
+    assert load_model(seeded_user, db, model_type="energy") is None
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the shared population models and per-user calibration
+"""
+
+from datetime import date, timedelta
+
+from conftest import seed_user
+from app.config import settings
+from app.core.population_model import (
+    train_population_models, load_population_model, get_cached_population_model, load_user_calibrations,
+    compute_calibrations,
+)
+from app.core.predictor import Predictor
+from app.core.model_cache import model_cache
+from app.models import DailyMood, PopulationModel, User
+
+
+def test_population_serves_users_without_models(db):
+    """A new user with a few logs gets all three heads from the shared models"""
+    print("🧪 Testing population model serving...")
+    for i in range(4):
+        seed_user(db, email=f"pop{i}@example.com", seed=i)
+    newcomer = seed_user(db, email="new@example.com", seed=99, mood_days=5)
+
+    results = train_population_models(db)
+    assert results["energy_model"].startswith("Trained")
+    assert results["mood_model"].startswith("Trained")
+    assert results["symptom_model"].startswith("Trained")
+    assert db.query(PopulationModel).count() == 3
+
+    calibrations = load_user_calibrations(newcomer, db)
+    assert set(calibrations) == {"energy", "mood", "symptom"}
+    assert set(calibrations["energy"]) <= {"0", "1", "2"}
+
+    target_dates = [date.today() + timedelta(days=i) for i in range(3)]
+    predictions = Predictor(newcomer, db).predict(target_dates)
+    for prediction in predictions.values():
+        assert prediction["predicted_energy_level"] in {"low", "medium", "high"}
+        assert prediction["predicted_mood"] is not None
+        assert prediction["confidence_score"] is not None
+    print("✅ Newcomer served by the population models")
+
+
+def test_one_shared_model_in_memory(db, monkeypatch):
+    """With ml_model_scope = population every user hits the same cached object"""
+    monkeypatch.setattr(settings, "ml_model_scope", "population")
+    user_ids = [seed_user(db, email=f"shared{i}@example.com", seed=i) for i in range(3)]
+    train_population_models(db)
+    model_cache.clear()
+
+    for user_id in user_ids:
+        Predictor(user_id, db).predict([date.today()])
+    # Three population bundles, no per-user models
+    assert model_cache.stats()["entries"] == 3
+    assert model_cache.stats()["hits"] >= 2 * 3
+
+
+def test_calibration_shifts_towards_user_prior(db):
+    """A user who only ever logs high energy gets a larger weight for class 2"""
+    user_ids = [seed_user(db, email=f"cal{i}@example.com", seed=i) for i in range(3)]
+    db.query(DailyMood).filter(DailyMood.user_id == user_ids[0]).update({DailyMood.energy_level: 2})
+    db.commit()
+    train_population_models(db)
+
+    weights = load_user_calibrations(user_ids[0], db)["energy"]
+    assert weights["2"] > 1.0 > weights["0"]
+
+    bundle = get_cached_population_model(load_population_model("energy", db))
+    assert abs(sum(bundle["class_prior"]) - 1.0) < 1e-9
+
+
+def test_shared_model_writes_bump_data_versions(db):
+    """New population models and calibrations change the ETag of every user they serve"""
+    user_ids = [seed_user(db, email=f"ver{i}@example.com", seed=i) for i in range(2)]
+
+    def versions():
+        db.expire_all()
+        return [db.get(User, user_id).data_version for user_id in user_ids]
+
+    before = versions()
+    train_population_models(db)
+    after_training = versions()
+    assert all(new > old for new, old in zip(after_training, before))
+
+    compute_calibrations(db, user_ids=[user_ids[0]])
+    after_calibration = versions()
+    assert after_calibration[0] > after_training[0]
+    assert after_calibration[1] == after_training[1]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test the materialized daily_predictions table
+"""
+
+from datetime import date, timedelta
+
+from conftest import seed_user
+from test_user_context import count_queries
+from app.core import prediction_store
+from app.core.prediction_store import (
+    refresh_daily_predictions, get_fresh_predictions, invalidate_daily_predictions, get_model_version,
+    refresh_stale_predictions,
+)
+from app.config import settings
+from app.core.predictor import Predictor
+from app.core.seven_day_planner import generate_plan
+from app.core.ml_model import train_model, save_model
+from app.core.data_events import record_user_data_change
+
+
+def test_refresh_and_read(db, trained_user):
+    """Stored rows match live predictions and feed the planner"""
+    print("🧪 Testing daily prediction refresh...")
+    target_dates = [date.today() + timedelta(days=i) for i in range(7)]
+    live_plan = generate_plan(trained_user, db, days=7)
+
+    assert get_fresh_predictions(trained_user, target_dates, db) is None
+    assert refresh_daily_predictions(trained_user, db, days=7) == 7
+
+    stored = get_fresh_predictions(trained_user, target_dates, db)
+    live = Predictor(trained_user, db).predict(target_dates)
+    for target_date in target_dates:
+        stored_row = dict(stored[target_date])
+        stored_row.pop("score")
+        assert stored_row == live[target_date]
+
+    assert generate_plan(trained_user, db, days=7) == live_plan
+    print("✅ Stored predictions match live predictions")
+
+
+def test_stale_rows_are_not_served(db, trained_user):
+    """A retrain or a data write makes the stored window stale"""
+    print("🧪 Testing daily prediction freshness...")
+    target_dates = [date.today()]
+    refresh_daily_predictions(trained_user, db, days=1)
+    version = get_model_version(trained_user, db)
+    assert get_fresh_predictions(trained_user, target_dates, db) is not None
+
+    model, accuracy = train_model(trained_user, db)
+    save_model(trained_user, model, accuracy, db)
+    assert get_model_version(trained_user, db) != version
+    assert get_fresh_predictions(trained_user, target_dates, db) is None
+
+    refresh_daily_predictions(trained_user, db, days=1)
+    invalidate_daily_predictions(trained_user, db)
+    db.commit()
+    assert get_fresh_predictions(trained_user, target_dates, db) is None
+    print("✅ Stale predictions are ignored")
+
+
+def test_refresh_racing_a_write_is_not_served(db, trained_user, monkeypatch):
+    """A write committing while a refresh predicts leaves the refreshed rows stale"""
+    target_dates = [date.today()]
+    predict = Predictor.predict
+
+    def predict_then_write(self, dates):
+        predictions = predict(self, dates)
+        invalidate_daily_predictions(trained_user, db)
+        record_user_data_change(db, trained_user)
+        db.commit()
+        return predictions
+
+    monkeypatch.setattr(Predictor, "predict", predict_then_write)
+    assert refresh_daily_predictions(trained_user, db, days=1) == 1
+    assert get_fresh_predictions(trained_user, target_dates, db) is None
+
+    monkeypatch.setattr(Predictor, "predict", predict)
+    refresh_daily_predictions(trained_user, db, days=1)
+    assert get_fresh_predictions(trained_user, target_dates, db) is not None
+
+
+def test_sweep_survives_a_failing_user(db, monkeypatch):
+    """One user's refresh raising does not keep the others stale"""
+    user_ids = [seed_user(db, email=f"sweep{i}@example.com", seed=i, mood_days=10) for i in range(3)]
+    failing = user_ids[1]
+
+    def refresh(user_id, session, days=None):
+        if user_id == failing:
+            raise RuntimeError("model blob is corrupt")
+        return refresh_daily_predictions(user_id, session, days)
+
+    monkeypatch.setattr(prediction_store, "refresh_daily_predictions", refresh)
+    assert refresh_stale_predictions(db) == 2
+
+    target_dates = [date.today() + timedelta(days=i) for i in range(settings.prediction_refresh_days)]
+    assert get_fresh_predictions(failing, target_dates, db) is None
+    for user_id in (user_ids[0], user_ids[2]):
+        assert get_fresh_predictions(user_id, target_dates, db) is not None
+
+
+def test_refresh_locks_the_user_before_replacing_rows(db, trained_user):
+    """The user row is selected FOR UPDATE before the window is deleted (a no-op lock on SQLite)"""
+    with count_queries(db) as statements:
+        refresh_daily_predictions(trained_user, db, days=1)
+    lock = next(i for i, s in enumerate(statements) if s.startswith("SELECT users.id"))
+    delete = next(i for i, s in enumerate(statements) if s.startswith("DELETE FROM daily_predictions"))
+    assert lock < delete
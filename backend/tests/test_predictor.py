@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test that the unified Predictor matches the per-model prediction functions
+"""
+
+from datetime import date, timedelta
+
+from app.core.ml_model import make_prediction
+from app.core.mood_predictor_ml import make_mood_prediction
+from app.core.symptom_predictor_ml import make_symptom_prediction
+from app.core.predictor import Predictor
+from app.core.seven_day_planner import generate_7_day_plan
+
+
+def per_date_history(user_id, start_date, end_date, db):
+    """The original day-by-day /predictions/history loop"""
+    predictions = []
+    current_date = start_date
+    while current_date <= end_date:
+        try:
+            energy_prediction = make_prediction(user_id, current_date, db)
+            predicted_mood = None
+            try:
+                predicted_mood = make_mood_prediction(user_id, current_date, db).get("predicted_mood")
+            except ValueError:
+                pass
+            predicted_symptoms = []
+            try:
+                predicted_symptoms = make_symptom_prediction(user_id, current_date, db).get("predicted_symptoms", [])
+            except ValueError:
+                pass
+            predictions.append({
+                "date": current_date.isoformat(),
+                **energy_prediction,
+                "predicted_mood": predicted_mood,
+                "predicted_symptoms": predicted_symptoms,
+            })
+        except Exception:
+            pass
+        current_date += timedelta(days=1)
+    return predictions
+
+
+def test_history_matches_per_date(db, trained_user):
+    """Predictor.history returns exactly what the per-date loop returned"""
+    print("🧪 Testing range predictions against per-date predictions...")
+    # Starts before the first mood so the lag-less days are skipped too
+    start_date = date.today() - timedelta(days=95)
+    end_date = date.today() + timedelta(days=10)
+
+    expected = per_date_history(trained_user, start_date, end_date, db)
+    actual = Predictor(trained_user, db).history(start_date, end_date)
+
+    assert len(actual) == len(expected) > 0
+    assert actual == expected
+    print(f"✅ {len(actual)} daily predictions match")
+
+
+def test_history_without_models(db, seeded_user):
+    """No energy model means no history, as before"""
+    print("🧪 Testing range predictions without trained models...")
+    assert Predictor(seeded_user, db).history(date.today() - timedelta(days=7), date.today()) == []
+    print("✅ Empty history without models")
+
+
+def test_plan_uses_all_heads(db, trained_user):
+    """The planner gets the same per-day predictions as the single-date functions"""
+    print("🧪 Testing 7-day plan predictions...")
+    plan = generate_7_day_plan(trained_user, db)
+    assert len(plan) == 7
+    for daily_plan in plan:
+        target_date = date.fromisoformat(daily_plan["date"])
+        assert daily_plan["predicted_energy_level"] == make_prediction(trained_user, target_date, db)["predicted_energy_level"]
+        assert daily_plan["predicted_mood"] == make_mood_prediction(trained_user, target_date, db)["predicted_mood"]
+        assert daily_plan["predicted_symptoms"] == make_symptom_prediction(trained_user, target_date, db)["predicted_symptoms"]
+    print("✅ Plan matches per-model predictions")
+
+
+def test_vectorized_plan_scoring():
+    """Vectorized scoring agrees with the per-day weights and thresholds"""
+    print("🧪 Testing vectorized plan scoring...")
+    from app.core.seven_day_planner import (
+        score_plan_days, get_recommendations, get_recommendation,
+        ENERGY_WEIGHTS, MOOD_WEIGHTS, SYMPTOM_WEIGHTS,
+    )
+    energy_levels = ["low", "high", None, "medium", "high"]
+    moods = ["Sad", "Happy", "Calm", None, "Anxious"]
+    symptoms = [["Bleeding", "Cramps"], [], ["Acne", "Mood swings"], ["Fatigue"], ["Headache"]]
+
+    scores = score_plan_days(energy_levels, moods, symptoms)
+    for score, energy, mood, day_symptoms in zip(scores, energy_levels, moods, symptoms):
+        expected = ENERGY_WEIGHTS.get(energy, 0) + MOOD_WEIGHTS.get(mood, 0)
+        expected += sum(SYMPTOM_WEIGHTS.get(s, 0) for s in day_symptoms)
+        assert score == expected
+
+    all_scores = list(range(-15, 10))
+    assert get_recommendations(all_scores) == [get_recommendation(score) for score in all_scores]
+    print("✅ Vectorized scores and recommendations match")
+
+
+def test_long_horizon_plan(db, trained_user):
+    """Any horizon up to the configured maximum is planned in one pass"""
+    print("🧪 Testing 90-day plan...")
+    from app.core.seven_day_planner import generate_plan
+    plan = generate_plan(trained_user, db, days=90)
+    assert len(plan) == 90
+    assert plan[:7] == generate_7_day_plan(trained_user, db)
+    print("✅ 90-day plan generated")
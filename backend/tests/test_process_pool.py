@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test the ML process pool
+"""
+
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from app.config import settings
+from app.core import process_pool
+from app.core.ml_model import prepare_training_data, fit_energy_model
+from app.core.predictor import Predictor
+from app.core.seven_day_planner import generate_plan
+
+
+@pytest.fixture
+def pool(monkeypatch, db_path):
+    """A one-process pool whose workers open the test database"""
+    monkeypatch.setattr(settings, "ml_process_pool_workers", 1)
+    # Spawned workers build their own Settings from the environment
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db_path}")
+    yield process_pool.get_process_pool()
+    process_pool.shutdown_process_pool()
+
+
+def test_fit_in_pool(db, seeded_user, pool):
+    """Training data read here, model fitted in another process"""
+    print("🧪 Testing model fitting in the process pool...")
+    df = prepare_training_data(seeded_user, db)
+    model, accuracy = asyncio.run(process_pool.run_cpu_bound(fit_energy_model, df))
+    assert 0.0 <= accuracy <= 1.0
+    assert set(model.predict(df.drop(columns=["energy_level"]))) <= {0, 1, 2}
+    print("✅ Fitted model returned from the pool")
+
+
+def test_db_task_in_pool_matches_inline(db, trained_user, pool):
+    """A pool worker with its own session plans the same days as the request session"""
+    print("🧪 Testing database-backed work in the process pool...")
+    inline_plan = generate_plan(trained_user, db, days=14)
+
+    async def plan_in_pool():
+        # The AsyncSession is only used when there is no pool
+        return await process_pool.run_cpu_bound_with_db(None, generate_plan, trained_user, days=14)
+
+    assert asyncio.run(plan_in_pool()) == inline_plan
+    print("✅ Pool plan matches inline plan")
+
+
+def test_inline_without_pool(db, trained_user):
+    """ml_process_pool_workers = 0 runs on the caller's session"""
+    assert process_pool.get_process_pool() is None
+    target_dates = [date.today() + timedelta(days=i) for i in range(3)]
+
+    class FakeAsyncSession:
+        async def run_sync(self, fn):
+            return fn(db)
+
+    history = asyncio.run(process_pool.run_cpu_bound_with_db(
+        FakeAsyncSession(), lambda user_id, db: Predictor(user_id, db).predict(target_dates), trained_user
+    ))
+    assert list(history) == target_dates
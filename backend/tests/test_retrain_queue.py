@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test the DB-backed retrain job queue
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.security import get_current_active_user
+from app.config import settings
+from app.core.retrain_queue import enqueue_retrain, claim_next_job, drain_queue, schedule_auto_retrain, retrain_user_models
+from app.core.data_events import record_mood_write
+from app.core.prediction_store import get_model_version
+from app.core.ml_model import load_model
+from app.core.model_cache import get_cached_model
+from app.database import get_async_db
+from app.models import User, RetrainJob
+
+
+def test_duplicate_requests_coalesce(db, seeded_user):
+    """A second request while a job is pending returns that job"""
+    print("🧪 Testing retrain job coalescing...")
+    first = enqueue_retrain(seeded_user, db)
+    second = enqueue_retrain(seeded_user, db)
+    assert first.id == second.id
+    assert db.query(RetrainJob).count() == 1
+
+    # Once running, the job may have read stale data, so a new request queues another
+    assert claim_next_job(db).id == first.id
+    third = enqueue_retrain(seeded_user, db)
+    assert third.id != first.id
+    assert third.status == "pending"
+    print("✅ Pending jobs coalesce, running jobs do not")
+
+
+def test_abandoned_running_jobs_time_out(db, seeded_user, monkeypatch):
+    """A job whose worker died is failed once it passes the timeout; a younger one keeps running"""
+    monkeypatch.setattr(settings, "ml_retrain_job_timeout_seconds", 600)
+    abandoned = enqueue_retrain(seeded_user, db)
+    assert claim_next_job(db).id == abandoned.id
+    current = enqueue_retrain(seeded_user, db)
+    assert claim_next_job(db).id == current.id
+
+    abandoned.started_at = datetime.now(timezone.utc) - timedelta(seconds=601)
+    current.started_at = datetime.now(timezone.utc) - timedelta(seconds=60)
+    db.commit()
+    assert claim_next_job(db) is None
+
+    db.refresh(abandoned)
+    db.refresh(current)
+    assert abandoned.status == "failed" and abandoned.finished_at is not None
+    assert "600s" in abandoned.error
+    assert current.status == "running"
+
+
+def test_worker_drains_queue(db, seeded_user):
+    """The worker trains every model and records the results"""
+    print("🧪 Testing retrain worker...")
+    job = enqueue_retrain(seeded_user, db)
+    assert get_model_version(seeded_user, db) == "e0.m0.s0.p0"
+
+    assert drain_queue(db) == 1
+    assert claim_next_job(db) is None
+
+    db.refresh(job)
+    assert job.status == "succeeded"
+    assert job.progress == 100
+    assert job.started_at is not None and job.finished_at is not None
+    assert set(json.loads(job.results)) == {"energy_model", "mood_model", "symptom_model", "calibration"}
+    assert set(json.loads(job.timings)) == set(json.loads(job.results))
+    assert job.current_step is None
+    assert get_model_version(seeded_user, db) != "e0.m0.s0.p0"
+    print("✅ Job succeeded and models were saved")
+
+
+def test_parallel_training_budget(db, seeded_user, monkeypatch):
+    """Spare workers go to tree building and CV; saved models still predict single-threaded"""
+    print("🧪 Testing parallel training budget...")
+    monkeypatch.setattr(settings, "ml_training_workers", 8)
+    timings = {}
+    results = retrain_user_models(seeded_user, db, timings=timings)
+    assert list(results) == ["energy_model", "mood_model", "symptom_model", "calibration"]
+    assert results["energy_model"].startswith("Trained")
+    assert set(timings) == set(results)
+
+    model = get_cached_model(load_model(seeded_user, db))
+    assert model.named_steps["classifier"].n_jobs == 1
+    print("✅ Models trained concurrently")
+
+
+def test_retrain_endpoints(db, seeded_user, async_db_override):
+    """POST returns a job at once; GET reports its status to its owner only"""
+    print("🧪 Testing retrain endpoints...")
+    user = db.query(User).filter(User.id == seeded_user).first()
+    app.dependency_overrides[get_async_db] = async_db_override
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    try:
+        client = TestClient(app)
+        queued = client.post("/predictions/retrain")
+        assert queued.status_code == 202
+        job_id = queued.json()["id"]
+        assert queued.json()["status"] == "pending"
+        assert client.post("/predictions/retrain").json()["id"] == job_id
+
+        drain_queue(db)
+        finished = client.get(f"/predictions/retrain/{job_id}")
+        assert finished.status_code == 200
+        assert finished.json()["status"] == "succeeded"
+        assert finished.json()["results"]["energy_model"].startswith("Trained")
+        assert finished.json()["timings"]["energy_model"] > 0
+
+        assert client.get(f"/predictions/retrain/{job_id + 1}").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+    print("✅ Job queued, polled and finished")
+
+
+def test_auto_retrain_is_debounced(db, seeded_user, monkeypatch):
+    """A burst of mood writes yields one delayed job; claiming it restarts the count"""
+    print("🧪 Testing automatic retrain debounce...")
+    monkeypatch.setattr(settings, "ml_retrain_threshold", 3)
+    monkeypatch.setattr(settings, "ml_auto_retrain_debounce_seconds", 60)
+
+    def write_mood():
+        record_mood_write(db, seeded_user)
+        db.commit()
+        return schedule_auto_retrain(db, seeded_user)
+
+    assert write_mood() is None
+    assert write_mood() is None
+    job = write_mood()
+    assert job is not None and job.run_after is not None
+    first_run_after = job.run_after
+
+    for _ in range(5):
+        assert write_mood().id == job.id
+    db.refresh(job)
+    assert job.run_after >= first_run_after
+    assert db.query(RetrainJob).count() == 1
+
+    # Still inside the quiet period
+    assert claim_next_job(db) is None
+
+    # A manual request makes the coalesced job due at once
+    assert enqueue_retrain(seeded_user, db).id == job.id
+    assert claim_next_job(db).id == job.id
+    user = db.query(User).filter(User.id == seeded_user).first()
+    db.refresh(user)
+    assert user.mood_writes_since_retrain == 0
+    print("✅ One debounced job per burst")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test training data preparation
+"""
+
+from app.core.ml_model import prepare_training_data, compute_bmi
+from app.core.mood_predictor_ml import prepare_mood_training_data
+from app.core.symptom_predictor_ml import prepare_symptom_training_data
+from app.models import DailyMood
+
+
+def test_energy_lags_follow_date_order(db, seeded_user):
+    """Each row carries the energy of the three moods logged before it"""
+    print("🧪 Testing energy training data...")
+    moods = db.query(DailyMood).filter(DailyMood.user_id == seeded_user).order_by(DailyMood.date).all()
+    df = prepare_training_data(seeded_user, db)
+
+    assert len(df) == len(moods) - 3
+    assert df['mood_id'].tolist() == [mood.id for mood in moods[3:]]
+    energy = [mood.energy_level for mood in moods]
+    for lag in (1, 2, 3):
+        assert df[f'energy_lag_{lag}'].tolist() == energy[3 - lag:len(energy) - lag]
+    assert (df['BMI'] == compute_bmi(165, 60.0)).all()
+    assert df['Unusual_Bleeding'].dtype == bool
+    print("✅ Lags line up")
+
+
+def test_mood_and_symptom_data(db, seeded_user):
+    """Mood rows skip unlogged moods; symptoms become one-element lists"""
+    print("🧪 Testing mood and symptom training data...")
+    moods = db.query(DailyMood).filter(DailyMood.user_id == seeded_user).order_by(DailyMood.date).all()
+
+    mood_df = prepare_mood_training_data(seeded_user, db)
+    assert mood_df['mood'].tolist() == [mood.mood for mood in moods if mood.mood]
+    assert list(mood_df.columns) == ['day_of_cycle', 'cycle_length', 'luteal_length', 'bmi', 'mood']
+
+    symptom_df = prepare_symptom_training_data(seeded_user, db)
+    assert symptom_df['symptoms'].tolist() == [[mood.symptoms] if mood.symptoms else [] for mood in moods]
+    assert symptom_df['day_of_cycle'].tolist() == [mood.day_of_cycle for mood in moods]
+    print("✅ Mood and symptom rows match the logs")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test that a request-scoped UserContext removes repeated profile/period/mood queries
+"""
+
+from contextlib import contextmanager
+from datetime import date
+
+from sqlalchemy import event
+
+from app.api.predictions import build_current_prediction
+from app.core.ml_model import make_prediction
+from app.core.mood_predictor_ml import make_mood_prediction
+from app.core.symptom_predictor_ml import make_symptom_prediction
+
+
+@contextmanager
+def count_queries(db):
+    """Collect every SQL statement executed on the session's engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def queries_on(statements, table):
+    return [s for s in statements if f"FROM {table}" in s]
+
+
+def test_current_prediction_query_count(db, trained_user):
+    """/predictions/current reads the profile, periods and moods once each"""
+    print("🧪 Testing /predictions/current query count...")
+    today = date.today()
+
+    # Without a shared context every function re-queries the same rows
+    with count_queries(db) as without_ctx:
+        make_prediction(trained_user, today, db)
+        make_mood_prediction(trained_user, today, db)
+        make_symptom_prediction(trained_user, today, db)
+
+    with count_queries(db) as with_ctx:
+        response = build_current_prediction(trained_user, today, db)
+
+    assert response.predicted_energy_level in ("low", "medium", "high")
+    assert len(queries_on(without_ctx, "user_profiles")) >= 3
+    assert len(queries_on(with_ctx, "user_profiles")) == 1
+    assert len(queries_on(with_ctx, "period_records")) == 1
+    assert len(queries_on(with_ctx, "daily_moods")) == 1
+    assert len(with_ctx) < len(without_ctx)
+    print(f"✅ {len(without_ctx)} queries without a context, {len(with_ctx)} with one")